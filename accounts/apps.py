@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class AccountsConfig(AppConfig):
@@ -6,4 +8,11 @@ class AccountsConfig(AppConfig):
     name = "accounts"
 
     def ready(self):
-        import accounts.signals
\ No newline at end of file
+        import accounts.signals
+        from skillexa.cache import is_shared_cache
+
+        if settings.AUTH_USER_CACHE and not is_shared_cache():
+            raise ImproperlyConfigured(
+                "AUTH_USER_CACHE requires a cache shared by every process: "
+                "set CACHE_URL, or disable AUTH_USER_CACHE."
+            )
\ No newline at end of file
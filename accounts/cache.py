@@ -0,0 +1,78 @@
+import copy
+import threading
+import time
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+VERSION_KEY = "auth:user:{id}:version"
+USER_KEY = "auth:user:{id}:{version}"
+
+_local_users = TTLCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TIMEOUT
+)
+_local_lock = threading.Lock()
+
+
+def get_user_version(user_id):
+    """
+    Return the current cache version of a user, creating it if missing.
+
+    New versions are seeded from the clock so that a version key evicted from
+    the shared cache never comes back with a value an old entry was stored under.
+    """
+    key = VERSION_KEY.format(id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_cached_user(user_id):
+    """
+    Resolve a user by id through the in-process LRU, then the shared cache,
+    then the database.
+
+    Entries are keyed by `(id, version)`, so bumping the version with
+    `invalidate_user` makes every process miss on its next lookup. Both tiers
+    also expire after `AUTH_USER_CACHE_TIMEOUT`, which bounds staleness for
+    writes that skip the invalidation. Each caller gets its own copy, as views
+    are free to modify and save `request.user`.
+
+    With `AUTH_USER_CACHE` off, every lookup reads the database.
+
+    Raises:
+        User.DoesNotExist: If no user has the given id.
+    """
+    if not settings.AUTH_USER_CACHE:
+        return User.objects.get(pk=user_id)
+
+    version = get_user_version(user_id)
+    local_key = (user_id, version)
+
+    with _local_lock:
+        user = _local_users.get(local_key)
+
+    if user is None:
+        shared_key = USER_KEY.format(id=user_id, version=version)
+        user = cache.get(shared_key)
+        if user is None:
+            user = User.objects.get(pk=user_id)
+            cache.set(shared_key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        with _local_lock:
+            _local_users[local_key] = user
+
+    return copy.copy(user)
+
+
+def invalidate_user(user_id):
+    """Drop every cached copy of a user after its stored row has changed."""
+    key = VERSION_KEY.format(id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
@@ -0,0 +1,74 @@
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+
+from accounts.throttles import UserCounterThrottle
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per request cost of DRF's timestamp list throttle with the "
+        "counter throttle for a user close to the daily limit. The benchmark "
+        "user gets a unique key and only its throttle keys are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", default="5000/day")
+        parser.add_argument(
+            "--history", type=int, default=4000, help="Requests already made by the user"
+        )
+        parser.add_argument("--requests", type=int, default=1000, help="Requests timed")
+        parser.add_argument(
+            "--cache", default="default", help="Cache alias the throttles run against"
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[options["cache"]]
+        request = APIRequestFactory().get("/")
+
+        for throttle_class in (UserRateThrottle, UserCounterThrottle):
+            # A fresh identity per run, so no real user's throttle keys are touched
+            request.user = SimpleNamespace(
+                pk=f"benchmark-{uuid.uuid4().hex}", is_authenticated=True
+            )
+            throttle_class.rate = options["rate"]
+            throttle_class.cache = cache
+            start_time = time.time()
+            try:
+                for _ in range(options["history"]):
+                    throttle_class().allow_request(request, None)
+
+                timings = []
+                for _ in range(options["requests"]):
+                    start = time.perf_counter()
+                    throttle_class().allow_request(request, None)
+                    timings.append((time.perf_counter() - start) * 1_000_000)
+            finally:
+                self.delete_keys(throttle_class, request, start_time)
+                del throttle_class.rate
+                del throttle_class.cache
+
+            timings.sort()
+            self.stdout.write(
+                f"{throttle_class.__name__:<20} "
+                f"p50={statistics.median(timings):8.1f}us  "
+                f"p99={timings[int(len(timings) * 0.99)]:8.1f}us"
+            )
+
+    def delete_keys(self, throttle_class, request, start_time):
+        """Delete the keys the benchmark user's throttle wrote, and nothing else."""
+        throttle = throttle_class()
+        key = throttle.get_cache_key(request, None)
+        duration = throttle.duration
+        # Counter throttles write one key per window the run overlapped
+        first, last = int(start_time // duration), int(time.time() // duration)
+        windows = range(first - 1, last + 1)
+        throttle_class.cache.delete_many(
+            [key, *(f"{key}:{window}" for window in windows)]
+        )
@@ -136,6 +136,11 @@ class User(AbstractBaseUser):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-date_joined", "-id"], name="user_date_joined_idx"),
+        ]
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -7,6 +7,7 @@ from rest_framework_simplejwt.serializers import (
 )
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .cache import invalidate_user
 from .models import OtpVerification, User
 
 
@@ -146,6 +147,7 @@ class OTPVerificationSerializer(serializers.Serializer):
         if purpose == "registration":
             user.is_active = True
             user.save()
+            invalidate_user(user.id)
         elif purpose == "password_reset":
             return {"message": "OTP verified. Proceed to reset password."}
         elif purpose == "email_change":
@@ -222,6 +224,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
         user = User.objects.get(email=self.validated_data["email"])
         user.password = make_password(self.validated_data["new_password"])
         user.save()
+        invalidate_user(user.id)
 
         OtpVerification.objects.filter(user=user, purpose="password_reset").delete()
         return user
@@ -9,10 +9,11 @@ from django.core.cache import cache
 from django.urls import reverse
 from django.utils.timezone import now, timedelta
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from accounts.models import OtpVerification, User
+from accounts.throttles import AnonCounterThrottle
 
 
 class AuthenticationTestCase(APITestCase):
@@ -666,3 +667,75 @@ class ForgotPasswordTestCase(APITestCase):
             },
         )
         self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class CachedUserAuthenticationTestCase(APITestCase):
+    """Unit tests for the cached user resolution in JWT authentication"""
+
+    def setUp(self):
+        self.profile_url = reverse("profile")
+        self.user = User.objects.create_user(
+            email="user@example.com",
+            username="user1",
+            password="SecurePass123",
+            first_name="Test",
+            last_name="User",
+        )
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_warm_requests_do_not_query_users(self):
+        """Only the first request loads the user from the database"""
+        self.client.get(self.profile_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_profile_update_invalidates_cached_user(self):
+        """Profile changes are visible on the next request"""
+        self.client.get(self.profile_url)
+
+        response = self.client.patch(self.profile_url, {"first_name": "Changed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.data["first_name"], "Changed")
+
+
+class CounterRateThrottleTestCase(APITestCase):
+    """Unit tests for the sliding window counter throttle"""
+
+    def setUp(self):
+        cache.clear()
+        self.now = 600.0
+        self.request = APIRequestFactory().get("/")
+        self.request.user = None
+
+    def allow(self):
+        throttle = AnonCounterThrottle()
+        throttle.rate = "3/m"
+        throttle.num_requests, throttle.duration = 3, 60
+        throttle.timer = lambda: self.now
+        return throttle.allow_request(self.request, None), throttle
+
+    def test_limit_within_a_window(self):
+        """Requests over the rate are rejected and not counted"""
+        self.assertEqual([self.allow()[0] for _ in range(3)], [True, True, True])
+
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertGreater(throttle.wait(), 0)
+        self.assertEqual(cache.get(f"{throttle.key}:10"), 3)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        """Requests of the previous window count for the part still in range"""
+        for _ in range(3):
+            self.allow()
+
+        self.now = 660.0 + 30  # halfway through the next window: 3 * 0.5 = 1.5
+        self.assertTrue(self.allow()[0])
+        self.assertFalse(self.allow()[0])
+
+        self.now = 660.0 + 59  # the previous window has almost left the range
+        self.assertTrue(self.allow()[0])
@@ -1,11 +1,98 @@
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
 
 # Ensure to give proper configuration during production when using a load balancer
 
 
-class OTPRequestThrottle(UserRateThrottle):
+class CounterRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter throttle.
+
+    DRF's `SimpleRateThrottle` keeps a list with the timestamp of every request
+    in the window and rewrites it on each call. This throttle keeps one integer
+    per key and fixed window instead, bumped with an atomic `cache.incr`, so
+    the cost per request is constant and concurrent processes sharing the cache
+    never lose updates.
+
+    The rate is enforced over a sliding window by weighting the previous
+    window's count by the share of it that still overlaps the last `duration`
+    seconds. Rejected requests are not counted, as with DRF.
+    """
+
+    def get_window_keys(self):
+        window = int(self.now // self.duration)
+        return f"{self.key}:{window}", f"{self.key}:{window - 1}"
+
+    def increment(self, key):
+        """Atomically add one to `key`, creating it for two windows if missing."""
+        for _ in range(2):
+            try:
+                return self.cache.incr(key)
+            except ValueError:
+                if self.cache.add(key, 1, self.duration * 2):
+                    return 1
+        return self.cache.incr(key)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        current_key, previous_key = self.get_window_keys()
+        self.previous = self.cache.get(previous_key, 0)
+        self.elapsed = self.now % self.duration
+        self.current = self.increment(current_key)
+
+        if self.estimate(self.current) > self.num_requests:
+            self.cache.decr(current_key)
+            self.current -= 1
+            return self.throttle_failure()
+        return True
+
+    def estimate(self, current):
+        overlap = 1 - self.elapsed / self.duration
+        return self.previous * overlap + current
+
+    def wait(self):
+        """
+        Seconds until the estimated count drops below the limit, assuming no
+        further requests are allowed in the meantime.
+        """
+        excess = self.estimate(self.current) - self.num_requests + 1
+        if excess <= 0:
+            return None
+
+        # The previous window's weight decays over the rest of this window.
+        decay = self.previous * (1 - self.elapsed / self.duration)
+        if excess <= decay:
+            return excess * self.duration / self.previous
+
+        # Otherwise wait for this window's own count to decay in the next one.
+        remaining = self.duration - self.elapsed
+        if self.current <= 0:
+            return remaining
+        allowed = max(self.num_requests - 1, 0)
+        return remaining + self.duration * max(1 - allowed / self.current, 0)
+
+
+class AnonCounterThrottle(CounterRateThrottle, AnonRateThrottle):
+    """Counter based replacement for DRF's `AnonRateThrottle`."""
+
+
+class UserCounterThrottle(CounterRateThrottle, UserRateThrottle):
+    """Counter based replacement for DRF's `UserRateThrottle`."""
+
+
+class OTPRequestThrottle(UserCounterThrottle):
     scope = "otp_request"
 
 
-class LoginAttemptThrottle(UserRateThrottle):
+class LoginAttemptThrottle(UserCounterThrottle):
     scope = "login_attempt"
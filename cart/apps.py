@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class CartConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cart'
+
+    def ready(self):
+        from skillexa.cache import is_shared_cache
+
+        if settings.CART_STORE and not is_shared_cache():
+            raise ImproperlyConfigured(
+                "CART_STORE requires a cache shared by every process: "
+                "set CACHE_URL, or disable CART_STORE."
+            )
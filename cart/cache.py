@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from courses.cache import get_catalog_version
+from courses.models import Course
+
+from .models import Cart
+
+VERSION_KEY = "cart:{id}:version"
+SUMMARY_KEY = "cart:{id}:summary:{version}:{catalog}"
+
+
+def get_cart_version(student_id):
+    """
+    Return the current cart version of a student, creating it if missing.
+
+    Like `accounts.cache`, new versions are seeded from the clock so an evicted
+    counter never returns to a value older summaries were cached under.
+    """
+    key = VERSION_KEY.format(id=student_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cart_version(student_id):
+    key = VERSION_KEY.format(id=student_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_cart(student_id):
+    """
+    Expire the cached summary of a student's cart once the current transaction
+    commits, so it is never recomputed from rows about to change.
+    """
+    transaction.on_commit(lambda: bump_cart_version(student_id))
+
+
+def get_cart_summary(student_id):
+    """
+    Item count, subtotal and course ids of the published courses in a
+    student's cart.
+
+    Computed with the aggregate `orders.utils.create_order` totals orders
+    with, and cached under the student's cart version and the catalog version,
+    which price changes bump. A cache hit runs no query.
+    """
+    key = SUMMARY_KEY.format(
+        id=student_id,
+        version=get_cart_version(student_id),
+        catalog=get_catalog_version(),
+    )
+    summary = cache.get(key)
+    if summary is None:
+        summary = Cart.objects.filter(
+            student_id=student_id, course__status=Course.CourseStatus.PUBLISHED
+        ).summary()
+        summary["subtotal"] = str(summary["subtotal"])
+        cache.set(key, summary, timeout=settings.CART_SUMMARY_CACHE_TIMEOUT)
+    return summary
@@ -1,12 +1,35 @@
+from decimal import Decimal
+
+from django.contrib.postgres.aggregates import ArrayAgg
 from django.db import models
+from django.db.models import Count, Sum
+
+from courses.counters import CourseCountedModel, CourseCounterQuerySet
+
+
+class CartQuerySet(CourseCounterQuerySet):
+    def summary(self):
+        """
+        Item count, subtotal and sorted course ids of the cart rows, in one
+        aggregate query.
+        """
+        return self.aggregate(
+            count=Count("id"),
+            subtotal=Sum("course__price", default=Decimal("0.00")),
+            course_ids=ArrayAgg("course_id", default=[], ordering="course_id"),
+        )
 
 
-class Cart(models.Model):
+class Cart(CourseCountedModel):
+    counter_field = "cart_count"
+
     student = models.ForeignKey("accounts.User", on_delete=models.CASCADE)
     course = models.ForeignKey("courses.Course", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.student.email}"
 
@@ -20,7 +43,9 @@ class Cart(models.Model):
         ordering = ["-created_at"]
 
 
-class Wishlist(models.Model):
+class Wishlist(CourseCountedModel):
+    counter_field = "wishlist_count"
+
     student = models.ForeignKey("accounts.User", on_delete=models.CASCADE)
     course = models.ForeignKey("courses.Course", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
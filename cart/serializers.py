@@ -1,8 +1,13 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
 
 from courses.models import Course
 from students.models import Enrollments
 
+from . import store as cart_store
+from .cache import invalidate_cart
 from .models import Cart, Wishlist
 
 
@@ -54,7 +59,11 @@ class CartSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("You are already enrolled in this course.")
     
         # check if the course is already in the cart
-        if Cart.objects.filter(student=student, course=value).exists():
+        if cart_store.enabled():
+            in_cart = value.id in cart_store.course_ids(student.id)
+        else:
+            in_cart = Cart.objects.filter(student=student, course=value).exists()
+        if in_cart:
             raise serializers.ValidationError("This course is already in your cart.")
 
         return value
@@ -113,3 +122,203 @@ class WishlistSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("This course is already in your wishlist.")
 
         return value
+
+
+class BulkAddSerializer(serializers.Serializer):
+    """
+    Add several courses to the student's cart or wishlist at once.
+
+    The whole set is validated with one query over `Course`, checking the
+    student's enrollments and saved items with `EXISTS` subqueries, and the
+    accepted courses are inserted with a single `bulk_create`. `save()`
+    returns the outcome of every requested course.
+    """
+
+    model = None
+    item_name = None
+    check_enrollment = False
+    missing = ("not_found", "This course does not exist.")
+
+    courses = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+
+    def validate_courses(self, value):
+        """
+        Drop duplicate ids, keeping the requested order, and cap the batch size
+        """
+        value = list(dict.fromkeys(value))
+        if len(value) > settings.CART_BULK_ADD_MAX_COURSES:
+            raise serializers.ValidationError(
+                f"At most {settings.CART_BULK_ADD_MAX_COURSES} courses can be "
+                "added at once."
+            )
+        return value
+
+    def saved_course_ids(self, student):
+        """
+        Ids of the courses `student` already saved, or `None` to check them in
+        the validation query
+        """
+        return None
+
+    def candidates(self, student, course_ids):
+        """The courses to validate"""
+        return Course.objects.filter(id__in=course_ids)
+
+    def outcomes(self, student, course_ids):
+        """
+        Map every requested course id to `(status, message)`, `status` being
+        "added" for the courses that can be added.
+        """
+        courses = self.candidates(student, course_ids)
+        fields = ["id", "status"]
+        saved_ids = self.saved_course_ids(student)
+        if saved_ids is None:
+            courses = courses.annotate(
+                saved=Exists(
+                    self.model.objects.filter(student=student, course=OuterRef("pk"))
+                )
+            )
+            fields.append("saved")
+        if self.check_enrollment:
+            courses = courses.annotate(
+                enrolled=Exists(
+                    Enrollments.objects.filter(student=student, course=OuterRef("pk"))
+                )
+            )
+            fields.append("enrolled")
+
+        found = {}
+        for course in courses.values(*fields):
+            if saved_ids is not None:
+                course["saved"] = course["id"] in saved_ids
+            if course["status"] != Course.CourseStatus.PUBLISHED:
+                outcome = (
+                    "not_available",
+                    "This course is not available for purchase.",
+                )
+            elif course.get("enrolled"):
+                outcome = (
+                    "already_enrolled",
+                    "You are already enrolled in this course.",
+                )
+            elif course["saved"]:
+                outcome = (
+                    f"already_in_{self.item_name}",
+                    f"This course is already in your {self.item_name}.",
+                )
+            else:
+                outcome = ("added", None)
+            found[course["id"]] = outcome
+
+        if course_ids is None:
+            return found
+        return {
+            course_id: found.get(course_id, self.missing) for course_id in course_ids
+        }
+
+    def add(self, student, course_ids):
+        """
+        Insert the items and return the ids of the courses actually added; a
+        course saved concurrently since the check is skipped
+        """
+        return self.model.objects.insert_missing(
+            self.model(student=student, course_id=course_id)
+            for course_id in course_ids
+        )
+
+    def create(self, validated_data):
+        student = validated_data["student"]
+        outcomes = self.outcomes(student, validated_data.get("courses"))
+        added = [
+            course_id
+            for course_id, (status, _) in outcomes.items()
+            if status == "added"
+        ]
+        if added:
+            inserted = set(self.add(student, added))
+            saved = (
+                f"already_in_{self.item_name}",
+                f"This course is already in your {self.item_name}.",
+            )
+            for course_id in added:
+                if course_id not in inserted:
+                    outcomes[course_id] = saved
+
+        return [
+            {"course": course_id, "status": status, "message": message}
+            for course_id, (status, message) in outcomes.items()
+        ]
+
+
+class BulkCartSerializer(BulkAddSerializer):
+    model = Cart
+    item_name = "cart"
+    check_enrollment = True
+
+    def saved_course_ids(self, student):
+        if cart_store.enabled():
+            return cart_store.course_ids(student.id)
+        return None
+
+    def add(self, student, course_ids):
+        if cart_store.enabled():
+            return cart_store.update(student.id, add=course_ids)
+        added = super().add(student, course_ids)
+        invalidate_cart(student.id)
+        return added
+
+
+class BulkWishlistSerializer(BulkAddSerializer):
+    model = Wishlist
+    item_name = "wishlist"
+
+
+class MoveToCartSerializer(BulkCartSerializer):
+    """
+    Move a selection of wishlist courses, or the whole wishlist, to the cart.
+
+    Runs in one transaction: the selected wishlist courses are validated with
+    one query, the accepted ones are inserted in the cart with a single bulk
+    insert, and every course that ends up in the cart leaves the wishlist
+    with a single delete. With the cart store enabled, the cart entry is
+    written last, inside that transaction: if its lock cannot be taken, the
+    wishlist delete rolls back with it.
+    """
+
+    missing = ("not_in_wishlist", "This course is not in your wishlist.")
+    pending = ()
+
+    courses = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+
+    def candidates(self, student, course_ids):
+        courses = Course.objects.filter(wishlist__student=student).order_by("id")
+        if course_ids is not None:
+            courses = courses.filter(id__in=course_ids)
+        return courses
+
+    def add(self, student, course_ids):
+        if cart_store.enabled():
+            # Written by `create` once the wishlist rows are deleted
+            self.pending = course_ids
+            return course_ids
+        return super().add(student, course_ids)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            results = super().create(validated_data)
+            moved = [
+                result["course"]
+                for result in results
+                if result["status"] in ("added", "already_in_cart")
+            ]
+            if moved:
+                Wishlist.objects.filter(
+                    student=validated_data["student"], course_id__in=moved
+                ).delete()
+            if self.pending:
+                cart_store.update(validated_data["student"].id, add=self.pending)
+        return results
@@ -0,0 +1,217 @@
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from courses.cache import get_catalog_version
+from courses.models import Course
+
+from .cache import invalidate_cart
+from .models import Cart
+
+CART_KEY = "cart:{id}"
+LOCK_KEY = "cart:{id}:lock"
+
+
+def enabled():
+    return settings.CART_STORE
+
+
+@contextmanager
+def locked(student_id):
+    """
+    Serialize the writers of a student's cart entry across processes.
+
+    The lock expires after `CART_STORE_LOCK_TIMEOUT` seconds, so a crashed
+    holder cannot block the cart for longer than that.
+
+    Raises:
+        TimeoutError: If the lock could not be acquired in time.
+    """
+    key = LOCK_KEY.format(id=student_id)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.CART_STORE_LOCK_TIMEOUT
+    while not cache.add(key, token, timeout=settings.CART_STORE_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Cart of student {student_id} is locked.")
+        time.sleep(0.005)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def item(price, title, status):
+    return str(price), title, status == Course.CourseStatus.PUBLISHED
+
+
+def describe(course_ids):
+    """`{course_id: (price, title, published)}` of the existing courses, in order."""
+    courses = {
+        course_id: item(*course)
+        for course_id, *course in Course.objects.filter(id__in=course_ids).values_list(
+            "id", "price", "title", "status"
+        )
+    }
+    return {
+        course_id: courses[course_id]
+        for course_id in course_ids
+        if course_id in courses
+    }
+
+
+def load(student_id):
+    """Build a cart entry from the student's persisted `Cart` rows."""
+    rows = (
+        Cart.objects.filter(student_id=student_id)
+        .order_by("created_at", "id")
+        .values_list("course_id", "course__price", "course__title", "course__status")
+    )
+    return {
+        "items": {course_id: item(*course) for course_id, *course in rows},
+        "dirty": False,
+    }
+
+
+def save(student_id, entry):
+    # Entries with writes not yet persisted never expire
+    cache.set(
+        CART_KEY.format(id=student_id),
+        entry,
+        timeout=None if entry["dirty"] else settings.CART_STORE_TIMEOUT,
+    )
+
+
+def current(student_id, version):
+    """
+    The cart entry of a student, loaded from the database on a cache miss and
+    with its course data refreshed if it predates catalog `version`. Callers
+    hold the lock.
+    """
+    entry = cache.get(CART_KEY.format(id=student_id))
+    if entry is None:
+        entry = load(student_id)
+    elif entry["catalog"] != version:
+        entry["items"] = describe(list(entry["items"]))
+    entry["catalog"] = version
+    return entry
+
+
+def get_entry(student_id):
+    """
+    The cart entry of a student: its course ids, in the order they were added,
+    with the price, title and published status of each course.
+
+    A cache hit runs no query. Entries are loaded from the database on a miss,
+    and their denormalized course data is refreshed once the catalog version
+    changes (e.g. a price update).
+    """
+    version = get_catalog_version()
+    entry = cache.get(CART_KEY.format(id=student_id))
+    if entry is not None and entry["catalog"] == version:
+        return entry
+
+    with locked(student_id):
+        entry = current(student_id, version)
+        save(student_id, entry)
+    return entry
+
+
+def get_items(student_id):
+    """The published courses of a student's cart, most recently added first."""
+    return [
+        {"course": course_id, "course_title": title, "course_price": price}
+        for course_id, (price, title, published) in reversed(
+            get_entry(student_id)["items"].items()
+        )
+        if published
+    ]
+
+
+def get_summary(student_id):
+    """Item count, subtotal and course ids of the published courses in a cart."""
+    items = get_items(student_id)
+    subtotal = sum((Decimal(item["course_price"]) for item in items), Decimal("0.00"))
+    return {
+        "count": len(items),
+        "subtotal": str(subtotal),
+        "course_ids": sorted(item["course"] for item in items),
+    }
+
+
+def course_ids(student_id):
+    """Ids of every course in a student's cart, published or not."""
+    return set(get_entry(student_id)["items"])
+
+
+def update(student_id, add=(), remove=(), clear=False):
+    """
+    Change a student's cart entry and schedule its persistence.
+
+    Returns:
+        list: Ids of the courses that were added.
+    """
+    version = get_catalog_version()
+    with locked(student_id):
+        entry = current(student_id, version)
+        items = {} if clear else entry["items"]
+        for course_id in remove:
+            items.pop(course_id, None)
+        added = [
+            course_id for course_id in dict.fromkeys(add) if course_id not in items
+        ]
+        items.update(describe(added))
+        entry.update(items=items, dirty=True)
+        save(student_id, entry)
+
+    from .tasks import persist_cart_task
+
+    transaction.on_commit(lambda: persist_cart_task.delay(student_id))
+    return added
+
+
+def persist(student_id):
+    """
+    Write a student's cart entry behind to the `Cart` table.
+
+    Rows are inserted and deleted so that the table matches the entry, which
+    makes persisting idempotent: several writes queued in a row converge on
+    the latest entry.
+    """
+    with locked(student_id):
+        entry = cache.get(CART_KEY.format(id=student_id))
+        if entry is None or not entry["dirty"]:
+            return
+
+        wanted = set(entry["items"])
+        with transaction.atomic():
+            saved = set(
+                Cart.objects.filter(student_id=student_id).values_list(
+                    "course_id", flat=True
+                )
+            )
+            added = wanted - saved
+            if added:
+                Cart.objects.insert_missing(
+                    Cart(student_id=student_id, course_id=course_id)
+                    for course_id in added
+                )
+            removed = saved - wanted
+            if removed:
+                Cart.objects.filter(
+                    student_id=student_id, course_id__in=removed
+                ).delete()
+            invalidate_cart(student_id)
+
+        entry["dirty"] = False
+        save(student_id, entry)
+
+
+def forget(student_id):
+    """Drop a student's cart entry, after its rows were changed in the database."""
+    cache.delete(CART_KEY.format(id=student_id))
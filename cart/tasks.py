@@ -0,0 +1,13 @@
+from celery import shared_task
+from django.db import DatabaseError
+
+from . import store
+
+
+# Persisting is idempotent and dirty entries never expire, so retrying is safe
+@shared_task(
+    autoretry_for=(TimeoutError, DatabaseError), retry_backoff=True, max_retries=8
+)
+def persist_cart_task(student_id):
+    store.persist(student_id)
+    return f"Persisted the cart of student {student_id}"
@@ -1,10 +1,19 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from accounts.models import User
-from cart.models import Cart
+from cart.models import Cart, Wishlist
+from cart.serializers import BulkCartSerializer
+from cart.tasks import persist_cart_task
 from courses.models import Course
+from orders.utils import create_order
+from students.models import Enrollments
 
 
 class CartAPITestCase(APITestCase):
@@ -143,6 +152,437 @@ class CartAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data["message"], "Your cart is already empty.")
 
+    # ------------------------ Popularity Counters ------------------------
+
+    def test_cart_counter_follows_cart_rows(self):
+        """Adding, removing and clearing cart items keep the course counter in sync."""
+        self.authenticate()
+        course = self.published_course
+
+        response = self.client.post(self.url, {"course": course.id})
+        course.refresh_from_db()
+        self.assertEqual(course.cart_count, 1)
+
+        self.client.delete(f"{self.url}{response.data['id']}/")
+        course.refresh_from_db()
+        self.assertEqual(course.cart_count, 0)
+
+        other = User.objects.create_user(
+            first_name="other",
+            last_name="student",
+            email="other@example.com",
+            username="other",
+            password="other123",
+        )
+        Cart.objects.bulk_create(
+            [Cart(student=self.student, course=course), Cart(student=other, course=course)]
+        )
+        course.refresh_from_db()
+        self.assertEqual(course.cart_count, 2)
+
+        self.client.delete(f"{self.url}clear/")
+        course.refresh_from_db()
+        self.assertEqual(course.cart_count, 1)
+
+    # ------------------------ Bulk Add Tests ------------------------
+
+    def test_bulk_add_reports_outcome_per_course(self):
+        """Bulk add inserts the valid courses and says why the others were skipped."""
+        self.authenticate()
+        enrolled = Course.objects.create(
+            title="Enrolled Course", status=Course.CourseStatus.PUBLISHED, price=99
+        )
+        in_cart = Course.objects.create(
+            title="Saved Course", status=Course.CourseStatus.PUBLISHED, price=99
+        )
+        Enrollments.objects.create(student=self.student, course=enrolled)
+        Cart.objects.create(student=self.student, course=in_cart)
+
+        requested = [
+            self.published_course.id,
+            self.draft_course.id,
+            enrolled.id,
+            in_cart.id,
+            999,
+            self.published_course.id,
+        ]
+        response = self.client.post(
+            f"{self.url}bulk/", {"courses": requested}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(item["course"], item["status"]) for item in response.data["results"]],
+            [
+                (self.published_course.id, "added"),
+                (self.draft_course.id, "not_available"),
+                (enrolled.id, "already_enrolled"),
+                (in_cart.id, "already_in_cart"),
+                (999, "not_found"),
+            ],
+        )
+        self.assertTrue(
+            Cart.objects.filter(
+                student=self.student, course=self.published_course
+            ).exists()
+        )
+        self.published_course.refresh_from_db()
+        self.assertEqual(self.published_course.cart_count, 1)
+
+        # Nothing left to add
+        response = self.client.post(
+            f"{self.url}bulk/", {"courses": [self.published_course.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["status"], "already_in_cart")
+
+    def test_bulk_add_queries_do_not_grow_with_courses(self):
+        """A batch is validated and inserted with as many queries as a single course."""
+        self.authenticate()
+        courses = Course.objects.bulk_create(
+            [
+                Course(title=f"Course {i}", status=Course.CourseStatus.PUBLISHED)
+                for i in range(20)
+            ]
+        )
+        # The first request also resolves and caches the authenticated user
+        self.client.post(
+            f"{self.url}bulk/", {"courses": [courses[0].id]}, format="json"
+        )
+        response = self.client.post(
+            f"{self.url}bulk/", {"courses": [courses[1].id]}, format="json"
+        )
+        single = response.query_recorder.count
+
+        response = self.client.post(
+            f"{self.url}bulk/",
+            {"courses": [course.id for course in courses[2:]]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.query_recorder.count, single)
+        self.assertEqual(Cart.objects.filter(student=self.student).count(), 20)
+
+    def test_bulk_add_skips_courses_saved_concurrently(self):
+        """A course saved since the check is reported and counted once."""
+        self.authenticate()
+        other = Course.objects.create(
+            title="Flask Basics", status=Course.CourseStatus.PUBLISHED, price=199
+        )
+        Cart.objects.create(student=self.student, course=self.published_course)
+        outcomes = {
+            self.published_course.id: ("added", None),
+            other.id: ("added", None),
+        }
+        with mock.patch.object(BulkCartSerializer, "outcomes", return_value=outcomes):
+            response = self.client.post(
+                f"{self.url}bulk/",
+                {"courses": [self.published_course.id, other.id]},
+                format="json",
+            )
+        self.assertEqual(
+            [item["status"] for item in response.data["results"]],
+            ["already_in_cart", "added"],
+        )
+        self.published_course.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.published_course.cart_count, 1)
+        self.assertEqual(other.cart_count, 1)
+
+    def test_bulk_add_to_wishlist(self):
+        """Wishlist bulk add skips saved and unpublished courses."""
+        self.authenticate()
+        Wishlist.objects.create(student=self.student, course=self.archived_course)
+        response = self.client.post(
+            "/wishlist/bulk/",
+            {"courses": [self.published_course.id, self.archived_course.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["added", "not_available"],
+        )
+        self.published_course.refresh_from_db()
+        self.assertEqual(self.published_course.wishlist_count, 1)
+
+    def test_bulk_add_rejects_oversized_batch(self):
+        """A batch larger than the configured maximum is rejected."""
+        self.authenticate()
+        with self.settings(CART_BULK_ADD_MAX_COURSES=2):
+            response = self.client.post(
+                f"{self.url}bulk/", {"courses": [1, 2, 3]}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # ------------------------ Move To Cart ------------------------
+
+    def test_move_wishlist_to_cart(self):
+        """Selected wishlist courses move to the cart in one request."""
+        self.authenticate()
+        enrolled = Course.objects.create(
+            title="Enrolled Course", status=Course.CourseStatus.PUBLISHED, price=99
+        )
+        in_cart = Course.objects.create(
+            title="Saved Course", status=Course.CourseStatus.PUBLISHED, price=99
+        )
+        Enrollments.objects.create(student=self.student, course=enrolled)
+        Cart.objects.create(student=self.student, course=in_cart)
+        for course in (self.published_course, self.draft_course, enrolled, in_cart):
+            Wishlist.objects.create(student=self.student, course=course)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/wishlist/move-to-cart/",
+                {"courses": [self.published_course.id, in_cart.id, 999]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(item["course"], item["status"]) for item in response.data["results"]],
+            [
+                (self.published_course.id, "added"),
+                (in_cart.id, "already_in_cart"),
+                (999, "not_in_wishlist"),
+            ],
+        )
+        self.assertEqual(
+            set(Wishlist.objects.values_list("course_id", flat=True)),
+            {self.draft_course.id, enrolled.id},
+        )
+        self.published_course.refresh_from_db()
+        self.assertEqual(self.published_course.cart_count, 1)
+        self.assertEqual(self.published_course.wishlist_count, 0)
+
+        # Without a selection the whole wishlist is considered
+        response = self.client.post("/wishlist/move-to-cart/", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {item["course"]: item["status"] for item in response.data["results"]},
+            {self.draft_course.id: "not_available", enrolled.id: "already_enrolled"},
+        )
+        self.assertEqual(Wishlist.objects.count(), 2)
+
+    def test_move_wishlist_to_cart_store(self):
+        """With the cart store, a move that fails keeps both the cart and the wishlist."""
+        self.authenticate()
+        cache.clear()
+        Wishlist.objects.create(student=self.student, course=self.published_course)
+
+        with self.settings(CART_STORE=True):
+            with mock.patch(
+                "cart.serializers.Wishlist.objects.filter",
+                side_effect=DatabaseError,
+            ), self.assertRaises(DatabaseError):
+                self.client.post("/wishlist/move-to-cart/", {}, format="json")
+            self.assertEqual(self.client.get(f"{self.url}contents/").data["count"], 0)
+            self.assertTrue(Wishlist.objects.exists())
+
+            # A cart entry that stays locked rolls back the wishlist delete
+            with mock.patch(
+                "cart.serializers.cart_store.update", side_effect=TimeoutError
+            ), self.assertRaises(TimeoutError):
+                self.client.post("/wishlist/move-to-cart/", {}, format="json")
+            self.assertTrue(Wishlist.objects.exists())
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    "/wishlist/move-to-cart/", {}, format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.get(f"{self.url}contents/")
+            self.assertEqual(
+                [item["course"] for item in response.data["items"]],
+                [self.published_course.id],
+            )
+            self.assertFalse(Wishlist.objects.exists())
+            self.assertTrue(Cart.objects.filter(student=self.student).exists())
+
+    def test_move_large_wishlist_in_a_handful_of_queries(self):
+        """Moving 50 wishlist items costs a constant number of statements."""
+        self.authenticate()
+        courses = Course.objects.bulk_create(
+            [
+                Course(title=f"Course {i}", status=Course.CourseStatus.PUBLISHED)
+                for i in range(50)
+            ]
+        )
+        Wishlist.objects.bulk_create(
+            [Wishlist(student=self.student, course=course) for course in courses]
+        )
+        self.client.get("/wishlist/")
+
+        response = self.client.post("/wishlist/move-to-cart/", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLessEqual(response.query_recorder.count, 8)
+        self.assertEqual(Cart.objects.filter(student=self.student).count(), 50)
+        self.assertFalse(Wishlist.objects.filter(student=self.student).exists())
+
+    # ------------------------ Cart Summary ------------------------
+
+    def test_cart_summary_is_cached_until_the_cart_changes(self):
+        """The summary is served from the cache until a cart write or price change."""
+        self.authenticate()
+        cache.clear()
+        other = Course.objects.create(
+            title="Flask Basics", status=Course.CourseStatus.PUBLISHED, price=199
+        )
+        Cart.objects.create(student=self.student, course=self.published_course)
+        Cart.objects.create(student=self.student, course=self.draft_course)
+
+        response = self.client.get(f"{self.url}summary/")
+        self.assertEqual(
+            response.data,
+            {
+                "count": 1,
+                "subtotal": "499.00",
+                "course_ids": [self.published_course.id],
+            },
+        )
+        with self.assertNumQueries(0):
+            self.client.get(f"{self.url}summary/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"course": other.id})
+        response = self.client.get(f"{self.url}summary/")
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(response.data["subtotal"], "698.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.price = 99
+            other.save()
+        response = self.client.get(f"{self.url}summary/")
+        self.assertEqual(response.data["subtotal"], "598.00")
+
+        with self.settings(CART_STORE=True):
+            response = self.client.get(f"{self.url}summary/")
+        self.assertEqual(
+            response.data["course_ids"], sorted([self.published_course.id, other.id])
+        )
+
+    def test_empty_cart_summary(self):
+        """An empty cart has a zero subtotal."""
+        self.authenticate()
+        response = self.client.get(f"{self.url}summary/")
+        self.assertEqual(
+            response.data, {"count": 0, "subtotal": "0.00", "course_ids": []}
+        )
+
+    # ------------------------ Cart Store ------------------------
+
+    def test_cart_store_writes_behind(self):
+        """With the cart store, writes reach the cart table once persisted."""
+        self.authenticate()
+        cache.clear()
+        other = Course.objects.create(
+            title="Flask Basics", status=Course.CourseStatus.PUBLISHED, price=199
+        )
+        with self.settings(CART_STORE=True):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(
+                    self.url, {"course": self.published_course.id}
+                )
+                self.client.post(
+                    f"{self.url}bulk/", {"courses": [other.id]}, format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertFalse(Cart.objects.exists())
+
+            response = self.client.post(self.url, {"course": self.published_course.id})
+            self.assertIn(
+                "This course is already in your cart.", response.data["course"]
+            )
+            response = self.client.get(f"{self.url}contents/")
+            self.assertEqual(
+                [item["course"] for item in response.data["items"]],
+                [other.id, self.published_course.id],
+            )
+            response = self.client.get(self.url)
+            self.assertEqual(
+                [item["course"] for item in response.data["results"]],
+                [other.id, self.published_course.id],
+            )
+
+            for callback in callbacks:
+                callback()
+            self.assertEqual(
+                set(Cart.objects.values_list("course_id", flat=True)),
+                {self.published_course.id, other.id},
+            )
+            self.published_course.refresh_from_db()
+            self.assertEqual(self.published_course.cart_count, 1)
+
+            row = Cart.objects.get(course=self.published_course)
+            with self.captureOnCommitCallbacks():
+                response = self.client.delete(
+                    f"{self.url}courses/{self.published_course.id}/"
+                )
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            response = self.client.get(self.url)
+            self.assertEqual(
+                [item["course"] for item in response.data["results"]], [other.id]
+            )
+            response = self.client.delete(f"{self.url}{row.id}/")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+            persist_cart_task(self.student.id)
+            self.assertEqual(
+                list(Cart.objects.values_list("course_id", flat=True)), [other.id]
+            )
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"{self.url}clear/")
+            self.assertFalse(Cart.objects.exists())
+            response = self.client.get(f"{self.url}contents/")
+            self.assertEqual(response.data["count"], 0)
+
+    def test_cart_store_reads_run_no_query(self):
+        """Cart contents come from the cache and follow course price changes."""
+        self.authenticate()
+        cache.clear()
+        Cart.objects.create(student=self.student, course=self.published_course)
+        Cart.objects.create(student=self.student, course=self.draft_course)
+        with self.settings(CART_STORE=True):
+            self.client.get(f"{self.url}contents/")
+            with self.assertNumQueries(0):
+                response = self.client.get(f"{self.url}contents/")
+            self.assertEqual(
+                response.data,
+                {
+                    "count": 1,
+                    "items": [
+                        {
+                            "course": self.published_course.id,
+                            "course_title": "Django Advanced",
+                            "course_price": "499.00",
+                        }
+                    ],
+                },
+            )
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.published_course.price = 299
+                self.published_course.save()
+            response = self.client.get(f"{self.url}contents/")
+            self.assertEqual(response.data["items"][0]["course_price"], "299.00")
+
+    def test_create_order_sees_pending_cart_writes(self):
+        """Checkout persists the cart store first, so the order has every item."""
+        self.authenticate()
+        cache.clear()
+        self.published_course.instructor = self.instructor
+        self.published_course.save()
+        with self.settings(CART_STORE=True):
+            with self.captureOnCommitCallbacks():
+                self.client.post(self.url, {"course": self.published_course.id})
+            self.assertFalse(Cart.objects.exists())
+
+            order = create_order(SimpleNamespace(user=self.student))
+        self.assertEqual(order.total, self.published_course.price)
+        self.assertEqual(
+            list(order.items.values_list("course_id", flat=True)),
+            [self.published_course.id],
+        )
+
     # ------------------------ Edge Cases ------------------------
 
     def test_invalid_course_id(self):
@@ -3,33 +3,81 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from courses.models import Course
+from skillexa.query_budget import QueryBudgetMixin
 from students.permissions import IsStudent
 
+from . import store as cart_store
+from .cache import get_cart_summary, invalidate_cart
 from .models import Cart, Wishlist
-from .serializers import CartSerializer, WishlistSerializer
+from .serializers import (
+    BulkCartSerializer,
+    BulkWishlistSerializer,
+    CartSerializer,
+    MoveToCartSerializer,
+    WishlistSerializer,
+)
 
 
-class CartViewSet(viewsets.ModelViewSet):
+class CartViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     API for managing student carts
     """
 
     serializer_class = CartSerializer
     permission_classes = [permissions.IsAuthenticated, IsStudent]
+    query_budget = {
+        "list": 4,
+        "retrieve": 4,
+        "create": 9,
+        "destroy": 6,
+        "clear_cart": 6,
+        "bulk_add": 6,
+        "contents": 3,
+        "remove_course": 6,
+        "summary": 3,
+    }
 
     def get_queryset(self):
         """
-        Get the authenticated student's cart items
+        Get the authenticated student's cart items; with the cart store enabled,
+        only the persisted rows still in the student's cart entry
         """
-        return Cart.objects.select_related("course").filter(
+        queryset = Cart.objects.select_related("course").filter(
             student=self.request.user, course__status=Course.CourseStatus.PUBLISHED
         )
+        if cart_store.enabled():
+            queryset = queryset.filter(
+                course_id__in=cart_store.course_ids(self.request.user.id)
+            )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the cart; with the cart store enabled, from the cart entry, so
+        writes not persisted yet show up (items carry the fields of `contents`)
+        """
+        if not cart_store.enabled():
+            return super().list(request, *args, **kwargs)
+        items = cart_store.get_items(request.user.id)
+        page = self.paginate_queryset(items)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(items)
 
     def perform_create(self, serializer):
         """
-        Add a course to the student's cart
+        Add a course to the student's cart.
+
+        With the cart store enabled the row is written behind, so the response
+        has no id yet.
         """
-        serializer.save(student=self.request.user)
+        if cart_store.enabled():
+            course = serializer.validated_data["course"]
+            cart_store.update(self.request.user.id, add=[course.id])
+            serializer.instance = Cart(student=self.request.user, course=course)
+        else:
+            serializer.save(student=self.request.user)
+            invalidate_cart(self.request.user.id)
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -37,7 +85,11 @@ class CartViewSet(viewsets.ModelViewSet):
         """
         try:
             cart_item = self.get_object()
-            cart_item.delete()
+            if cart_store.enabled():
+                cart_store.update(request.user.id, remove=[cart_item.course_id])
+            else:
+                cart_item.delete()
+                invalidate_cart(request.user.id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Cart.DoesNotExist:
             return Response(
@@ -51,31 +103,113 @@ class CartViewSet(viewsets.ModelViewSet):
         Clear all courses from the students cart
         """
 
-        if not Cart.objects.filter(student=request.user).exists():
+        if cart_store.enabled():
+            empty = not cart_store.course_ids(request.user.id)
+        else:
+            empty = not Cart.objects.filter(student=request.user).exists()
+        if empty:
             return Response(
                 {"message": "Your cart is already empty."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        Cart.objects.filter(student=request.user).delete()
+        if cart_store.enabled():
+            cart_store.update(request.user.id, clear=True)
+        else:
+            Cart.objects.filter(student=request.user).delete()
+            invalidate_cart(request.user.id)
         return Response(
             {"message": "Cart cleared successfully."}, status=status.HTTP_204_NO_CONTENT
         )
 
+    @action(detail=False, methods=["delete"], url_path=r"courses/(?P<course_id>\d+)")
+    def remove_course(self, request, course_id):
+        """
+        Remove a course from the cart by course id, which also works for items
+        the cart store has not persisted yet
+        """
+        course_id = int(course_id)
+        if cart_store.enabled():
+            found = course_id in cart_store.course_ids(request.user.id)
+            if found:
+                cart_store.update(request.user.id, remove=[course_id])
+        else:
+            found = Cart.objects.filter(
+                student=request.user, course_id=course_id
+            ).delete()[0]
+            invalidate_cart(request.user.id)
+        if not found:
+            return Response(
+                {"error": "Course not found in your cart."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["get"])
+    def contents(self, request):
+        """
+        Compact view of the cart (course ids, titles and prices) for page
+        headers and badges; served from the cart store without any query when
+        it is enabled
+        """
+        if cart_store.enabled():
+            items = cart_store.get_items(request.user.id)
+        else:
+            items = [
+                {"course": course_id, "course_title": title, "course_price": str(price)}
+                for course_id, title, price in self.get_queryset().values_list(
+                    "course_id", "course__title", "course__price"
+                )
+            ]
+        return Response({"count": len(items), "items": items})
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """
+        Item count, subtotal and course ids of the cart, for the page header;
+        cached per student, so a cache hit runs no query
+        """
+        if cart_store.enabled():
+            return Response(cart_store.get_summary(request.user.id))
+        return Response(get_cart_summary(request.user.id))
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_add(self, request):
+        """
+        Add several courses to the students cart and report the outcome of each
+        """
+        serializer = BulkCartSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(student=request.user)
+        added = any(result["status"] == "added" for result in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK,
+        )
+
 
-class WishlistViewSet(viewsets.ModelViewSet):
+class WishlistViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     API for managing student wishlists
     """
 
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated, IsStudent]
+    query_budget = {
+        "list": 4,
+        "retrieve": 4,
+        "create": 9,
+        "destroy": 6,
+        "clear_cart": 6,
+        "bulk_add": 6,
+        "move_to_cart": 10,
+    }
 
     def get_queryset(self):
         """
         Get the authenticated student's cart items
         """
-        return Wishlist.objects.select_related("course").filter(
+        return Wishlist.objects.select_related("course__topic").filter(
             student=self.request.user, course__status=Course.CourseStatus.PUBLISHED
         )
 
@@ -115,3 +249,36 @@ class WishlistViewSet(viewsets.ModelViewSet):
         return Response(
             {"message": "Cart cleared successfully."}, status=status.HTTP_204_NO_CONTENT
         )
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_add(self, request):
+        """
+        Add several courses to the students wishlist and report the outcome of each
+        """
+        serializer = BulkWishlistSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(student=request.user)
+        added = any(result["status"] == "added" for result in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], url_path="move-to-cart")
+    def move_to_cart(self, request):
+        """
+        Move the selected courses, or the whole wishlist when none are given,
+        to the students cart and report the outcome of each
+        """
+        serializer = MoveToCartSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(student=request.user)
+        added = any(result["status"] == "added" for result in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK,
+        )
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    """Fail tests, instead of logging, when a view exceeds its query budget."""
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def similarity_index_dir(settings, tmp_path):
+    """Keep the similar courses index of each test out of the source tree."""
+    settings.SIMILARITY_INDEX_DIR = str(tmp_path / "similarity")
+
+
+@pytest.fixture(autouse=True)
+def auth_user_cache(settings):
+    """
+    Cache authenticated users, as the test process is the only one reading the
+    local memory cache, and start every test with an empty in-process tier.
+    """
+    from accounts.cache import _local_users
+
+    settings.AUTH_USER_CACHE = True
+    _local_users.clear()
+    yield
+    _local_users.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """
+    Start every test with an empty local memory cache: catalog versions are
+    bumped on commit, which never happens inside a test transaction, so
+    cached responses would otherwise leak from one test into the next.
+    """
+    from django.core.cache import cache
+
+    cache.clear()
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 
 from .models import Course, CourseDetail, PriceLevel, Topics
 
@@ -15,9 +16,13 @@ class TopicsAdmin(admin.ModelAdmin):
     def category_type_display(self, obj):
         return "Category" if obj.parent is None else "Subcategory"
 
-    @admin.display(description="Total Courses")
+    def get_queryset(self, request):
+        # count courses in the changelist query instead of once per row
+        return super().get_queryset(request).annotate(course_count=Count("courses"))
+
+    @admin.display(description="Total Courses", ordering="course_count")
     def total_course(self, obj):
-        return obj.courses.count()  # related_name='courses' in Course model
+        return obj.course_count
 
     list_display = (
         "name",
@@ -0,0 +1,178 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Sum
+
+from .cache import get_catalog_version
+from .models import Course, Topics
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Sorts after every normalized key that starts with a given prefix
+KEY_END = "\U0010ffff"
+
+
+def normalize(text):
+    """Lowercase `text`, strip accents and collapse everything but letters and digits."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode().lower()
+    return NON_ALNUM.sub(" ", text).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted array of word-start keys for prefix lookups with `bisect`.
+
+    Every label is indexed from the start of each of its first `max_words`
+    words ("Django REST APIs" -> "django rest apis", "rest apis", "apis"),
+    truncated to `key_length` characters to bound memory. A lookup bisects
+    the range of keys starting with the prefix and picks the heaviest
+    entries in it with `numpy.argpartition`.
+    """
+
+    def __init__(self, items, key_length, max_words):
+        """`items` is an iterable of `(id, label, weight)`."""
+        self.key_length = key_length
+        self.max_words = max_words
+        self.ids, self.labels, weights = [], [], []
+        entries = []
+        for position, (item_id, label, weight) in enumerate(items):
+            self.ids.append(item_id)
+            self.labels.append(label)
+            weights.append(weight)
+            words = normalize(label).split()
+            for start in range(min(len(words), max_words)):
+                entries.append((" ".join(words[start:])[:key_length], position))
+        entries.sort()
+
+        self.keys = [key for key, _ in entries]
+        self.positions = np.fromiter(
+            (position for _, position in entries), dtype=np.int32, count=len(entries)
+        )
+        self.weights = np.asarray(weights, dtype=np.float64)
+        # Weights in key order, so a key range is a slice rather than a gather
+        self.key_weights = self.weights[self.positions]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, prefix, limit):
+        """Up to `limit` `(id, label)` pairs matching `prefix`, heaviest first."""
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+        key = prefix[: self.key_length]
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + KEY_END, start)
+        positions = self.positions[start:end]
+
+        if len(prefix) > self.key_length:
+            # Keys are truncated, so check long prefixes against the labels
+            positions = [
+                position
+                for position in np.unique(positions)
+                if f" {normalize(self.labels[position])}".find(f" {prefix}") >= 0
+            ]
+        elif len(positions) > limit * self.max_words:
+            # An item has at most `max_words` keys, so this many entries hold
+            # at least `limit` distinct items
+            heaviest = np.argpartition(
+                -self.key_weights[start:end], limit * self.max_words
+            )[: limit * self.max_words]
+            positions = positions[heaviest]
+
+        best = sorted(
+            set(int(position) for position in positions),
+            key=lambda position: (-self.weights[position], self.labels[position]),
+        )[:limit]
+        return [(self.ids[position], self.labels[position]) for position in best]
+
+
+class AutocompleteIndex:
+    """Prefix indexes over published course titles and topic names."""
+
+    def __init__(self, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        key_length = settings.AUTOCOMPLETE_KEY_LENGTH
+        max_words = settings.AUTOCOMPLETE_MAX_WORDS
+
+        published = Q(courses__status=Course.CourseStatus.PUBLISHED)
+        self.courses = PrefixIndex(
+            Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+            .order_by("-enrollment_count", "-id")
+            .values_list("id", "title", "enrollment_count")[
+                : settings.AUTOCOMPLETE_MAX_COURSES
+            ],
+            key_length,
+            max_words,
+        )
+        self.topics = PrefixIndex(
+            Topics.objects.annotate(
+                enrollments=Sum("courses__enrollment_count", filter=published, default=0)
+            ).values_list("id", "name", "enrollments"),
+            key_length,
+            max_words,
+        )
+
+    def search(self, prefix, limit):
+        return {
+            "courses": [
+                {"id": course_id, "title": title}
+                for course_id, title in self.courses.search(prefix, limit)
+            ],
+            "topics": [
+                {"id": topic_id, "name": name}
+                for topic_id, name in self.topics.search(prefix, limit)
+            ],
+        }
+
+
+_index = None
+_lock = threading.Lock()
+_rebuild = None
+
+
+def rebuild_in_background(version):
+    global _index
+    try:
+        _index = AutocompleteIndex(version)
+    finally:
+        # The thread's own connection would otherwise stay open
+        connection.close()
+
+
+def get_autocomplete_index():
+    """
+    The process wide autocomplete index, rebuilt lazily.
+
+    Only the first lookup builds the index in the request. Afterwards, a new
+    catalog version starts a rebuild in a background thread, at most once
+    every `AUTOCOMPLETE_REBUILD_INTERVAL` seconds, and lookups are served by
+    the previous index until it is done.
+    """
+    global _index, _rebuild
+    version = get_catalog_version()
+    index = _index
+    if index is not None and (
+        index.version == version
+        or time.monotonic() - index.built_at < settings.AUTOCOMPLETE_REBUILD_INTERVAL
+    ):
+        return index
+
+    with _lock:
+        if _index is None or not settings.AUTOCOMPLETE_BACKGROUND_REBUILD:
+            if _index is None or _index.version != version:
+                _index = AutocompleteIndex(version)
+        elif _rebuild is None or not _rebuild.is_alive():
+            _rebuild = threading.Thread(
+                target=rebuild_in_background, args=(version,), daemon=True
+            )
+            _rebuild.start()
+        return _index
@@ -0,0 +1,85 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from accounts.models import User
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def get_catalog_version():
+    """
+    Return the current catalog version, creating it if missing.
+
+    Like `accounts.cache`, new versions are seeded from the clock so an evicted
+    counter never returns to a value older responses were cached under.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_cache_role(user):
+    """
+    The part of the cache key that depends on who is asking, i.e. which
+    courses `CourseViewSet.get_queryset` shows them.
+
+    Superusers see every course but drafts, and instructors their own courses,
+    cached per user. Everyone else, including users with the admin role who
+    are not superusers, sees the published courses.
+    """
+    if user and user.is_authenticated:
+        if user.is_superuser:
+            return "admin"
+        if user.role == User.INSTRUCTOR:
+            return f"instructor:{user.pk}"
+    return "published"
+
+
+def catalog_cache_key(request, version):
+    params = "&".join(
+        f"{key}={value}"
+        for key, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    digest = hashlib.md5(f"{request.path}?{params}".encode()).hexdigest()
+    return f"catalog:{version}:{get_cache_role(request.user)}:{digest}"
+
+
+def cache_catalog_response(view_method):
+    """
+    Cache successful responses of a catalog read action.
+
+    Responses are keyed by role, path, query params and the catalog version,
+    which the signals in `courses.signals` bump whenever catalog data changes.
+    A cache hit skips the queryset, pagination and serialization entirely.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = catalog_cache_key(request, get_catalog_version())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
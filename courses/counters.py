@@ -0,0 +1,194 @@
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import connections, models, transaction
+from django.db.models.constants import OnConflict
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Course
+
+# Course counter -> (model label, filter) of the rows it counts
+COUNTER_SOURCES = {
+    "enrollment_count": ("students.Enrollments", {}),
+    "wishlist_count": ("cart.Wishlist", {}),
+    "cart_count": ("cart.Cart", {}),
+    "refund_count": ("orders.OrderItem", {"is_refunded": True}),
+}
+
+RECONCILE_CHUNK_SIZE = 1000
+
+
+def adjust_counters(field, course_ids, delta=1):
+    """
+    Add `delta` to the `field` counter of every course in `course_ids`.
+
+    A course listed several times is adjusted once per occurrence. Courses are
+    grouped by amount so a batch costs one `UPDATE ... SET field = field + n`
+    per distinct amount, usually one. Counters never drop below zero.
+    """
+    amounts = defaultdict(list)
+    for course_id, times in Counter(course_ids).items():
+        amounts[times * delta].append(course_id)
+
+    for amount, ids in amounts.items():
+        Course.objects.filter(id__in=ids).update(
+            **{field: Greatest(F(field) + amount, Value(0))}
+        )
+
+
+class CourseCounterQuerySet(models.QuerySet):
+    """
+    QuerySet for rows counted by a `Course` counter.
+
+    Bulk inserts and deletes adjust the counter of the affected courses with
+    one `F()` update, instead of one update per row.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Rows inserted with `ignore_conflicts` get no primary key back and are
+        not counted; use `insert_missing` to skip conflicts and count them.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            adjust_counters(
+                self.model.counter_field,
+                [obj.course_id for obj in objs if obj.pk is not None],
+            )
+        return objs
+
+    def insert_missing(self, objs):
+        """
+        Insert `objs` with `ON CONFLICT DO NOTHING RETURNING course_id`, so rows
+        that already exist are skipped and only the inserted ones are counted.
+
+        Returns:
+            list: Course ids of the inserted rows.
+        """
+        objs = list(objs)
+        if not objs:
+            return []
+        opts = self.model._meta
+        fields = [field for field in opts.concrete_fields if not field.primary_key]
+        batch_size = connections[self.db].ops.bulk_batch_size(fields, objs)
+        course_ids = []
+        with transaction.atomic(using=self.db, savepoint=False):
+            for start in range(0, len(objs), batch_size):
+                rows = self._insert(
+                    objs[start : start + batch_size],
+                    fields,
+                    returning_fields=[opts.get_field("course")],
+                    on_conflict=OnConflict.IGNORE,
+                )
+                # A single row that conflicted comes back as `None`
+                course_ids.extend(row[0] for row in rows if row is not None)
+            adjust_counters(self.model.counter_field, course_ids)
+        return course_ids
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = list(
+                self.select_for_update(of=("self",)).values_list("pk", "course_id")
+            )
+            if not rows:
+                return 0, {}
+            deleted = self.model._base_manager.filter(
+                pk__in=[pk for pk, _ in rows]
+            ).delete()
+            adjust_counters(
+                self.model.counter_field, [course_id for _, course_id in rows], -1
+            )
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class CourseCountedModel(models.Model):
+    """
+    Abstract base for rows counted by the `counter_field` counter of their course.
+
+    Rows removed by cascades (e.g. a deleted user) bypass the counters; the
+    `reconcile_course_counters` command repairs that drift.
+    """
+
+    counter_field = None
+
+    objects = CourseCounterQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if adding:
+                adjust_counters(self.counter_field, [self.course_id])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                adjust_counters(self.counter_field, [self.course_id], -1)
+        return deleted
+
+
+def actual_count(field):
+    """Subquery counting the rows behind `field` for the outer course."""
+    label, filters = COUNTER_SOURCES[field]
+    rows = (
+        apps.get_model(label)
+        .objects.filter(course=OuterRef("pk"), **filters)
+        .order_by()
+        .values("course")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def reconcile_counters(chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Recompute every course counter from the rows it counts.
+
+    Courses are walked in primary key order, `chunk_size` at a time, each chunk
+    in its own short transaction. Only courses whose stored counters drifted
+    are written back, with one bulk update per chunk.
+
+    Returns:
+        tuple: Number of courses checked and number of courses fixed.
+    """
+    fields = list(COUNTER_SOURCES)
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            courses = list(
+                Course.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .select_for_update(of=("self",))
+                .only("id", *fields)
+                .annotate(**{f"actual_{field}": actual_count(field) for field in fields})[
+                    :chunk_size
+                ]
+            )
+            if not courses:
+                return checked, fixed
+
+            drifted = []
+            for course in courses:
+                changed = False
+                for field in fields:
+                    actual = getattr(course, f"actual_{field}")
+                    if getattr(course, field) != actual:
+                        setattr(course, field, actual)
+                        changed = True
+                if changed:
+                    drifted.append(course)
+            Course.objects.bulk_update(drifted, fields)
+
+        checked += len(courses)
+        fixed += len(drifted)
+        last_id = courses[-1].id
@@ -0,0 +1,137 @@
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, OuterRef, Subquery
+from rest_framework.exceptions import ValidationError
+
+from .models import Course, PriceLevel, TopicClosure, Topics
+
+
+# `?sort=` values -> ordering; each is backed by a `(status, key, id)` index
+SORT_ORDERINGS = {
+    "newest": ("-created_at", "-id"),
+    "popular": ("-enrollment_count", "-id"),
+}
+
+
+def parse_list(params, name, cast, choices=None):
+    """Read a comma separated query param, validating every value."""
+    raw = params.get(name)
+    if not raw:
+        return []
+    try:
+        values = [cast(value) for value in raw.split(",") if value.strip()]
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValidationError({name: f"Invalid value '{raw}'."})
+    if choices is not None and not set(values) <= set(choices):
+        raise ValidationError({name: f"Invalid value '{raw}'."})
+    return values
+
+
+def parse_price(params, name):
+    values = parse_list(params, name, Decimal)
+    if len(values) > 1:
+        raise ValidationError({name: "Expected a single amount."})
+    return values[0] if values else None
+
+
+def filter_courses(queryset, params):
+    """
+    Apply the catalog filters of the query string.
+
+    - level: `Course.CourseLevel` values, comma separated.
+    - language: `Course.LanguageChoices` values, comma separated.
+    - topic: Topic ids; a topic matches courses in any of its subcategories.
+    - price_level: `PriceLevel` ids; matches courses priced at that level.
+    - min_price / max_price: Inclusive price band.
+    """
+    levels = parse_list(params, "level", int, Course.CourseLevel.values)
+    if levels:
+        queryset = queryset.filter(level__in=levels)
+
+    languages = parse_list(params, "language", str.upper, Course.LanguageChoices.values)
+    if languages:
+        queryset = queryset.filter(language__in=languages)
+
+    topics = parse_list(params, "topic", int)
+    if topics:
+        queryset = queryset.filter(
+            topic__in=TopicClosure.objects.filter(ancestor_id__in=topics).values(
+                "descendant_id"
+            )
+        )
+
+    price_levels = parse_list(params, "price_level", int)
+    if price_levels:
+        queryset = queryset.filter(
+            price__in=PriceLevel.objects.filter(id__in=price_levels).values("amount")
+        )
+
+    min_price = parse_price(params, "min_price")
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+
+    max_price = parse_price(params, "max_price")
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+
+    return queryset
+
+
+def get_sort_ordering(params):
+    """The ordering requested with `?sort=`, newest first by default."""
+    sort = params.get("sort") or "newest"
+    if sort not in SORT_ORDERINGS:
+        raise ValidationError({"sort": f"Expected one of {', '.join(SORT_ORDERINGS)}."})
+    return SORT_ORDERINGS[sort]
+
+
+def course_facets(queryset):
+    """
+    Count the courses of `queryset` per level, language, top-level topic and
+    price level.
+
+    The courses are grouped once, in a single aggregate query, by the
+    combination of the four dimensions; the per-dimension counts are then
+    folded from those few rows in Python.
+    """
+    root_topic = TopicClosure.objects.filter(
+        descendant=OuterRef("topic"), ancestor__parent__isnull=True
+    ).values("ancestor")[:1]
+    groups = (
+        queryset.order_by()
+        .annotate(root_topic=Subquery(root_topic))
+        .values("level", "language", "root_topic", "price")
+        .annotate(count=Count("id"))
+    )
+
+    levels, languages, topics, prices = Counter(), Counter(), Counter(), Counter()
+    for group in groups:
+        levels[group["level"]] += group["count"]
+        languages[group["language"]] += group["count"]
+        topics[group["root_topic"]] += group["count"]
+        prices[group["price"]] += group["count"]
+
+    return {
+        "level": [
+            {"value": value, "label": label, "count": levels[value]}
+            for value, label in Course.CourseLevel.choices
+        ],
+        "language": [
+            {"value": value, "label": label, "count": languages[value]}
+            for value, label in Course.LanguageChoices.choices
+        ],
+        "topic": [
+            {"id": topic.id, "name": topic.name, "count": topics[topic.id]}
+            for topic in Topics.objects.filter(parent__isnull=True).order_by("id")
+        ],
+        "price_level": [
+            {
+                "id": level.id,
+                "name": level.name,
+                "amount": level.amount,
+                "count": prices[level.amount],
+            }
+            for level in PriceLevel.objects.filter(deleted_at__isnull=True)
+        ],
+    }
@@ -0,0 +1,96 @@
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.autocomplete import AutocompleteIndex, normalize
+from courses.cache import get_catalog_version
+from courses.management.commands.benchmark_search import WORDS
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the in-process autocomplete index against a database prefix "
+        "query, and measure its memory footprint. Synthetic courses are created "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=1_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["courses"], options["batch_size"])
+
+            start = time.perf_counter()
+            index = AutocompleteIndex(get_catalog_version())
+            elapsed = time.perf_counter() - start
+
+            # Measured on a second build, as tracing slows allocations down
+            del index
+            gc.collect()
+            tracemalloc.start()
+            index = AutocompleteIndex(get_catalog_version())
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            self.stdout.write(
+                f"build     {len(index.courses)} courses in {elapsed * 1000:.0f}ms, "
+                f"{memory / 2**20:.1f}MiB resident"
+            )
+
+            titles = random.choices(index.courses.labels, k=options["queries"])
+            prefixes = [
+                " ".join(normalize(title).split()[1:])[: random.randint(1, 8)]
+                for title in titles
+            ]
+            published = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+
+            for label, lookup in (
+                ("index", lambda prefix: index.search(prefix, 8)),
+                (
+                    "database",
+                    lambda prefix: list(
+                        published.filter(title__icontains=prefix)
+                        .order_by("-enrollment_count", "-id")
+                        .values_list("id", "title")[:8]
+                    ),
+                ),
+            ):
+                timings = []
+                for prefix in prefixes[: 100 if label == "database" else None]:
+                    start = time.perf_counter()
+                    lookup(prefix)
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.report(label, timings)
+
+            transaction.set_rollback(True)
+
+    def seed(self, total, batch_size):
+        self.stdout.write(f"Seeding {total} published courses...")
+        for offset in range(0, total, batch_size):
+            Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"{' '.join(random.choices(WORDS, k=4))} {offset + i}",
+                        subtitle="benchmark",
+                        status=Course.CourseStatus.PUBLISHED,
+                        enrollment_count=random.randint(0, 10_000),
+                    )
+                    for i in range(min(batch_size, total - offset))
+                ]
+            )
+
+    def report(self, label, timings):
+        timings.sort()
+        self.stdout.write(
+            f"{label:<9} p50={statistics.median(timings):8.3f}ms  "
+            f"p99={timings[int(len(timings) * 0.99) - 1]:8.3f}ms  "
+            f"max={timings[-1]:8.3f}ms  ({len(timings)} lookups)"
+        )
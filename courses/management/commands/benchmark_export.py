@@ -0,0 +1,93 @@
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from courses.models import Course, CourseDetail
+from courses.serializers import CourseSerializer
+from courses.views import CourseViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare peak memory and time to first byte of serializing the whole "
+        "published catalog at once with the streaming NDJSON export. "
+        "Synthetic courses are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        export = CourseViewSet.as_view({"get": "export"})
+        factory = APIRequestFactory()
+        seeded = 0
+
+        with transaction.atomic():
+            for size in sorted(options["sizes"]):
+                self.seed(seeded, size, options["batch_size"])
+                seeded = size
+
+                def materialized():
+                    queryset = (
+                        Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+                        .select_related("topic", "instructor")
+                        .prefetch_related("details")
+                    )
+                    yield CourseSerializer(queryset, many=True).data
+
+                def streamed():
+                    yield from export(factory.get("/course/courses/export/")).streaming_content
+
+                for label, produce in (("ndjson", streamed), ("materialized", materialized)):
+                    first_byte, total, peak = self.measure(produce)
+                    self.stdout.write(
+                        f"{size:>8} courses  {label:<12} first_byte={first_byte:9.1f}ms  "
+                        f"total={total:9.1f}ms  peak={peak / 2**20:8.1f}MiB"
+                    )
+
+            transaction.set_rollback(True)
+
+    def seed(self, start, total, batch_size):
+        self.stdout.write(f"Seeding up to {total} published courses...")
+        for offset in range(start, total, batch_size):
+            courses = Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"export-bench-{offset + i}",
+                        subtitle="benchmark",
+                        description="A synthetic course used to benchmark the catalog export.",
+                        status=Course.CourseStatus.PUBLISHED,
+                    )
+                    for i in range(min(batch_size, total - offset))
+                ]
+            )
+            CourseDetail.objects.bulk_create(
+                [
+                    CourseDetail(
+                        course=course,
+                        detail_type=CourseDetail.DetailType.OUTCOME,
+                        description="Benchmark outcome",
+                    )
+                    for course in courses
+                ]
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE courses_course")
+
+    def measure(self, produce):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        first_byte = None
+        for _ in produce():
+            if first_byte is None:
+                first_byte = (time.perf_counter() - start) * 1000
+        total = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return first_byte, total, peak
@@ -0,0 +1,109 @@
+import random
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from courses.management.commands.benchmark_search import TOPICS
+from courses.models import Course, Topics
+from courses.search import (
+    build_search_words,
+    fuzzy_search_courses,
+    search_courses,
+    update_search_vector,
+)
+
+
+def pseudo_word():
+    return "".join(random.choices(string.ascii_lowercase, k=random.randint(4, 10)))
+
+
+def misspell(word):
+    """Swap two adjacent letters, the most common typing mistake."""
+    position = random.randrange(len(word) - 1)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2 :]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the typo tolerant course search on misspelled terms, against "
+        "the full-text search of the same terms and of their correct spelling. "
+        "Synthetic courses are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=200_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write("The fuzzy search benchmark requires PostgreSQL.")
+            return
+
+        with transaction.atomic():
+            self.seed(options["courses"], options["vocabulary"], options["batch_size"])
+            words = random.choices(
+                [word for word in TOPICS if len(word) > 3], k=options["queries"]
+            )
+            queries = [misspell(word) for word in words]
+            published = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+            list(fuzzy_search_courses(published, queries[0]))  # warm the caches once
+
+            for label, search, terms in (
+                ("fuzzy", fuzzy_search_courses, queries),
+                ("fulltext", search_courses, queries),
+                ("spelled", search_courses, words),
+            ):
+                timings, hits = [], 0
+                for word, term in zip(words, terms):
+                    start = time.perf_counter()
+                    results = list(
+                        search(published, term).values_list("title", "topic__name")[:20]
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+                    # A hit when the best result has the intended word in its title or topic
+                    hits += bool(results) and word in " ".join(results[0]).lower().split()
+                self.report(label, timings, hits / len(words))
+
+            transaction.set_rollback(True)
+
+    def seed(self, total, vocabulary, batch_size):
+        self.stdout.write(f"Seeding {total} published courses...")
+        # Each title pairs a topic word with filler words, as real titles do
+        fillers = [pseudo_word() for _ in range(vocabulary)]
+        names = [word.title() for word in TOPICS]
+        Topics.objects.bulk_create(
+            [Topics(name=name) for name in names], ignore_conflicts=True
+        )
+        topics = list(Topics.objects.filter(name__in=names))
+        for offset in range(0, total, batch_size):
+            Course.objects.bulk_create(
+                [
+                    Course(
+                        title=" ".join([random.choice(TOPICS), *random.sample(fillers, 3)]),
+                        subtitle="benchmark",
+                        topic=random.choice(topics),
+                        status=Course.CourseStatus.PUBLISHED,
+                        enrollment_count=random.randint(0, 10_000),
+                    )
+                    for _ in range(min(batch_size, total - offset))
+                ]
+            )
+        update_search_vector(Course.objects.filter(search_vector__isnull=True))
+        build_search_words()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE courses_course")
+            cursor.execute("ANALYZE courses_topics")
+            cursor.execute("ANALYZE courses_searchword")
+
+    def report(self, label, timings, hit_rate):
+        timings.sort()
+        self.stdout.write(
+            f"{label:<9} p50={statistics.median(timings):7.2f}ms  "
+            f"p99={timings[int(len(timings) * 0.99) - 1]:7.2f}ms  "
+            f"max={timings[-1]:7.2f}ms  top hit rate={hit_rate:.0%}"
+        )
@@ -0,0 +1,91 @@
+import statistics
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from courses.models import Course
+from skillexa.pagination import CreatedAtCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare page number and keyset pagination latency at increasing depths "
+        "of the published catalog. Synthetic courses are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            self.seed(options["courses"], options["batch_size"])
+            queryset = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+            page_size = PageNumberPagination.page_size
+
+            depth = 1
+            while depth * page_size <= options["courses"]:
+                offset = (depth - 1) * page_size
+                numbered = self.measure(
+                    PageNumberPagination,
+                    factory.get("/", {"page": depth}),
+                    queryset,
+                    options["repeat"],
+                )
+                cursor = self.cursor_at(queryset, offset)
+                keyset = self.measure(
+                    CreatedAtCursorPagination,
+                    factory.get("/", {"cursor": cursor} if cursor else {}),
+                    queryset,
+                    options["repeat"],
+                )
+                self.stdout.write(
+                    f"page {depth:>6}  page_number={numbered:8.2f}ms  keyset={keyset:8.2f}ms"
+                )
+                depth *= 10
+
+            transaction.set_rollback(True)
+
+    def seed(self, total, batch_size):
+        self.stdout.write(f"Seeding {total} published courses...")
+        for offset in range(0, total, batch_size):
+            Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"pagination-bench-{offset + i}",
+                        subtitle="benchmark",
+                        status=Course.CourseStatus.PUBLISHED,
+                    )
+                    for i in range(min(batch_size, total - offset))
+                ]
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE courses_course")
+
+    def cursor_at(self, queryset, offset):
+        """Encode the cursor a client would hold after paging to `offset`."""
+        if offset == 0:
+            return None
+        paginator = CreatedAtCursorPagination()
+        paginator.base_url = "/"
+        row = queryset.order_by(*paginator.ordering).values("created_at")[offset - 1]
+        link = paginator.encode_cursor(
+            Cursor(offset=0, reverse=False, position=str(row["created_at"]))
+        )
+        return parse_qs(urlparse(link).query)[paginator.cursor_query_param][0]
+
+    def measure(self, pagination_class, request, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            paginator = pagination_class()
+            start = time.perf_counter()
+            list(paginator.paginate_queryset(queryset, Request(request)))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,129 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from courses.models import Course
+from courses.recommendations import (
+    build_recommendations,
+    co_enrollment_counts,
+    load_enrollments,
+    top_neighbours,
+)
+from students.models import Enrollments
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the co-enrollment recommendation build. Synthetic students, "
+        "courses and enrollments are created inside a transaction that is "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--enrollments", type=int, default=1_000_000)
+        parser.add_argument("--students", type=int, default=100_000)
+        parser.add_argument("--courses", type=int, default=5_000)
+        parser.add_argument("--batch-size", type=int, default=20_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write("The recommendation benchmark requires PostgreSQL.")
+            return
+
+        with transaction.atomic():
+            self.seed(options)
+
+            enrollments, elapsed = self.timed(load_enrollments)
+            self.report("load enrollments", elapsed, f"{len(enrollments)} rows")
+
+            course_ids, courses = np.unique(enrollments["course"], return_inverse=True)
+            _, students = np.unique(enrollments["student"], return_inverse=True)
+            (rows, cols, counts), elapsed = self.timed(
+                co_enrollment_counts, students, courses, len(course_ids), 500
+            )
+            self.report("co-occurrence matrix", elapsed, f"{len(counts)} non zero cells")
+
+            totals = np.bincount(courses, minlength=len(course_ids))
+            (rows, _, _), elapsed = self.timed(
+                top_neighbours, rows, cols, counts, totals, 20, 2
+            )
+            self.report("top-k selection", elapsed, f"{len(rows)} neighbours")
+
+            built, elapsed = self.timed(build_recommendations)
+            self.report("full build and store", elapsed, f"{built} courses")
+
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = np.random.default_rng(options["seed"])
+        batch_size = options["batch_size"]
+        self.stdout.write(
+            f"Seeding {options['students']} students, {options['courses']} courses "
+            f"and ~{options['enrollments']} enrollments..."
+        )
+
+        course_ids = [
+            course.id
+            for course in Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"recommendation-bench-{i}",
+                        subtitle="benchmark",
+                        status=Course.CourseStatus.PUBLISHED,
+                    )
+                    for i in range(options["courses"])
+                ],
+                batch_size=batch_size,
+            )
+        ]
+        student_ids = [
+            user.id
+            for user in User.objects.bulk_create(
+                [
+                    User(
+                        first_name="Bench",
+                        last_name="Student",
+                        username=f"recommendation_bench_{i}",
+                        email=f"recommendation-bench-{i}@example.com",
+                        password="!",
+                    )
+                    for i in range(options["students"])
+                ],
+                batch_size=batch_size,
+            )
+        ]
+
+        # Long-tailed course popularity, duplicates removed
+        weights = 1 / np.arange(10, len(course_ids) + 10)
+        pairs = np.unique(
+            np.column_stack(
+                (
+                    rng.integers(len(student_ids), size=options["enrollments"]),
+                    rng.choice(
+                        len(course_ids), size=options["enrollments"], p=weights / weights.sum()
+                    ),
+                )
+            ),
+            axis=0,
+        )
+        for offset in range(0, len(pairs), batch_size):
+            Enrollments.objects.bulk_create(
+                [
+                    Enrollments(student_id=student_ids[student], course_id=course_ids[course])
+                    for student, course in pairs[offset : offset + batch_size].tolist()
+                ]
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE students_enrollments")
+
+    def timed(self, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        return result, (time.perf_counter() - start) * 1000
+
+    def report(self, label, elapsed, detail):
+        self.stdout.write(f"{label:<22} {elapsed:10.1f}ms  {detail}")
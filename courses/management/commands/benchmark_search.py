@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from courses.models import Course
+from courses.search import icontains_search, search_courses, update_search_vector
+
+TOPICS = (
+    "python django react docker kubernetes data science machine learning "
+    "design photography marketing finance excel guitar piano drawing yoga "
+    "spanish french hindi cooking writing testing security cloud aws rust"
+).split()
+
+# A catalog-sized vocabulary so each term matches a realistic share of courses
+WORDS = TOPICS + [f"{a}{b}" for a in TOPICS for b in TOPICS]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the course full-text search against the icontains fallback. "
+        "Synthetic courses are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=500_000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write("The search benchmark requires PostgreSQL.")
+            return
+
+        with transaction.atomic():
+            self.seed(options["courses"], options["batch_size"])
+            terms = random.choices(WORDS, k=options["queries"])
+            published = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+
+            for label, search in (
+                ("search_vector", search_courses),
+                ("icontains", icontains_search),
+            ):
+                timings = []
+                for term in terms:
+                    start = time.perf_counter()
+                    list(search(published, term)[:20])
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.report(label, timings)
+
+            transaction.set_rollback(True)
+
+    def seed(self, total, batch_size):
+        self.stdout.write(f"Seeding {total} published courses...")
+        for offset in range(0, total, batch_size):
+            Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"bench-{offset + i} " + " ".join(random.sample(WORDS, 3)),
+                        subtitle=" ".join(random.sample(WORDS, 5)),
+                        description=" ".join(random.choices(WORDS, k=40)),
+                        status=Course.CourseStatus.PUBLISHED,
+                    )
+                    for i in range(min(batch_size, total - offset))
+                ]
+            )
+        update_search_vector(Course.objects.filter(search_vector__isnull=True))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE courses_course")
+
+    def report(self, label, timings):
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:<14} p50={statistics.median(timings):.2f}ms "
+            f"p95={p95:.2f}ms max={timings[-1]:.2f}ms"
+        )
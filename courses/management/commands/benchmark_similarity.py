@@ -0,0 +1,95 @@
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.management.commands.benchmark_search import WORDS
+from courses.models import Course, CourseDetail
+from courses.similarity import SimilarityIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the similar courses index: full build, single course "
+        "updates and top-K query latency. Synthetic courses are created inside "
+        "a transaction that is rolled back, and the index in a temporary directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), tempfile.TemporaryDirectory() as directory:
+            self.seed(options["courses"], options["batch_size"])
+            index = SimilarityIndex(path=directory)
+
+            start = time.perf_counter()
+            indexed = index.rebuild()
+            self.stdout.write(
+                f"build     {indexed} courses in {time.perf_counter() - start:.1f}s, "
+                f"{self.size(Path(directory)) / 2**20:.1f}MiB on disk"
+            )
+
+            course_ids = list(
+                Course.objects.filter(title__startswith="similarity-bench-").values_list(
+                    "id", flat=True
+                )
+            )
+            sample = random.sample(course_ids, min(options["queries"], len(course_ids)))
+
+            updates = [self.timed(index.update, course_id) for course_id in sample]
+            self.report("update", updates)
+
+            index.similar(sample[0])  # map the files once, as a warm process would
+            queries = [self.timed(index.similar, course_id, 20) for course_id in sample]
+            self.report("query", queries)
+
+            transaction.set_rollback(True)
+
+    def seed(self, total, batch_size):
+        self.stdout.write(f"Seeding {total} published courses...")
+        for offset in range(0, total, batch_size):
+            courses = Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"similarity-bench-{offset + i} "
+                        + " ".join(random.choices(WORDS, k=4)),
+                        subtitle=" ".join(random.choices(WORDS, k=6)),
+                        description=" ".join(random.choices(WORDS, k=60)),
+                        status=Course.CourseStatus.PUBLISHED,
+                    )
+                    for i in range(min(batch_size, total - offset))
+                ]
+            )
+            CourseDetail.objects.bulk_create(
+                [
+                    CourseDetail(
+                        course=course,
+                        detail_type=CourseDetail.DetailType.OUTCOME,
+                        description=" ".join(random.choices(WORDS, k=10)),
+                    )
+                    for course in courses
+                ]
+            )
+
+    def timed(self, function, *args):
+        start = time.perf_counter()
+        function(*args)
+        return (time.perf_counter() - start) * 1000
+
+    def size(self, directory):
+        return sum(path.stat().st_size for path in directory.rglob("*.npy"))
+
+    def report(self, label, timings):
+        timings.sort()
+        self.stdout.write(
+            f"{label:<9} p50={statistics.median(timings):7.2f}ms  "
+            f"p95={timings[int(len(timings) * 0.95) - 1]:7.2f}ms  "
+            f"max={timings[-1]:7.2f}ms"
+        )
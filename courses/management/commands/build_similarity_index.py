@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses.similarity import similarity_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Index every published course for similar course lookups. Run it once "
+        "after deploying, before the first daily rebuild."
+    )
+
+    def handle(self, *args, **options):
+        indexed = similarity_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} courses."))
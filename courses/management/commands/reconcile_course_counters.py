@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from courses.counters import RECONCILE_CHUNK_SIZE, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the enrollment, wishlist, cart and refund counters of every "
+        "course, fixing any drift from the rows they count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        checked, fixed = reconcile_counters(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} courses, fixed {fixed}.")
+        )
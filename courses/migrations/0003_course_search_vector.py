@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:38
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Populate the search vector of existing courses (mirrors courses.search)."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Course = apps.get_model("courses", "Course")
+    Topics = apps.get_model("courses", "Topics")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+
+    topic_name = Subquery(
+        Topics.objects.filter(pk=OuterRef("topic_id")).values("name")[:1]
+    )
+    instructor_name = Subquery(
+        User.objects.filter(pk=OuterRef("instructor_id"))
+        .annotate(name=Concat("first_name", Value(" "), "last_name"))
+        .values("name")[:1]
+    )
+    Course.objects.update(
+        search_vector=SearchVector("title", weight="A", config="english")
+        + SearchVector("subtitle", weight="B", config="english")
+        + SearchVector(topic_name, weight="B", config="english")
+        + SearchVector(instructor_name, weight="C", config="english")
+        + SearchVector("description", weight="D", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_topics_options_alter_course_level'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_vector_gin'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
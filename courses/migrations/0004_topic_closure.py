@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_topic_closure(apps, schema_editor):
+    """Populate the closure table from the existing parent links."""
+    Topics = apps.get_model("courses", "Topics")
+    TopicClosure = apps.get_model("courses", "TopicClosure")
+
+    parents = dict(Topics.objects.values_list("id", "parent_id"))
+    links = []
+    for topic_id in parents:
+        ancestor_id, depth = topic_id, 0
+        while ancestor_id is not None:
+            links.append(
+                TopicClosure(
+                    ancestor_id=ancestor_id, descendant_id=topic_id, depth=depth
+                )
+            )
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+    TopicClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='courses.topics')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='courses.topics')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='courses_top_descend_3d5784_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_topic_closure')],
+            },
+        ),
+        migrations.RunPython(build_topic_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.6 on 2026-10-17 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Counter -> (model, filter) of the rows it counts (mirrors courses.counters)
+COUNTER_SOURCES = {
+    "enrollment_count": (("students", "Enrollments"), {}),
+    "wishlist_count": (("cart", "Wishlist"), {}),
+    "cart_count": (("cart", "Cart"), {}),
+    "refund_count": (("orders", "OrderItem"), {"is_refunded": True}),
+}
+
+
+def backfill_counters(apps, schema_editor):
+    """Count the existing rows behind every counter, in a single update."""
+    Course = apps.get_model("courses", "Course")
+    counts = {}
+    for field, (model, filters) in COUNTER_SOURCES.items():
+        rows = (
+            apps.get_model(*model)
+            .objects.filter(course=OuterRef("pk"), **filters)
+            .order_by()
+            .values("course")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        counts[field] = Coalesce(Subquery(rows), 0)
+    Course.objects.update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_keyset_pagination_indexes'),
+        ('cart', '0001_initial'),
+        ('orders', '0001_initial'),
+        ('students', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='refund_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', '-enrollment_count', '-id'], name='course_status_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-17 01:41
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRecommendation',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation', serialize=False, to='courses.course')),
+                ('neighbours', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=None)),
+                ('built_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Course Recommendations',
+            },
+        ),
+    ]
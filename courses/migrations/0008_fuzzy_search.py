@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:42
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_course_recommendation'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='SearchWord',
+            fields=[
+                ('word', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('course_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='topics',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='topic_name_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='searchword',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['word'], name='search_word_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+    ]
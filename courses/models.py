@@ -1,7 +1,35 @@
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.utils import timezone
 
 
+class TopicsQuerySet(models.QuerySet):
+    def descendants_of(self, topics, include_self=False):
+        """
+        All topics below `topics` (a topic, a queryset or a list), resolved
+        through `TopicClosure` in a single query.
+        """
+        if isinstance(topics, Topics):
+            topics = [topics]
+        queryset = self.filter(ancestor_links__ancestor__in=topics)
+        if not include_self:
+            queryset = queryset.filter(ancestor_links__depth__gt=0)
+        return queryset.distinct()
+
+    def children_map(self, topics):
+        """
+        Map every parent id to its ordered list of child topics for the whole
+        subtree below `topics`, so a nested tree can be rendered without
+        further queries.
+        """
+        children = {}
+        for topic in self.descendants_of(topics).order_by("id"):
+            children.setdefault(topic.parent_id, []).append(topic)
+        return children
+
+
 class Topics(models.Model):
     """
     Represents course categories and subcategories.
@@ -11,9 +39,15 @@ class Topics(models.Model):
     - If `parent` has a value → it's a **subcategory**.
     - A subcategory can have its own subcategories (multi-level hierarchy).
 
+    The hierarchy is mirrored in `TopicClosure`, which is kept up to date on
+    save (creation and reparenting) so whole subtrees can be read in one query.
+
     Queries:
     - Fetch all **main categories**: `Topics.objects.filter(parent__isnull=True)`
     - Fetch all **subcategories of a topic**: `some_topic.subcategories.all()`
+    - Fetch the **whole subtree of a topic**: `Topics.objects.descendants_of(some_topic)`
+    - Fetch **courses under a topic and its descendants**:
+      `Course.objects.filter(topic__ancestor_links__ancestor=some_topic)`
     """
 
     name = models.CharField(max_length=100, unique=True)
@@ -28,13 +62,113 @@ class Topics(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TopicsQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Topics"
         ordering = ["id"]
+        indexes = [
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="topic_name_trgm_gin"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Save the topic and keep its closure rows in sync with `parent`."""
+        adding = self._state.adding
+        previous_parent_id = (
+            None
+            if adding
+            else Topics.objects.filter(pk=self.pk)
+            .values_list("parent_id", flat=True)
+            .first()
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                TopicClosure.insert_node(self)
+            elif previous_parent_id != self.parent_id:
+                TopicClosure.move_subtree(self)
+
+
+class TopicClosure(models.Model):
+    """
+    Closure table for the `Topics` hierarchy.
+
+    - Stores one row per (ancestor, descendant) pair, including each topic with itself at depth 0.
+    - `depth` is the number of levels between the ancestor and the descendant.
+    - Rows are removed with their topics through `CASCADE`.
+
+    Queries:
+    - Fetch the **subtree of a topic**: `TopicClosure.objects.filter(ancestor=some_topic)`
+    - Fetch the **ancestors of a topic**: `TopicClosure.objects.filter(descendant=some_topic)`
+    """
+
+    ancestor = models.ForeignKey(
+        Topics, on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        Topics, on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="unique_topic_closure"
+            )
+        ]
+        indexes = [models.Index(fields=["descendant", "depth"])]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+    @classmethod
+    def insert_node(cls, topic):
+        """Add the closure rows of a newly created topic."""
+        links = [cls(ancestor=topic, descendant=topic, depth=0)]
+        if topic.parent_id:
+            links += [
+                cls(ancestor_id=ancestor_id, descendant=topic, depth=depth + 1)
+                for ancestor_id, depth in cls.objects.filter(
+                    descendant_id=topic.parent_id
+                ).values_list("ancestor_id", "depth")
+            ]
+        cls.objects.bulk_create(links)
+
+    @classmethod
+    def move_subtree(cls, topic):
+        """
+        Re-link the subtree rooted at `topic` under its current parent.
+
+        Paths from the old ancestors into the subtree are dropped and the cross
+        product of the new ancestors and the subtree is inserted.
+        """
+        subtree = list(
+            cls.objects.filter(ancestor=topic).values_list("descendant_id", "depth")
+        )
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        cls.objects.filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+        if topic.parent_id:
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        ancestor_id=ancestor_id,
+                        descendant_id=descendant_id,
+                        depth=ancestor_depth + depth + 1,
+                    )
+                    for ancestor_id, ancestor_depth in cls.objects.filter(
+                        descendant_id=topic.parent_id
+                    ).values_list("ancestor_id", "depth")
+                    for descendant_id, depth in subtree
+                ]
+            )
+
 
 class PriceLevel(models.Model):
     """
@@ -77,12 +211,26 @@ class Course(models.Model):
     - **Price**: Selected from `PriceLevel`, but stored as a direct decimal value.
     - **Status**: Controls course visibility (`Draft`, `Published`, etc.).
     - **Language**: The primary language of the course.
+    - **Search Vector**: Weighted full-text document, kept in sync by `courses.signals`.
+    - **Counters**: Enrollments, wishlists, carts and refunds, maintained by
+      `courses.counters` as those rows are written.
 
     Queries:
     - Get all **published courses**: `Course.objects.filter(status=Course.CourseStatus.PUBLISHED)`
     - Get all **courses by an instructor**: `Course.objects.filter(instructor=some_user)`
+    - Full-text search: `courses.search.search_courses(queryset, "django rest")`
+    - Typo tolerant search: `courses.search.fuzzy_search_courses(queryset, "pyhton")`
+    - Most popular published courses: `Course.objects.filter(status=...).order_by("-enrollment_count", "-id")`
     """
 
+    # Maintained by `courses.counters`, left out of `save()` updates
+    COUNTER_FIELDS = (
+        "enrollment_count",
+        "wishlist_count",
+        "cart_count",
+        "refund_count",
+    )
+
     class CourseLevel(models.IntegerChoices):
         BEGINNER = 1, "Beginner"
         INTERMEDIATE = 2, "Intermediate"
@@ -127,16 +275,49 @@ class Course(models.Model):
     status = models.PositiveSmallIntegerField(
         choices=CourseStatus.choices, default=CourseStatus.DRAFT
     )
+    search_vector = SearchVectorField(null=True, editable=False)
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    wishlist_count = models.PositiveIntegerField(default=0, editable=False)
+    cart_count = models.PositiveIntegerField(default=0, editable=False)
+    refund_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Courses"
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="course_search_vector_gin"),
+            models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="course_status_created_idx",
+            ),
+            models.Index(
+                fields=["instructor", "-created_at", "-id"],
+                name="course_instructor_created_idx",
+            ),
+            models.Index(
+                fields=["status", "-enrollment_count", "-id"],
+                name="course_status_popular_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Never write the counters back from an instance: `courses.counters`
+        changes them with `F()` updates, which a stale instance would undo.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class CourseDetail(models.Model):
     """
@@ -172,3 +353,59 @@ class CourseDetail(models.Model):
 
     def __str__(self):
         return f"{self.course.title} - {self.get_detail_type_display()}"
+
+
+class CourseRecommendation(models.Model):
+    """
+    Courses most often bought together with a course ("students who bought
+    this also bought"), precomputed by `courses.recommendations`.
+
+    - **Neighbours**: Ids of the top-K co-enrolled courses, best first.
+    - **Scores**: Cosine similarity of each neighbour's enrollments with the course's.
+
+    Queries:
+    - Neighbours of a course: `CourseRecommendation.objects.get(course=some_course).neighbours`
+    """
+
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="recommendation",
+    )
+    neighbours = ArrayField(models.BigIntegerField(), default=list)
+    scores = ArrayField(models.FloatField(), default=list)
+    built_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Course Recommendations"
+
+    def __str__(self):
+        return f"{self.course_id} - {len(self.neighbours)} recommendations"
+
+
+class SearchWord(models.Model):
+    """
+    Distinct words of published course titles, maintained by `courses.search`
+    for typo tolerant search: misspelled terms are corrected against these
+    words, which is far cheaper than trigram matching every title.
+
+    - **Course count**: Number of published courses with the word in their
+      title, as of the last rebuild.
+
+    Queries:
+    - Words close to a misspelling: `SearchWord.objects.filter(word__trigram_similar="pyhton")`
+    """
+
+    word = models.CharField(max_length=100, primary_key=True)
+    course_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["word"], opclasses=["gin_trgm_ops"], name="search_word_trgm_gin"
+            ),
+        ]
+
+    def __str__(self):
+        return self.word
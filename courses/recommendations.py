@@ -0,0 +1,162 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from students.models import Enrollments
+
+from .cache import bump_catalog_version
+from .models import CourseRecommendation
+
+# Upper bound on the course pairs expanded in memory at once
+PAIR_CHUNK_SIZE = 5_000_000
+
+ENROLLMENT_DTYPE = np.dtype([("student", np.int64), ("course", np.int64)])
+
+
+def load_enrollments(chunk_size=20_000):
+    """Read every `(student_id, course_id)` enrollment into a structured array."""
+    rows = Enrollments.objects.order_by().values_list("student_id", "course_id")
+    return np.fromiter(rows.iterator(chunk_size=chunk_size), dtype=ENROLLMENT_DTYPE)
+
+
+def basket_pairs(courses, starts, sizes):
+    """
+    Expand baskets into the ordered pairs of distinct courses they contain.
+
+    `courses` holds the enrollments sorted by student; basket `b` is
+    `courses[starts[b]:starts[b] + sizes[b]]`. Returns the left and right
+    course of every pair, `sizes ** 2 - sizes` pairs in total.
+    """
+    # Position of every enrollment of the selected baskets
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    positions = np.repeat(starts, sizes) + offsets
+
+    # Pair each enrollment with every enrollment of its basket
+    basket_sizes = np.repeat(sizes, sizes)
+    left = np.repeat(positions, basket_sizes)
+    right = np.repeat(positions - offsets, basket_sizes) + (
+        np.arange(basket_sizes.sum())
+        - np.repeat(np.cumsum(basket_sizes) - basket_sizes, basket_sizes)
+    )
+    distinct = left != right
+    return courses[left[distinct]], courses[right[distinct]]
+
+
+def co_enrollment_counts(students, courses, n_courses, max_basket):
+    """
+    Sparse course-by-course co-enrollment matrix, in coordinate form.
+
+    `students` and `courses` are dense indexes of the enrollments. Students
+    with more than `max_basket` enrollments are skipped, as they are few, say
+    little about which courses go together, and cost quadratic work.
+
+    Returns:
+        tuple: Row indexes, column indexes and counts of the non zero cells.
+    """
+    order = np.argsort(students, kind="stable")
+    courses = courses[order]
+    _, starts, sizes = np.unique(students[order], return_index=True, return_counts=True)
+    baskets = (sizes > 1) & (sizes <= max_basket)
+    starts, sizes = starts[baskets], sizes[baskets]
+
+    # Expand and reduce the baskets in chunks to bound memory use
+    pairs = sizes * (sizes - 1)
+    chunk_ids = np.cumsum(pairs) // PAIR_CHUNK_SIZE
+    cells, counts = [], []
+    for chunk in np.unique(chunk_ids):
+        selected = chunk_ids == chunk
+        left, right = basket_pairs(courses, starts[selected], sizes[selected])
+        chunk_cells, chunk_counts = np.unique(left * n_courses + right, return_counts=True)
+        cells.append(chunk_cells)
+        counts.append(chunk_counts)
+
+    if not cells:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+    cells, inverse = np.unique(np.concatenate(cells), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+    return cells // n_courses, cells % n_courses, counts
+
+
+def top_neighbours(rows, cols, counts, course_totals, top_k, min_support):
+    """
+    Keep the `top_k` best neighbours of every course.
+
+    Pairs are scored by the cosine similarity of the two courses' enrollment
+    vectors, `co / sqrt(n_row * n_col)`, so that best sellers do not dominate
+    every list. Pairs seen fewer than `min_support` times are dropped.
+
+    Returns:
+        tuple: Rows, columns and scores, sorted by row then best score first.
+    """
+    supported = counts >= min_support
+    rows, cols, counts = rows[supported], cols[supported], counts[supported]
+    scores = counts / np.sqrt(course_totals[rows] * course_totals[cols])
+
+    order = np.lexsort((cols, -counts, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+
+    _, starts, sizes = np.unique(rows, return_index=True, return_counts=True)
+    rank = np.arange(len(rows)) - np.repeat(starts, sizes)
+    best = rank < top_k
+    return rows[best], cols[best], scores[best]
+
+
+def build_recommendations(top_k=None, max_basket=None, min_support=None):
+    """
+    Rebuild `CourseRecommendation` from the current enrollments.
+
+    The co-enrollment matrix and the top-K selection are computed with
+    vectorized NumPy operations; the results replace the stored
+    recommendations in one transaction, with one bulk upsert and one delete.
+
+    Returns:
+        int: Number of courses with recommendations.
+    """
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    max_basket = max_basket or settings.RECOMMENDATIONS_MAX_BASKET
+    min_support = min_support or settings.RECOMMENDATIONS_MIN_SUPPORT
+
+    enrollments = load_enrollments()
+    course_ids, courses = np.unique(enrollments["course"], return_inverse=True)
+    _, students = np.unique(enrollments["student"], return_inverse=True)
+    n_courses = len(course_ids)
+
+    rows, cols, counts = co_enrollment_counts(students, courses, n_courses, max_basket)
+    rows, cols, scores = top_neighbours(
+        rows,
+        cols,
+        counts,
+        np.bincount(courses, minlength=n_courses),
+        top_k,
+        min_support,
+    )
+
+    built_at = timezone.now()
+    recommendations = []
+    _, starts = np.unique(rows, return_index=True)
+    for row, neighbours, neighbour_scores in zip(
+        rows[starts], np.split(cols, starts[1:]), np.split(scores, starts[1:])
+    ):
+        recommendations.append(
+            CourseRecommendation(
+                course_id=int(course_ids[row]),
+                neighbours=course_ids[neighbours].tolist(),
+                scores=np.round(neighbour_scores, 4).tolist(),
+                built_at=built_at,
+            )
+        )
+
+    with transaction.atomic():
+        CourseRecommendation.objects.bulk_create(
+            recommendations,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["course"],
+            update_fields=["neighbours", "scores", "built_at"],
+        )
+        CourseRecommendation.objects.filter(built_at__lt=built_at).delete()
+        transaction.on_commit(bump_catalog_version)
+
+    return len(recommendations)
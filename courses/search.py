@@ -0,0 +1,367 @@
+import math
+import operator
+import re
+from collections import Counter
+from contextlib import contextmanager
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+    TrigramStrictWordSimilarity,
+)
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat, Greatest, Ln
+
+from accounts.models import User
+
+from .models import Course, SearchWord, Topics
+
+SEARCH_CONFIG = "english"
+
+# Weight of `ln(1 + enrollments)` in the fuzzy search rank
+FUZZY_POPULARITY_WEIGHT = 0.05
+# Words of a fuzzy search term that are matched, and the closest `SearchWord`s
+# each of them is corrected to
+FUZZY_MAX_WORDS = 4
+FUZZY_CORRECTIONS = 5
+
+# Words as pg_trgm splits them
+WORD = re.compile(r"[^\W_]+")
+
+
+def course_search_document():
+    """
+    Build the weighted tsvector expression stored in `Course.search_vector`.
+
+    Weights:
+    - A: title
+    - B: subtitle, topic name
+    - C: instructor name
+    - D: description
+    """
+
+    topic_name = Subquery(
+        Topics.objects.filter(pk=OuterRef("topic_id")).values("name")[:1]
+    )
+    instructor_name = Subquery(
+        User.objects.filter(pk=OuterRef("instructor_id"))
+        .annotate(name=Concat("first_name", Value(" "), "last_name"))
+        .values("name")[:1]
+    )
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("subtitle", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(topic_name, weight="B", config=SEARCH_CONFIG)
+        + SearchVector(instructor_name, weight="C", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="D", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset):
+    """
+    Recompute the search vector for every course in `queryset` with a single UPDATE.
+
+    Returns:
+        int: Number of courses reindexed.
+    """
+
+    if connection.vendor != "postgresql":
+        return 0
+    return queryset.update(search_vector=course_search_document())
+
+
+def search_courses(queryset, term):
+    """
+    Filter and rank `queryset` by the search term.
+
+    - PostgreSQL: matches against the persisted `search_vector` (GIN indexed)
+      and orders by weighted rank.
+    - Other databases: falls back to `icontains` matching ordered by recency.
+    """
+
+    if connection.vendor != "postgresql":
+        return icontains_search(queryset, term)
+
+    query = SearchQuery(term, search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-created_at", "-id")
+    )
+
+
+def icontains_search(queryset, term):
+    """Unindexed substring search over the same fields as the search vector."""
+    return queryset.filter(
+        Q(title__icontains=term)
+        | Q(subtitle__icontains=term)
+        | Q(description__icontains=term)
+        | Q(topic__name__icontains=term)
+        | Q(instructor__first_name__icontains=term)
+        | Q(instructor__last_name__icontains=term)
+    ).order_by("-created_at", "-id")
+
+
+def title_words(title):
+    """Distinct lowercased words of `title` that fit in `SearchWord.word`."""
+    return {word for word in WORD.findall((title or "").lower()) if len(word) <= 100}
+
+
+def build_search_words():
+    """
+    Rebuild `SearchWord` from the titles of the published courses.
+
+    Returns:
+        int: Number of distinct words.
+    """
+    counts = Counter()
+    titles = Course.objects.filter(status=Course.CourseStatus.PUBLISHED).values_list(
+        "title", flat=True
+    )
+    for title in titles.iterator(chunk_size=5000):
+        counts.update(title_words(title))
+
+    with transaction.atomic():
+        SearchWord.objects.all().delete()
+        SearchWord.objects.bulk_create(
+            [SearchWord(word=word, course_count=count) for word, count in counts.items()],
+            batch_size=5000,
+        )
+    return len(counts)
+
+
+def add_search_words(title):
+    """
+    Make new words of a published title searchable before the next rebuild.
+
+    Counts and words of unpublished or renamed titles are only corrected by
+    `build_search_words`, which `build_search_words_task` runs every hour.
+    """
+    SearchWord.objects.bulk_create(
+        [SearchWord(word=word, course_count=1) for word in title_words(title)],
+        ignore_conflicts=True,
+    )
+
+
+@contextmanager
+def trigram_threshold(threshold):
+    """
+    Set the pg_trgm similarity thresholds for the queries run in the block.
+
+    The `%` and `%>>` operators behind `trigram_similar` and
+    `trigram_strict_word_similar` can only use the trigram indexes with these
+    thresholds, whose defaults (0.3 and 0.5) reject common typos such as
+    transposed letters. The settings are local to the transaction.
+    """
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true), "
+                "set_config('pg_trgm.strict_word_similarity_threshold', %s, true)",
+                [str(threshold)] * 2,
+            )
+        yield
+
+
+def popularity_boost(similarity):
+    """Scale a similarity by `1 + FUZZY_POPULARITY_WEIGHT * ln(1 + enrollments)`."""
+    return similarity * (1 + FUZZY_POPULARITY_WEIGHT * Ln(F("enrollment_count") + 1))
+
+
+def term_words(term):
+    return list(dict.fromkeys(WORD.findall(term.lower())))[:FUZZY_MAX_WORDS]
+
+
+def correct_words(words):
+    """
+    The `FUZZY_CORRECTIONS` search words closest to each of `words`, as
+    `(word, similarity)` pairs, most similar first, in one query.
+    """
+    lookups = [
+        SearchWord.objects.filter(word__trigram_similar=word)
+        .annotate(position=Value(position), similarity=TrigramSimilarity("word", word))
+        .order_by("-similarity", "-course_count")
+        .values_list("position", "word", "similarity")[:FUZZY_CORRECTIONS]
+        for position, word in enumerate(words)
+    ]
+    corrections = [[] for _ in words]
+    if lookups:
+        for position, word, score in lookups[0].union(*lookups[1:], all=True):
+            corrections[position].append((word, score))
+    return [sorted(pairs, key=lambda pair: -pair[1]) for pairs in corrections]
+
+
+def title_match(word):
+    """Full-text query for `word` in titles, the `A` weight of the search vector."""
+    return SearchQuery(f"{word}:A", search_type="raw", config=SEARCH_CONFIG)
+
+
+def correction_query(corrections):
+    """Titles with a correction of every word: `(a:A | b:A) & (c:A | ...)`."""
+    alternatives = [
+        reduce(operator.or_, [title_match(word) for word, _ in pairs])
+        for pairs in corrections
+    ]
+    return reduce(operator.and_, alternatives)
+
+
+def correction_similarity(corrections):
+    """Mean similarity of the best correction of each word a title has."""
+    # Corrections are most similar first, so the first one a title has wins
+    best = [
+        Case(
+            *[
+                When(search_vector=title_match(word), then=Value(score))
+                for word, score in pairs
+            ],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        for pairs in corrections
+    ]
+    return reduce(operator.add, best) / len(best)
+
+
+def fuzzy_search_courses(queryset, term):
+    """
+    Typo tolerant search over course titles and topic names.
+
+    - PostgreSQL: each word of the term is corrected to the closest
+      `SearchWord`s through their trigram index, and the corrections are
+      matched against course titles with the full-text index. Topics are
+      matched by strict word similarity through the trigram index on their
+      names. Courses are ranked by similarity boosted by popularity.
+    - Other databases: falls back to `ngram_search`.
+
+    Trigram matching the titles themselves at a typo tolerant threshold would
+    recheck every title sharing a couple of trigrams with the term (every
+    "-ing" word for "desing"), so the term is matched against the much
+    smaller vocabulary instead.
+
+    A title matches when it has a correction of every word of the term, with
+    the mean similarity of the best corrections it has. Only the
+    `FUZZY_SEARCH_MAX_RESULTS` best matches are returned; they are found right
+    away, and the returned queryset looks them up by id.
+    """
+
+    if connection.vendor != "postgresql":
+        return ngram_search(queryset, term)
+
+    words = term_words(term)
+    with trigram_threshold(settings.FUZZY_SEARCH_THRESHOLD):
+        corrections = correct_words(words)
+        topics = list(
+            Topics.objects.filter(name__trigram_strict_word_similar=term)
+            .annotate(similarity=TrigramStrictWordSimilarity(term, "name"))
+            .values_list("id", "similarity")
+        )
+
+    # The best results by either similarity are the best results overall
+    limit = settings.FUZZY_SEARCH_MAX_RESULTS
+    candidates = []
+    title_similarity = Value(0.0)
+    if words and all(corrections):
+        title_similarity = correction_similarity(corrections)
+        candidates.append(
+            queryset.filter(search_vector=correction_query(corrections))
+            .order_by(popularity_boost(title_similarity).desc(), "-id")
+            .values_list("id", flat=True)[:limit]
+        )
+    topic_similarity = Case(
+        *[When(topic_id=topic_id, then=Value(score)) for topic_id, score in topics],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    if topics:
+        candidates.append(
+            queryset.filter(topic__in=[topic_id for topic_id, _ in topics])
+            .order_by(popularity_boost(topic_similarity).desc(), "-id")
+            .values_list("id", flat=True)[:limit]
+        )
+    candidate_ids = list(candidates[0].union(*candidates[1:])) if candidates else []
+
+    return (
+        queryset.filter(id__in=candidate_ids)
+        .annotate(similarity=Greatest(title_similarity, topic_similarity))
+        .annotate(rank=popularity_boost(F("similarity")))
+        .order_by("-rank", "-id")
+    )
+
+
+def trigrams(word):
+    """Trigrams of a word, padded like pg_trgm does."""
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(trigrams_a, trigrams_b):
+    """pg_trgm's `similarity` of two trigram sets."""
+    shared = len(trigrams_a & trigrams_b)
+    return shared / (len(trigrams_a) + len(trigrams_b) - shared)
+
+
+def strict_word_similarity(term_trigrams, text):
+    """
+    pg_trgm's `strict_word_similarity`: the best similarity between the
+    term's trigrams and those of any run of consecutive words of `text`.
+    """
+    words = [trigrams(word) for word in WORD.findall((text or "").lower())]
+    best = 0.0
+    for start in range(len(words)):
+        extent = set()
+        for end in range(start, len(words)):
+            extent |= words[end]
+            best = max(best, trigram_similarity(term_trigrams, extent))
+    return best
+
+
+def ngram_search(queryset, term):
+    """
+    In-process trigram matching, for databases without pg_trgm.
+
+    Scores every course of `queryset` in Python like `fuzzy_search_courses`,
+    the title words standing in for the corrections, so it is meant for
+    tests and small catalogs only.
+    """
+    threshold = settings.FUZZY_SEARCH_THRESHOLD
+    words = [trigrams(word) for word in term_words(term)]
+    term_trigrams = set().union(*map(trigrams, WORD.findall(term.lower())))
+    scores = {}
+    for course_id, title, topic, enrollments in queryset.values_list(
+        "id", "title", "topic__name", "enrollment_count"
+    ):
+        title_trigrams = [trigrams(word) for word in title_words(title)]
+        best = [
+            max((trigram_similarity(word, other) for other in title_trigrams), default=0.0)
+            for word in words
+        ]
+        title_score = sum(best) / len(best) if best and min(best) >= threshold else 0.0
+        topic_score = strict_word_similarity(term_trigrams, topic)
+        score = max(title_score, topic_score if topic_score >= threshold else 0.0)
+        if score:
+            scores[course_id] = score * (
+                1 + FUZZY_POPULARITY_WEIGHT * math.log(enrollments + 1)
+            )
+
+    ranked = sorted(scores, key=lambda course_id: (-scores[course_id], -course_id))
+    return (
+        queryset.filter(id__in=ranked)
+        .annotate(
+            rank=Case(
+                *[
+                    When(id=course_id, then=Value(scores[course_id]))
+                    for course_id in ranked
+                ],
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-rank", "-id")
+    )
@@ -1,3 +1,7 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import Course, CourseDetail, PriceLevel, Topics
@@ -6,12 +10,16 @@ from .models import Course, CourseDetail, PriceLevel, Topics
 class CourseDetailSerializer(serializers.ModelSerializer):
     """
     Serializer for course requirements, outcomes, and target audiences.
+
+    `id` is optional on input so that course updates can match incoming
+    details against the stored ones.
     """
 
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = CourseDetail
         fields = ["id", "detail_type", "description"]
-        read_only_fields = ["id"]
 
 
 class CourseSerializer(serializers.ModelSerializer):
@@ -48,6 +56,8 @@ class CourseSerializer(serializers.ModelSerializer):
             "topic_name",
             "instructor",
             "instructor_name",
+            "enrollment_count",
+            "wishlist_count",
             "created_at",
             "updated_at",
             "details",
@@ -70,8 +80,16 @@ class CourseSerializer(serializers.ModelSerializer):
         course = Course.objects.create(**validated_data)
 
         # Handle nested CourseDetail creation
-        for detail_data in details_data:
-            CourseDetail.objects.create(course=course, **detail_data)
+        CourseDetail.objects.bulk_create(
+            [
+                CourseDetail(
+                    course=course,
+                    detail_type=detail_data["detail_type"],
+                    description=detail_data["description"],
+                )
+                for detail_data in details_data
+            ]
+        )
 
         return course
 
@@ -83,27 +101,97 @@ class CourseSerializer(serializers.ModelSerializer):
         if price_instance:
             instance.price = price_instance.amount
 
-        details_data = validated_data.pop("details", [])
+        details_data = validated_data.pop("details", None)
 
-        # Update basic fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            # Update basic fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
 
-        # Update CourseDetails
-        if details_data:
-            instance.details.all().delete()  # Remove old details
-            for detail_data in details_data:
-                CourseDetail.objects.create(course=instance, **detail_data)
+            # Update CourseDetails
+            if details_data is not None:
+                self.sync_details(instance, details_data)
 
         return instance
 
+    def sync_details(self, course, details_data):
+        """
+        Make the course's details match `details_data` with at most one insert,
+        one update and one delete.
+
+        Incoming details are matched to stored ones by `id` first. Details sent
+        without a known id reuse a leftover stored detail of the same type,
+        preferring one with the same description. Matched details are only
+        written when they changed, so an unchanged autosave writes nothing.
+        """
+        existing = {detail.id: detail for detail in course.details.all()}
+        matches, unmatched = [], []
+        for detail_data in details_data:
+            detail = existing.pop(detail_data.get("id"), None)
+            if detail is None:
+                unmatched.append(detail_data)
+            else:
+                matches.append((detail, detail_data))
+
+        leftovers = defaultdict(list)
+        for detail in sorted(existing.values(), key=lambda detail: detail.id):
+            leftovers[detail.detail_type].append(detail)
+
+        to_create = []
+        for detail_data in unmatched:
+            candidates = leftovers[detail_data["detail_type"]]
+            detail = next(
+                (
+                    candidate
+                    for candidate in candidates
+                    if candidate.description == detail_data["description"]
+                ),
+                candidates[0] if candidates else None,
+            )
+            if detail is None:
+                to_create.append(
+                    CourseDetail(
+                        course=course,
+                        detail_type=detail_data["detail_type"],
+                        description=detail_data["description"],
+                    )
+                )
+            else:
+                candidates.remove(detail)
+                del existing[detail.id]
+                matches.append((detail, detail_data))
+
+        to_update = []
+        now = timezone.now()
+        for detail, detail_data in matches:
+            if (detail.detail_type, detail.description) != (
+                detail_data["detail_type"],
+                detail_data["description"],
+            ):
+                detail.detail_type = detail_data["detail_type"]
+                detail.description = detail_data["description"]
+                detail.updated_at = now
+                to_update.append(detail)
+
+        if to_create:
+            CourseDetail.objects.bulk_create(to_create)
+        if to_update:
+            CourseDetail.objects.bulk_update(
+                to_update, ["detail_type", "description", "updated_at"]
+            )
+        if existing:
+            CourseDetail.objects.filter(id__in=existing).delete()
+
 
 class TopicsSerializer(serializers.ModelSerializer):
     """
     Serializer for Topics model.
     - Shows nested subcategories.
     - Admins can create/update categories.
+
+    Pass `children` (see `Topics.objects.children_map`) in the context to render
+    a prefetched tree; otherwise the subtree is loaded with a single query.
     """
 
     subcategories = serializers.SerializerMethodField()
@@ -122,9 +210,13 @@ class TopicsSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at", "subcategories"]
 
     def get_subcategories(self, obj):
-        """Recursively fetch all subcategories for a given topic."""
-        subcategories = obj.subcategories.all()
-        return TopicsSerializer(subcategories, many=True).data
+        """Render the nested subcategories from the prefetched children map."""
+        children = self.context.get("children")
+        if children is None:
+            children = Topics.objects.children_map(obj)
+        return TopicsSerializer(
+            children.get(obj.id, []), many=True, context={"children": children}
+        ).data
 
     def validate_name(self, value):
         """Ensure unique category names (case insensitive)."""
@@ -133,7 +225,14 @@ class TopicsSerializer(serializers.ModelSerializer):
         return value
 
     def validate_parent(self, value):
-        """Ensure a topic is not assigned as its own parent."""
-        if self.instance and self.instance.id == value.id:
-            raise serializers.ValidationError("A category cannot be its own parent.")
+        """Ensure a topic is not assigned as its own parent or under its own subtree."""
+        if self.instance and value:
+            if self.instance.id == value.id:
+                raise serializers.ValidationError(
+                    "A category cannot be its own parent."
+                )
+            if Topics.objects.descendants_of(self.instance).filter(id=value.id).exists():
+                raise serializers.ValidationError(
+                    "A category cannot be moved under its own subcategory."
+                )
         return value
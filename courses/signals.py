@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import Course, CourseDetail, PriceLevel, Topics
+from .search import add_search_words, update_search_vector
+from .tasks import update_similarity_index_task
+
+user = get_user_model()
+
+# Fields that feed `Course.search_vector`
+SEARCH_FIELDS = {"title", "subtitle", "description", "topic", "instructor"}
+
+# Fields that feed the similar courses index (`courses.similarity`)
+SIMILARITY_FIELDS = {"title", "subtitle", "description", "status"}
+
+
+@receiver(post_save, sender=Course)
+def reindex_course(sender, instance, update_fields=None, **kwargs):
+    """
+    Refresh the search vector of a course whenever its searchable fields change
+    """
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    update_search_vector(Course.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Course)
+def add_course_search_words(sender, instance, update_fields=None, **kwargs):
+    """
+    Make the title words of published courses available to typo tolerant
+    search; counts and stale words are refreshed by `build_search_words_task`
+    """
+    if update_fields is not None and not {"title", "status"}.intersection(update_fields):
+        return
+    if instance.status == Course.CourseStatus.PUBLISHED:
+        add_search_words(instance.title)
+
+
+@receiver(post_save, sender=Topics)
+def reindex_topic_courses(sender, instance, created, **kwargs):
+    """
+    Topic names are part of the search document, so renames reindex their courses
+    """
+    if not created:
+        update_search_vector(Course.objects.filter(topic=instance))
+
+
+@receiver(post_save, sender=user)
+def reindex_instructor_courses(sender, instance, created, **kwargs):
+    """
+    Instructor names are part of the search document
+    """
+    if not created and instance.role == user.INSTRUCTOR:
+        update_search_vector(Course.objects.filter(instructor=instance))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseDetail)
+@receiver(post_delete, sender=CourseDetail)
+@receiver(post_save, sender=Topics)
+@receiver(post_delete, sender=Topics)
+@receiver(post_save, sender=PriceLevel)
+@receiver(post_delete, sender=PriceLevel)
+def invalidate_catalog(sender, **kwargs):
+    """
+    Expire cached catalog responses whenever catalog data changes, once the
+    change commits: a reader between an earlier bump and the commit would
+    cache the old rows under the new version
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=user)
+def invalidate_instructor_catalog(sender, instance, created, **kwargs):
+    """
+    Instructor names are rendered in cached catalog responses
+    """
+    if not created and instance.role == user.INSTRUCTOR:
+        transaction.on_commit(bump_catalog_version)
+
+
+def queue_similarity_update(course_id):
+    transaction.on_commit(lambda: update_similarity_index_task.delay(course_id))
+
+
+@receiver(post_save, sender=Course)
+def reindex_similar_course(sender, instance, update_fields=None, **kwargs):
+    """
+    Index courses when they are published or their text changes, and drop
+    them from the index when they are unpublished
+    """
+    if update_fields is not None and not SIMILARITY_FIELDS.intersection(update_fields):
+        return
+    queue_similarity_update(instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def drop_similar_course(sender, instance, **kwargs):
+    queue_similarity_update(instance.pk)
+
+
+@receiver(post_save, sender=CourseDetail)
+@receiver(post_delete, sender=CourseDetail)
+def reindex_similar_course_outcomes(sender, instance, **kwargs):
+    """
+    Outcomes are part of the similarity document
+    """
+    if instance.detail_type == CourseDetail.DetailType.OUTCOME:
+        queue_similarity_update(instance.course_id)
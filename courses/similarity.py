@@ -0,0 +1,271 @@
+import fcntl
+import math
+import os
+import re
+import shutil
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .models import Course, CourseDetail
+
+# Hashed document frequency buckets; the last cell holds the document count
+DF_BUCKETS = 2**18
+MIN_CAPACITY = 1024
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "and are for from how into its learn not that the this with you your".split()
+)
+
+# Field -> weight of its terms in the course document
+FIELD_WEIGHTS = {"title": 3, "subtitle": 2, "description": 1, "outcomes": 1}
+
+
+def tokenize(text):
+    return [
+        token
+        for token in TOKEN.findall((text or "").lower())
+        if len(token) > 2 and token not in STOPWORDS
+    ]
+
+
+def course_terms(course, outcomes):
+    """Weighted term frequencies of a course's title, subtitle, description and outcomes."""
+    terms = Counter()
+    fields = {
+        "title": course.title,
+        "subtitle": course.subtitle,
+        "description": course.description,
+        "outcomes": " ".join(outcomes),
+    }
+    for field, text in fields.items():
+        for token in tokenize(text):
+            terms[token] += FIELD_WEIGHTS[field]
+    return terms
+
+
+def iter_course_terms(queryset):
+    """Yield `(course_id, terms)` for the courses of `queryset`, chunk by chunk."""
+    queryset = queryset.only("id", "title", "subtitle", "description").order_by("id")
+    chunk_size = 2000
+    last_id = 0
+    while True:
+        courses = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not courses:
+            return
+        outcomes = {}
+        for course_id, description in CourseDetail.objects.filter(
+            course__in=courses, detail_type=CourseDetail.DetailType.OUTCOME
+        ).values_list("course_id", "description"):
+            outcomes.setdefault(course_id, []).append(description)
+        for course in courses:
+            yield course.id, course_terms(course, outcomes.get(course.id, []))
+        last_id = courses[-1].id
+
+
+def term_hash(term):
+    # crc32 is stable across processes, unlike the salted built-in `hash()`
+    return zlib.crc32(term.encode())
+
+
+def vectorize(terms, df, dimensions):
+    """
+    Project the TF-IDF weights of `terms` on a unit vector of `dimensions`.
+
+    Terms are mapped to dimensions with signed feature hashing, which keeps
+    dot products unbiased, so vectors of a fixed size can be computed one
+    course at a time without a shared vocabulary.
+    """
+    documents = df[-1]
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term, frequency in terms.items():
+        hashed = term_hash(term)
+        idf = math.log((1 + documents) / (1 + df[hashed % DF_BUCKETS])) + 1
+        sign = 1 if hashed >> 31 else -1
+        vector[(hashed >> 18) % dimensions] += sign * (1 + math.log(frequency)) * idf
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def add_document_frequencies(df, terms):
+    np.add.at(df, [term_hash(term) % DF_BUCKETS for term in terms], 1)
+    df[-1] += 1
+
+
+class SimilarityIndex:
+    """
+    On disk index of unit TF-IDF vectors of the published courses.
+
+    Three `.npy` files, memory mapped by every process:
+    - `ids`: the course id of every slot, 0 for free slots.
+    - `vectors`: one `float32` row of `SIMILARITY_DIMENSIONS` per slot.
+    - `df`: hashed document frequencies, the last cell being the document count.
+
+    Updates rewrite single rows in place. Rebuilds and growth write a new
+    generation directory and swap the `current` symlink to it, so readers
+    always map a consistent set of files. Writers serialize on an fcntl lock
+    file, so processes on several hosts need a filesystem that honours it.
+    """
+
+    def __init__(self, path=None, dimensions=None):
+        self._path = path
+        self._dimensions = dimensions
+        self._opened = None
+
+    @property
+    def path(self):
+        return Path(self._path or settings.SIMILARITY_INDEX_DIR)
+
+    @property
+    def dimensions(self):
+        return self._dimensions or settings.SIMILARITY_DIMENSIONS
+
+    def file(self, name):
+        return self.path / "current" / f"{name}.npy"
+
+    @contextmanager
+    def locked(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def exists(self):
+        return (self.path / "current").exists()
+
+    def open(self, mode="r"):
+        """Memory map the index files, reopening them after a rebuild or growth."""
+        inode = os.stat(self.path / "current").st_ino
+        if mode == "r" and self._opened and self._opened[0] == (self.path, inode):
+            return self._opened[1]
+        arrays = tuple(
+            np.load(self.file(name), mmap_mode=mode) for name in ("ids", "vectors", "df")
+        )
+        if mode == "r":
+            self._opened = ((self.path, inode), arrays)
+        return arrays
+
+    def save(self, ids, vectors, df):
+        """Write a new generation of the index and atomically switch to it."""
+        generation = f"index-{time.time_ns()}"
+        (self.path / generation).mkdir(parents=True)
+        for name, array in (("ids", ids), ("vectors", vectors), ("df", df)):
+            np.save(self.path / generation / f"{name}.npy", array)
+
+        link = self.path / "current.tmp"
+        link.unlink(missing_ok=True)
+        link.symlink_to(generation)
+        os.replace(link, self.path / "current")
+        self._opened = None
+
+        # Processes still mapping an old generation keep reading it until they reopen
+        for old in self.path.glob("index-*"):
+            if old.name != generation:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def rebuild(self, queryset=None):
+        """
+        Index every published course from scratch.
+
+        Returns:
+            int: Number of courses indexed.
+        """
+        if queryset is None:
+            queryset = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+        documents = list(iter_course_terms(queryset))
+
+        df = np.zeros(DF_BUCKETS + 1, dtype=np.int64)
+        for _, terms in documents:
+            add_document_frequencies(df, terms)
+
+        capacity = max(MIN_CAPACITY, 2 ** math.ceil(math.log2(len(documents) or 1)))
+        ids = np.zeros(capacity, dtype=np.int64)
+        vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        for slot, (course_id, terms) in enumerate(documents):
+            ids[slot] = course_id
+            vectors[slot] = vectorize(terms, df, self.dimensions)
+
+        with self.locked():
+            self.save(ids, vectors, df)
+        return len(documents)
+
+    def update(self, course_id):
+        """
+        Index, reindex or drop a single course after it was saved or deleted.
+
+        New courses are weighted with the current document frequencies and
+        counted in them; existing courses are not recounted, which lets the
+        frequencies drift slightly until the next rebuild. Without an index
+        yet, the whole published catalog is indexed instead.
+        """
+        if not self.exists():
+            self.rebuild()
+            return
+        documents = dict(
+            iter_course_terms(
+                Course.objects.filter(id=course_id, status=Course.CourseStatus.PUBLISHED)
+            )
+        )
+        with self.locked():
+            ids, vectors, df = self.open("r+")
+            slots = np.flatnonzero(ids == course_id)
+
+            if course_id not in documents:
+                ids[slots] = 0
+                vectors[slots] = 0
+            else:
+                terms = documents[course_id]
+                if not len(slots):
+                    add_document_frequencies(df, terms)
+                    slots = np.flatnonzero(ids == 0)[:1]
+                if not len(slots):
+                    ids, vectors, df = self.grow(ids, vectors, df)
+                    slots = np.flatnonzero(ids == 0)[:1]
+                vectors[slots[0]] = vectorize(terms, df, self.dimensions)
+                ids[slots[0]] = course_id
+
+            for array in (ids, vectors, df):
+                array.flush()
+
+    def grow(self, ids, vectors, df):
+        """Double the capacity of the index, replacing its files."""
+        capacity = len(ids) * 2
+        grown_ids = np.zeros(capacity, dtype=np.int64)
+        grown_ids[: len(ids)] = ids
+        grown_vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        grown_vectors[: len(ids)] = vectors
+        self.save(grown_ids, grown_vectors, np.array(df))
+        return self.open("r+")
+
+    def similar(self, course_id, limit=10):
+        """
+        Ids of the `limit` courses most similar to `course_id`, best first,
+        by cosine similarity of their vectors.
+        """
+        if not self.exists():
+            return []
+        ids, vectors, _ = self.open()
+        slots = np.flatnonzero(ids == course_id)
+        if not len(slots):
+            return []
+
+        scores = vectors @ vectors[slots[0]]
+        scores[(ids == 0) | (ids == course_id) | (scores <= 0)] = -np.inf
+        limit = min(limit, np.isfinite(scores).sum())
+        if not limit:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return ids[best].tolist()
+
+
+similarity_index = SimilarityIndex()
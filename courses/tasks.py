@@ -0,0 +1,30 @@
+from celery import shared_task
+
+from .cache import bump_catalog_version
+from .recommendations import build_recommendations
+from .search import build_search_words
+from .similarity import similarity_index
+
+
+@shared_task
+def build_recommendations_task():
+    built = build_recommendations()
+    return f"Built recommendations for {built} courses"
+
+
+@shared_task
+def update_similarity_index_task(course_id):
+    similarity_index.update(course_id)
+    bump_catalog_version()
+
+
+@shared_task
+def rebuild_similarity_index_task():
+    indexed = similarity_index.rebuild()
+    return f"Indexed {indexed} courses"
+
+
+@shared_task
+def build_search_words_task():
+    words = build_search_words()
+    return f"Indexed {words} search words"
@@ -1,11 +1,34 @@
 import json
+import shutil
+from collections import Counter
+from io import StringIO
 
+import numpy as np
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from accounts.models import User
-from courses.models import Topics
+from cart.models import Cart, Wishlist
+from courses import autocomplete
+from courses.autocomplete import PrefixIndex
+from courses.models import (
+    Course,
+    CourseDetail,
+    CourseRecommendation,
+    PriceLevel,
+    SearchWord,
+    TopicClosure,
+    Topics,
+)
+from courses.recommendations import build_recommendations, co_enrollment_counts
+from courses.search import build_search_words, fuzzy_search_courses, ngram_search
+from courses.similarity import similarity_index
+from skillexa.query_budget import QueryBudgetExceeded, assert_query_budget
+from students.models import Enrollments
 
 
 @pytest.fixture
@@ -106,3 +129,817 @@ def test_delete_topic_as_admin(client, create_topics, auth_headers):
     _, sub_topic = create_topics
     response = client.delete(f"/course/topics/{sub_topic.id}/", **auth_headers["admin"])
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.fixture
+def searchable_courses(db, create_topics):
+    """Fixture to create published and draft courses for search"""
+    _, sub_topic = create_topics
+    title_hit = Course.objects.create(
+        title="Django REST Masterclass",
+        subtitle="Build APIs",
+        topic=sub_topic,
+        status=Course.CourseStatus.PUBLISHED,
+    )
+    description_hit = Course.objects.create(
+        title="Backend Basics",
+        subtitle="Servers",
+        description="A short detour through django views.",
+        status=Course.CourseStatus.PUBLISHED,
+    )
+    draft = Course.objects.create(
+        title="Django Draft",
+        subtitle="Unreleased",
+        status=Course.CourseStatus.DRAFT,
+    )
+    return title_hit, description_hit, draft
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(client, searchable_courses):
+    """Title matches outrank description matches and drafts are excluded"""
+    title_hit, description_hit, _ = searchable_courses
+    response = client.get("/course/courses/search/", {"q": "django"})
+    assert response.status_code == status.HTTP_200_OK
+    ids = [course["id"] for course in response.data["results"]]
+    assert ids == [title_hit.id, description_hit.id]
+
+
+@pytest.mark.django_db
+def test_search_matches_topic_name(client, searchable_courses):
+    """Topic names are part of the search document"""
+    title_hit, _, _ = searchable_courses
+    response = client.get("/course/courses/search/", {"q": "python"})
+    assert [course["id"] for course in response.data["results"]] == [title_hit.id]
+
+
+@pytest.mark.django_db
+def test_search_requires_term(client):
+    """A missing search term is rejected"""
+    response = client.get("/course/courses/search/")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.fixture
+def topic_tree(db, create_topics):
+    """Fixture to build a three level topic tree"""
+    main_topic, sub_topic = create_topics
+    django = Topics.objects.create(name="Django", parent=sub_topic)
+    design = Topics.objects.create(name="Design")
+    return main_topic, sub_topic, django, design
+
+
+@pytest.mark.django_db
+def test_list_topics_renders_nested_tree(client, topic_tree, django_assert_max_num_queries):
+    """The whole tree is rendered with a constant number of queries"""
+    with django_assert_max_num_queries(3):
+        response = client.get("/course/topics/")
+    assert response.status_code == status.HTTP_200_OK
+    programming = response.data["results"][0]
+    assert programming["subcategories"][0]["name"] == "Python"
+    assert programming["subcategories"][0]["subcategories"][0]["name"] == "Django"
+
+
+@pytest.mark.django_db
+def test_reparent_topic_moves_subtree(topic_tree):
+    """Moving a topic carries its descendants along in the closure table"""
+    main_topic, sub_topic, django, design = topic_tree
+    sub_topic.parent = design
+    sub_topic.save()
+
+    assert set(Topics.objects.descendants_of(design)) == {sub_topic, django}
+    assert not Topics.objects.descendants_of(main_topic).exists()
+    assert TopicClosure.objects.get(ancestor=design, descendant=django).depth == 2
+
+
+@pytest.mark.django_db
+def test_cannot_move_topic_under_its_subcategory(client, topic_tree, auth_headers):
+    """A topic cannot be reparented into its own subtree"""
+    main_topic, _, django, _ = topic_tree
+    response = client.patch(
+        f"/course/topics/{main_topic.id}/",
+        data=json.dumps({"parent": django.id}),
+        content_type="application/json",
+        **auth_headers["admin"],
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_topic_courses_include_descendants(client, topic_tree):
+    """Courses of subcategories are listed under their ancestors"""
+    main_topic, _, django, design = topic_tree
+    course = Course.objects.create(
+        title="Django Deep Dive",
+        subtitle="ORM",
+        topic=django,
+        status=Course.CourseStatus.PUBLISHED,
+    )
+    Course.objects.create(
+        title="Color Theory",
+        subtitle="Palettes",
+        topic=design,
+        status=Course.CourseStatus.PUBLISHED,
+    )
+    response = client.get(f"/course/topics/{main_topic.id}/courses/")
+    assert [item["id"] for item in response.data["results"]] == [course.id]
+
+
+@pytest.mark.django_db
+def test_published_courses_cursor_pagination(client):
+    """Cursor mode walks the catalog newest first without page numbers"""
+    courses = [
+        Course.objects.create(
+            title=f"Course {index}",
+            subtitle="Paged",
+            status=Course.CourseStatus.PUBLISHED,
+        )
+        for index in range(3)
+    ]
+    response = client.get(
+        "/course/courses/published/", {"pagination": "cursor", "page_size": 2}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "count" not in response.data
+    assert [item["id"] for item in response.data["results"]] == [
+        courses[2].id,
+        courses[1].id,
+    ]
+
+    response = client.get(response.data["next"])
+    assert [item["id"] for item in response.data["results"]] == [courses[0].id]
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_published_courses_page_number_pagination(client):
+    """Page number mode stays the default"""
+    Course.objects.create(
+        title="Only Course", subtitle="Paged", status=Course.CourseStatus.PUBLISHED
+    )
+    response = client.get("/course/courses/published/")
+    assert response.data["count"] == 1
+
+
+@pytest.mark.django_db
+def test_anonymous_catalog_is_served_from_cache(client, django_assert_num_queries):
+    """Repeated anonymous browsing does not query the database"""
+    Course.objects.create(
+        title="Cached Course", subtitle="Cached", status=Course.CourseStatus.PUBLISHED
+    )
+    first = client.get("/course/courses/")
+    with django_assert_num_queries(0):
+        second = client.get("/course/courses/")
+    assert second.status_code == status.HTTP_200_OK
+    assert second.data == first.data
+
+
+@pytest.mark.django_db
+def test_catalog_cache_is_invalidated_by_changes(client, django_capture_on_commit_callbacks):
+    """Saving catalog data expires cached responses once it commits"""
+    course = Course.objects.create(
+        title="Old Title", subtitle="Cached", status=Course.CourseStatus.PUBLISHED
+    )
+    assert client.get("/course/courses/published/").data["results"][0]["title"] == "Old Title"
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        course.title = "New Title"
+        course.save()
+        # Until the write commits, readers keep the old version
+        assert client.get("/course/courses/published/").data["results"][0]["title"] == "Old Title"
+    for callback in callbacks:
+        callback()
+    assert client.get("/course/courses/published/").data["results"][0]["title"] == "New Title"
+
+
+@pytest.mark.django_db
+def test_catalog_cache_is_keyed_by_role(client, create_users, auth_headers):
+    """Admins do not receive the anonymous view of the catalog"""
+    Course.objects.create(
+        title="Under Review", subtitle="Cached", status=Course.CourseStatus.PENDING
+    )
+    assert client.get("/course/courses/").data["count"] == 0
+    assert client.get("/course/courses/", **auth_headers["admin"]).data["count"] == 1
+
+    # The admin role alone does not show more than the published courses
+    staff = User.objects.create_user(
+        email="staff@example.com",
+        username="staff",
+        password="StaffPass123",
+        first_name="Staff",
+        last_name="User",
+        role=User.ADMIN,
+    )
+    headers = {
+        "HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(staff).access_token}"
+    }
+    assert client.get("/course/courses/", **headers).data["count"] == 0
+
+
+@pytest.fixture
+def instructor_headers(db):
+    instructor = User.objects.create_user(
+        email="instructor@example.com",
+        username="instructor",
+        password="InstructorPass123",
+        first_name="Test",
+        last_name="Instructor",
+        role=User.INSTRUCTOR,
+    )
+    return instructor, {
+        "HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(instructor).access_token}"
+    }
+
+
+@pytest.mark.django_db
+def test_course_list_has_no_repeated_queries(client, create_topics, instructor_headers):
+    """Topic, instructor and details are loaded once per page, not once per course"""
+    instructor, _ = instructor_headers
+    for index in range(3):
+        course = Course.objects.create(
+            title=f"Course {index}",
+            subtitle="Budget",
+            instructor=instructor,
+            topic=create_topics[1],
+            status=Course.CourseStatus.PUBLISHED,
+        )
+        course.details.create(detail_type="requirement", description="Python")
+
+    with assert_query_budget(5):
+        response = client.get("/course/courses/")
+    assert [item["instructor_name"] for item in response.data["results"]] == [
+        "Test Instructor"
+    ] * 3
+
+
+@pytest.mark.django_db
+def test_create_course_with_details_stays_within_budget(client, create_topics, instructor_headers):
+    """Nested details are inserted in one statement"""
+    _, headers = instructor_headers
+    price = PriceLevel.objects.create(name="Tier 1", amount="499.00")
+    payload = {
+        "title": "Budgeted Course",
+        "subtitle": "Budget",
+        "description": "Budget",
+        "price_id": price.id,
+        "topic": create_topics[1].id,
+        "details": [
+            {"detail_type": "requirement", "description": f"Requirement {index}"}
+            for index in range(5)
+        ],
+    }
+    response = client.post(
+        "/course/courses/", json.dumps(payload), content_type="application/json", **headers
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.data["details"]) == 5
+
+
+@pytest.mark.django_db
+def test_exceeding_query_budget_fails_in_strict_mode(client, create_topics, monkeypatch):
+    """Views raise when they run more queries than declared"""
+    from courses.views import TopicsViewSet
+
+    monkeypatch.setattr(TopicsViewSet, "query_budget", {"list": 0})
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/course/topics/")
+
+
+@pytest.mark.django_db
+def test_export_streams_published_courses_as_ndjson(client, create_topics, instructor_headers):
+    """Every published course is written as one JSON line, with its details"""
+    instructor, _ = instructor_headers
+    courses = [
+        Course.objects.create(
+            title=f"Exported {index}",
+            subtitle="Export",
+            instructor=instructor,
+            topic=create_topics[1],
+            status=Course.CourseStatus.PUBLISHED,
+        )
+        for index in range(3)
+    ]
+    courses[0].details.create(detail_type="outcome", description="Streaming")
+    Course.objects.create(title="Draft", subtitle="Export", status=Course.CourseStatus.DRAFT)
+
+    response = client.get("/course/courses/export/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [course.id for course in courses]
+    assert rows[0]["details"][0]["description"] == "Streaming"
+    assert rows[0]["topic_name"] == "Python"
+
+
+@pytest.fixture
+def detailed_course(instructor_headers):
+    instructor, headers = instructor_headers
+    course = Course.objects.create(title="Autosaved", subtitle="Details", instructor=instructor)
+    details = [
+        course.details.create(detail_type="requirement", description="Python"),
+        course.details.create(detail_type="outcome", description="Django"),
+        course.details.create(detail_type="outcome", description="DRF"),
+    ]
+    return course, details, headers
+
+
+def detail_writes(queries):
+    return [
+        query["sql"]
+        for query in queries
+        if "courses_coursedetail" in query["sql"]
+        and query["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+@pytest.mark.django_db
+def test_unchanged_autosave_does_not_rewrite_details(client, detailed_course):
+    """Sending the stored details back writes nothing"""
+    course, details, headers = detailed_course
+    payload = {
+        "details": [
+            {"detail_type": detail.detail_type, "description": detail.description}
+            for detail in details
+        ]
+    }
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f"/course/courses/{course.id}/",
+            json.dumps(payload),
+            content_type="application/json",
+            **headers,
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert detail_writes(queries.captured_queries) == []
+    assert sorted(course.details.values_list("id", flat=True)) == [d.id for d in details]
+
+
+@pytest.mark.django_db
+def test_course_update_diffs_details(client, detailed_course):
+    """Edits, additions and removals cost one statement each"""
+    course, (requirement, django_outcome, drf_outcome), headers = detailed_course
+    payload = {
+        "details": [
+            {"id": requirement.id, "detail_type": "requirement", "description": "Python 3"},
+            {"detail_type": "outcome", "description": "DRF"},
+            {"detail_type": "target_audience", "description": "Backend developers"},
+        ]
+    }
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f"/course/courses/{course.id}/",
+            json.dumps(payload),
+            content_type="application/json",
+            **headers,
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert [sql.split()[0] for sql in detail_writes(queries.captured_queries)] == [
+        "INSERT",
+        "UPDATE",
+        "DELETE",
+    ]
+
+    stored = {detail.id: (detail.detail_type, detail.description) for detail in course.details.all()}
+    assert stored[requirement.id] == ("requirement", "Python 3")
+    assert stored[drf_outcome.id] == ("outcome", "DRF")
+    assert django_outcome.id not in stored
+    assert ("target_audience", "Backend developers") in stored.values()
+    assert len(response.data["details"]) == 3
+
+
+@pytest.fixture
+def faceted_catalog(db, topic_tree):
+    main_topic, sub_topic, leaf_topic, other_topic = topic_tree
+    basic = PriceLevel.objects.create(name="Basic", amount="499.00")
+    premium = PriceLevel.objects.create(name="Premium", amount="999.00")
+    rows = [
+        (Course.CourseLevel.BEGINNER, "EN", leaf_topic, basic),
+        (Course.CourseLevel.BEGINNER, "HI", sub_topic, basic),
+        (Course.CourseLevel.ADVANCED, "EN", main_topic, premium),
+        (Course.CourseLevel.ADVANCED, "EN", other_topic, premium),
+    ]
+    for index, (level, language, topic, price) in enumerate(rows):
+        Course.objects.create(
+            title=f"Faceted {index}",
+            subtitle="Facets",
+            level=level,
+            language=language,
+            topic=topic,
+            price=price.amount,
+            status=Course.CourseStatus.PUBLISHED,
+        )
+    Course.objects.create(title="Faceted draft", subtitle="Facets", topic=leaf_topic)
+    return main_topic, other_topic, basic, premium
+
+
+def facet_counts(facets, name, key="value"):
+    return {item[key]: item["count"] for item in facets[name]}
+
+
+@pytest.mark.django_db
+def test_course_list_filters(client, faceted_catalog):
+    """Level, language, topic subtree and price filters narrow the catalog"""
+    main_topic, _, basic, _ = faceted_catalog
+
+    def titles(**params):
+        response = client.get("/course/courses/", params)
+        return sorted(item["title"] for item in response.data["results"])
+
+    assert titles(level="1") == ["Faceted 0", "Faceted 1"]
+    assert titles(language="en", level="3") == ["Faceted 2", "Faceted 3"]
+    assert titles(topic=main_topic.id) == ["Faceted 0", "Faceted 1", "Faceted 2"]
+    assert titles(price_level=basic.id, language="EN") == ["Faceted 0"]
+    assert titles(min_price="500") == ["Faceted 2", "Faceted 3"]
+    assert client.get("/course/courses/", {"level": "9"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_facets_count_the_filtered_catalog(client, faceted_catalog):
+    """Facets count published courses per dimension for the current filters"""
+    main_topic, other_topic, basic, premium = faceted_catalog
+
+    facets = client.get("/course/courses/facets/").data
+    assert facet_counts(facets, "level") == {1: 2, 2: 0, 3: 2, 4: 0}
+    assert facet_counts(facets, "language")["EN"] == 3
+    assert facet_counts(facets, "topic", "id") == {main_topic.id: 3, other_topic.id: 1}
+    assert facet_counts(facets, "price_level", "id") == {basic.id: 2, premium.id: 2}
+
+    facets = client.get("/course/courses/facets/", {"language": "EN"}).data
+    assert facet_counts(facets, "level") == {1: 1, 2: 0, 3: 2, 4: 0}
+    assert facet_counts(facets, "topic", "id") == {main_topic.id: 2, other_topic.id: 1}
+
+
+@pytest.mark.django_db
+def test_facets_are_cached_by_catalog_version(client, faceted_catalog, django_assert_num_queries):
+    """Repeated sidebar renders do not scan the course table"""
+    client.get("/course/courses/facets/")
+    with django_assert_num_queries(0):
+        client.get("/course/courses/facets/")
+
+
+@pytest.mark.django_db
+def test_popular_sort_uses_maintained_counters(client, faceted_catalog):
+    """`?sort=popular` orders by enrollments, in page mode only"""
+    student = User.objects.create_user(
+        first_name="popular",
+        last_name="student",
+        email="popular@example.com",
+        username="popular",
+        password="popular123",
+    )
+    courses = list(Course.objects.filter(status=Course.CourseStatus.PUBLISHED).order_by("id"))
+    Enrollments.objects.bulk_create([Enrollments(student=student, course=courses[1])])
+    Wishlist.objects.create(student=student, course=courses[2])
+    Course.objects.filter(pk=courses[2].pk).update(enrollment_count=5)
+
+    titles = [item["title"] for item in client.get("/course/courses/?sort=popular").data["results"]]
+    assert titles[:2] == [courses[2].title, courses[1].title]
+
+    response = client.get("/course/courses/published/", {"sort": "popular"})
+    assert [item["enrollment_count"] for item in response.data["results"]][:2] == [5, 1]
+    assert response.data["results"][0]["wishlist_count"] == 1
+    # Tied, changing counts cannot key a cursor
+    response = client.get("/course/courses/published/", {"sort": "popular", "pagination": "cursor"})
+    assert response.status_code == 400
+    assert client.get("/course/courses/", {"sort": "newest", "pagination": "cursor"}).status_code == 200
+    assert client.get("/course/courses/", {"sort": "cheapest"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_saving_a_stale_course_keeps_its_counters(faceted_catalog):
+    """A course loaded before an enrollment does not reset its count on save"""
+    student = User.objects.create_user(
+        first_name="stale",
+        last_name="student",
+        email="stale@example.com",
+        username="stale",
+        password="stale123",
+    )
+    stale = Course.objects.order_by("id").first()
+    Enrollments.objects.create(student=student, course=stale)
+
+    stale.subtitle = "Autosaved"
+    stale.save()
+
+    stale.refresh_from_db()
+    assert (stale.subtitle, stale.enrollment_count) == ("Autosaved", 1)
+
+
+@pytest.mark.django_db
+def test_reconcile_course_counters_fixes_drift(faceted_catalog):
+    """The reconciliation command recomputes counters chunk by chunk"""
+    student = User.objects.create_user(
+        first_name="drift",
+        last_name="student",
+        email="drift@example.com",
+        username="drift",
+        password="drift123",
+    )
+    first, second = Course.objects.order_by("id")[:2]
+    Cart.objects.create(student=student, course=first)
+    Enrollments.objects.create(student=student, course=second)
+    Course.objects.filter(pk=first.pk).update(cart_count=7, refund_count=2)
+    Course.objects.filter(pk=second.pk).update(enrollment_count=0)
+
+    out = StringIO()
+    call_command("reconcile_course_counters", chunk_size=2, stdout=out)
+
+    assert "fixed 2" in out.getvalue()
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.cart_count, first.refund_count) == (1, 0)
+    assert second.enrollment_count == 1
+
+
+@pytest.fixture
+def co_enrollments(db):
+    """Four students whose baskets overlap on a handful of courses"""
+    courses = [
+        Course.objects.create(
+            title=f"Bundle {index}", subtitle="Bundle", status=Course.CourseStatus.PUBLISHED
+        )
+        for index in range(4)
+    ]
+    baskets = [(0, 1, 2), (0, 1), (0, 1, 3), (1, 2)]
+    students = []
+    for index, basket in enumerate(baskets):
+        student = User.objects.create_user(
+            first_name="buyer",
+            last_name=str(index),
+            email=f"buyer{index}@example.com",
+            username=f"buyer{index}",
+            password="buyer123",
+        )
+        Enrollments.objects.bulk_create(
+            [Enrollments(student=student, course=courses[position]) for position in basket]
+        )
+        students.append(student)
+    return courses
+
+
+def test_co_enrollment_counts_match_brute_force():
+    """The vectorized pair expansion counts every co-enrollment once per basket"""
+    students = np.array([0, 1, 0, 2, 1, 0, 2, 3])
+    courses = np.array([0, 1, 1, 2, 2, 3, 0, 1])
+    rows, cols, counts = co_enrollment_counts(students, courses, 4, max_basket=10)
+
+    expected = Counter()
+    for student in set(students.tolist()):
+        basket = courses[students == student].tolist()
+        expected.update((a, b) for a in basket for b in basket if a != b)
+    assert dict(zip(zip(rows.tolist(), cols.tolist()), counts.tolist())) == expected
+
+
+@pytest.mark.django_db
+def test_also_bought_serves_precomputed_neighbours(client, co_enrollments, django_assert_num_queries):
+    """Recommendations are built from baskets and served from one stored row"""
+    first, second, third, fourth = co_enrollments
+    assert build_recommendations(top_k=2, min_support=1) == 4
+
+    # Scores are cosine similarities: the niche fourth course outranks the third
+    recommendation = CourseRecommendation.objects.get(course=first)
+    assert recommendation.neighbours == [second.id, fourth.id]
+
+    Course.objects.filter(pk=second.pk).update(status=Course.CourseStatus.ARCHIVED)
+    with django_assert_num_queries(3):
+        response = client.get(f"/course/courses/{first.id}/also-bought/")
+    assert [item["id"] for item in response.data] == [fourth.id]
+
+    assert build_recommendations(min_support=3) == 2
+    assert client.get(f"/course/courses/{third.id}/also-bought/").data == []
+
+
+@pytest.fixture
+def similarity_courses(db):
+    """Published courses on two subjects, indexed"""
+    texts = [
+        ("Django for Beginners", "Build web apps with Python", "Models, views and templates"),
+        ("Django REST APIs", "Web APIs with Python and Django", "Serializers and viewsets"),
+        ("Italian Cooking", "Pasta and sauces", "Cook fresh pasta at home"),
+        ("Baking Bread", "Sourdough at home", "Bake bread with a sourdough starter"),
+    ]
+    courses = []
+    for title, subtitle, outcome in texts:
+        course = Course.objects.create(
+            title=title, subtitle=subtitle, status=Course.CourseStatus.PUBLISHED
+        )
+        CourseDetail.objects.create(
+            course=course, detail_type=CourseDetail.DetailType.OUTCOME, description=outcome
+        )
+        courses.append(course)
+    assert similarity_index.rebuild() == 4
+    return courses
+
+
+@pytest.mark.django_db
+def test_first_similarity_update_indexes_the_existing_catalog(similarity_courses):
+    """Without an index, the first incremental update builds the whole catalog"""
+    django, rest, cooking, baking = similarity_courses
+    shutil.rmtree(similarity_index.path)
+    assert similarity_index.similar(rest.id) == []
+
+    similarity_index.update(django.id)
+    assert similarity_index.similar(rest.id)[0] == django.id
+    assert similarity_index.similar(cooking.id)[0] == baking.id
+
+    shutil.rmtree(similarity_index.path)
+    out = StringIO()
+    call_command("build_similarity_index", stdout=out)
+    assert "Indexed 4 courses" in out.getvalue()
+    assert similarity_index.similar(cooking.id)[0] == baking.id
+
+
+@pytest.mark.django_db
+def test_similar_courses_ranked_by_content(client, similarity_courses):
+    """Courses sharing terms rank first; unrelated courses are left out"""
+    django, rest, cooking, baking = similarity_courses
+
+    assert similarity_index.similar(django.id)[0] == rest.id
+    assert similarity_index.similar(cooking.id)[0] == baking.id
+
+    response = client.get(f"/course/courses/{rest.id}/similar/")
+    assert [item["id"] for item in response.data][:1] == [django.id]
+    assert client.get("/course/courses/0/similar/").data == []
+
+
+@pytest.mark.django_db
+def test_similarity_index_updates_incrementally(similarity_courses):
+    """Saved courses are indexed, reindexed and dropped one row at a time"""
+    django, rest, cooking, _ = similarity_courses
+
+    new = Course.objects.create(title="Advanced Django", subtitle="Python web apps")
+    similarity_index.update(new.id)
+    assert new.id not in similarity_index.similar(django.id)
+
+    new.status = Course.CourseStatus.PUBLISHED
+    new.save()
+    similarity_index.update(new.id)
+    assert new.id in similarity_index.similar(django.id)[:2]
+
+    cooking.title = "Django Pasta"
+    cooking.save()
+    similarity_index.update(cooking.id)
+    assert cooking.id in similarity_index.similar(rest.id)
+
+    cooking.status = Course.CourseStatus.ARCHIVED
+    cooking.save()
+    similarity_index.update(cooking.id)
+    assert cooking.id not in similarity_index.similar(rest.id)
+    assert similarity_index.similar(cooking.id) == []
+
+
+@pytest.fixture
+def autocomplete_catalog(db, settings, monkeypatch, create_topics):
+    """Published courses with distinct popularity, and a draft"""
+    settings.AUTOCOMPLETE_REBUILD_INTERVAL = 0
+    # A background rebuild would not see the data of the test transaction
+    settings.AUTOCOMPLETE_BACKGROUND_REBUILD = False
+    monkeypatch.setattr(autocomplete, "_index", None)
+    main_topic, sub_topic = create_topics
+    titles = [("Python for Data Science", 30), ("Pythonic Patterns", 10), ("Intro to Python", 20)]
+    courses = [
+        Course.objects.create(
+            title=title,
+            subtitle="Python",
+            topic=sub_topic,
+            status=Course.CourseStatus.PUBLISHED,
+        )
+        for title, _ in titles
+    ]
+    for course, (_, enrollments) in zip(courses, titles):
+        Course.objects.filter(pk=course.pk).update(enrollment_count=enrollments)
+    Course.objects.create(title="Python Drafts", subtitle="Python", topic=sub_topic)
+    return courses
+
+
+@pytest.mark.django_db
+def test_autocomplete_matches_word_prefixes_by_popularity(client, autocomplete_catalog):
+    """Any word of a title can start the match; heavier courses come first"""
+    data_science, patterns, intro = autocomplete_catalog
+
+    response = client.get("/course/courses/autocomplete/", {"q": "pyt"})
+    assert [item["id"] for item in response.data["courses"]] == [
+        data_science.id,
+        intro.id,
+        patterns.id,
+    ]
+    assert [item["name"] for item in response.data["topics"]] == ["Python"]
+
+    response = client.get("/course/courses/autocomplete/", {"q": "Data sci", "limit": 1})
+    assert response.data["courses"] == [{"id": data_science.id, "title": data_science.title}]
+    response = client.get("/course/courses/autocomplete/", {"q": "pyt", "limit": -5})
+    assert len(response.data["courses"]) == 1
+    assert client.get("/course/courses/autocomplete/", {"q": "  "}).data["courses"] == []
+
+
+@pytest.mark.django_db
+def test_autocomplete_rebuilds_on_catalog_change(
+    client, autocomplete_catalog, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    """The index is reused until the catalog version moves"""
+    client.get("/course/courses/autocomplete/", {"q": "py"})
+    with django_assert_num_queries(0):
+        client.get("/course/courses/autocomplete/", {"q": "intro"})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Course.objects.create(
+            title="Pyramid Web Apps", subtitle="Python", status=Course.CourseStatus.PUBLISHED
+        )
+    response = client.get("/course/courses/autocomplete/", {"q": "pyr"})
+    assert [item["title"] for item in response.data["courses"]] == ["Pyramid Web Apps"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_autocomplete_rebuilds_in_the_background(client, settings, monkeypatch):
+    """Catalog changes are picked up by a background rebuild, off the request"""
+    settings.AUTOCOMPLETE_REBUILD_INTERVAL = 0
+    monkeypatch.setattr(autocomplete, "_index", None)
+    Course.objects.create(
+        title="Flask Basics", subtitle="Python", status=Course.CourseStatus.PUBLISHED
+    )
+    assert client.get("/course/courses/autocomplete/", {"q": "fla"}).data["courses"]
+
+    Course.objects.create(
+        title="Pyramid Web Apps", subtitle="Python", status=Course.CourseStatus.PUBLISHED
+    )
+    response = client.get("/course/courses/autocomplete/", {"q": "pyr"})
+    assert response.data["courses"] == []
+
+    autocomplete._rebuild.join(timeout=10)
+    response = client.get("/course/courses/autocomplete/", {"q": "pyr"})
+    assert [item["title"] for item in response.data["courses"]] == ["Pyramid Web Apps"]
+
+
+def test_prefix_index_handles_long_prefixes():
+    """Prefixes longer than the stored keys are checked against the labels"""
+    index = PrefixIndex(
+        [(1, "Kubernetes Administration Deep Dive", 1), (2, "Kubernetes Administrator", 2)],
+        key_length=8,
+        max_words=4,
+    )
+    assert index.search("kubernetes admin", 10) == [
+        (2, "Kubernetes Administrator"),
+        (1, "Kubernetes Administration Deep Dive"),
+    ]
+    assert index.search("kubernetes administration", 10) == [
+        (1, "Kubernetes Administration Deep Dive")
+    ]
+    assert index.search("déep", 10) == [(1, "Kubernetes Administration Deep Dive")]
+
+
+@pytest.fixture
+def misspelled_catalog(db):
+    """Courses whose titles users tend to misspell"""
+    web = Topics.objects.create(name="Web Development")
+    titles = [
+        ("Python for Data Science", None, 100),
+        ("Python Basics", None, 5),
+        ("Modern JavaScript", web, 50),
+        ("Watercolor Painting", None, 0),
+    ]
+    courses = []
+    for title, topic, enrollments in titles:
+        course = Course.objects.create(
+            title=title, subtitle="Course", topic=topic, status=Course.CourseStatus.PUBLISHED
+        )
+        Course.objects.filter(pk=course.pk).update(enrollment_count=enrollments)
+        courses.append(course)
+    return courses
+
+
+@pytest.mark.django_db
+def test_fuzzy_search_tolerates_typos(client, misspelled_catalog):
+    """Misspelled titles and topics match, ranked by similarity and popularity"""
+    data_science, basics, javascript, _ = misspelled_catalog
+
+    response = client.get("/course/courses/search/", {"q": "pyhton", "mode": "fuzzy"})
+    assert [item["id"] for item in response.data["results"]] == [data_science.id, basics.id]
+
+    response = client.get("/course/courses/search/", {"q": "javascirpt", "mode": "fuzzy"})
+    assert [item["id"] for item in response.data["results"]] == [javascript.id]
+
+    response = client.get("/course/courses/search/", {"q": "web develpment", "mode": "fuzzy"})
+    assert [item["id"] for item in response.data["results"]] == [javascript.id]
+
+    assert client.get("/course/courses/search/", {"q": "x", "mode": "exact"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_ngram_fallback_matches_trigram_search(misspelled_catalog):
+    """The in-process fallback ranks like the pg_trgm search"""
+    published = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+    for term in ("pyhton", "javascirpt", "watercolour", "pyhton basic"):
+        expected = list(fuzzy_search_courses(published, term).values_list("id", flat=True))
+        assert list(ngram_search(published, term).values_list("id", flat=True)) == expected
+
+
+@pytest.mark.django_db
+def test_build_search_words_counts_published_titles(misspelled_catalog):
+    """Search words are the words of published titles, with their course counts"""
+    Course.objects.create(title="Python Drafts", subtitle="Course")
+
+    assert build_search_words() == 9
+    assert SearchWord.objects.get(word="python").course_count == 2
+    assert not SearchWord.objects.filter(word="drafts").exists()
@@ -1,24 +1,52 @@
+from django.conf import settings
 from django.db.models import Q
-from django.shortcuts import get_object_or_404
-from rest_framework import permissions, viewsets
+from django.http import StreamingHttpResponse
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from accounts.models import User
 from instructor.permissions import IsInstructor
+from skillexa.pagination import KeysetPagination
+from skillexa.query_budget import QueryBudgetMixin
 
-from .models import Course, Topics
+from .autocomplete import get_autocomplete_index
+from .cache import cache_catalog_response
+from .filters import SORT_ORDERINGS, course_facets, filter_courses, get_sort_ordering
+from .models import Course, CourseRecommendation, Topics
 from .permissions import IsAdminInstructor, IsAdminUser
+from .search import fuzzy_search_courses, search_courses
 from .serializers import CourseSerializer, TopicsSerializer
+from .similarity import similarity_index
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     API endpoints for managing courses.
     """
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    pagination_class = KeysetPagination
+    export_chunk_size = 500
+    query_budget = {
+        "list": 5,
+        "retrieve": 4,
+        "published": 5,
+        "search": 9,
+        "export": 1,
+        "facets": 4,
+        "also_bought": 5,
+        "similar": 4,
+        "autocomplete": 3,
+        "create": 10,
+        "update": 12,
+        "partial_update": 12,
+        "destroy": 15,
+    }
 
     def get_permissions(self):
         """Set permissions dynamically."""
@@ -34,22 +62,206 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter courses based on user role."""
+        queryset = Course.objects.select_related("topic", "instructor").prefetch_related(
+            "details"
+        )
         if self.request.user.is_authenticated:
             if getattr(self.request.user, "is_superuser", False):
-                return Course.objects.filter(~Q(status=Course.CourseStatus.DRAFT))
+                return queryset.filter(~Q(status=Course.CourseStatus.DRAFT))
             elif getattr(self.request.user, "role", False) == User.INSTRUCTOR:
-                return Course.objects.filter(instructor=self.request.user)
-        return Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+                return queryset.filter(instructor=self.request.user)
+        return queryset.filter(status=Course.CourseStatus.PUBLISHED)
+
+    def filter_queryset(self, queryset):
+        """
+        Apply the catalog filters (see `courses.filters.filter_courses`) and the
+        `?sort=` ordering, e.g. `?sort=popular` for the most enrolled courses.
+        """
+        params = self.request.query_params
+        queryset = filter_courses(super().filter_queryset(queryset), params)
+        if "sort" in params:
+            queryset = queryset.order_by(*get_sort_ordering(params))
+        return queryset
+
+    @property
+    def cursor_ordering(self):
+        """
+        Keyset pagination only follows the newest first order. DRF positions
+        cursors on the first ordering field alone, and enrollment counts tie
+        and change between page loads, so `?sort=popular` would skip or repeat
+        courses; it is paged by number instead.
+        """
+        ordering = get_sort_ordering(self.request.query_params)
+        if ordering != SORT_ORDERINGS["newest"]:
+            raise ValidationError(
+                {"sort": "Only 'newest' can be combined with cursor pagination."}
+            )
+        return ordering
+
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    @cache_catalog_response
     def published(self, request):
         """Endpoint to get only published courses."""
-        queryset = Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_queryset(
+            Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+            .select_related("topic", "instructor")
+            .prefetch_related("details")
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    def export(self, request):
+        """
+        Stream every published course as newline delimited JSON.
+
+        Courses are read through a server-side cursor `export_chunk_size` rows
+        at a time, with `details`, `topic` and `instructor` loaded per chunk,
+        and each line is sent as soon as it is serialized. Memory use does not
+        depend on the catalog size. The queries run while the response is being
+        streamed, after the query budget of the request has been checked.
+        """
+        queryset = self.filter_queryset(
+            Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+            .select_related("topic", "instructor")
+            .prefetch_related("details")
+            .order_by("id")
+        )
+        serializer = self.get_serializer()
+        encoder = JSONEncoder(ensure_ascii=False)
+
+        def rows():
+            for course in queryset.iterator(chunk_size=self.export_chunk_size):
+                yield encoder.encode(serializer.to_representation(course)) + "\n"
+
+        return StreamingHttpResponse(rows(), content_type="application/x-ndjson")
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    @cache_catalog_response
+    def facets(self, request):
+        """
+        Published course counts per level, language, top-level topic and price
+        level, for the filters in the query string.
+        """
+        queryset = self.filter_queryset(
+            Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+        )
+        return Response(course_facets(queryset))
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="also-bought",
+        permission_classes=[permissions.AllowAny],
+    )
+    @cache_catalog_response
+    def also_bought(self, request, pk=None):
+        """
+        Published courses most often bought together with this one.
+
+        Served from the precomputed `CourseRecommendation` row of the course,
+        without computing anything per request.
+        """
+        neighbours = (
+            CourseRecommendation.objects.filter(course_id=self.get_course_id(pk))
+            .values_list("neighbours", flat=True)
+            .first()
+        ) or []
+        return Response(self.serialize_ranked(neighbours))
 
+    @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
+    @cache_catalog_response
+    def similar(self, request, pk=None):
+        """
+        Published courses whose content is closest to this one, by cosine
+        similarity of TF-IDF vectors (see `courses.similarity`). Unlike
+        `also-bought`, this works for courses without any enrollment.
+        """
+        limit = settings.RECOMMENDATIONS_TOP_K
+        return Response(
+            self.serialize_ranked(similarity_index.similar(self.get_course_id(pk), limit))
+        )
 
-class TopicsViewSet(viewsets.ModelViewSet):
+    def get_course_id(self, pk):
+        try:
+            return int(pk)
+        except ValueError:
+            raise NotFound()
+
+    def serialize_ranked(self, course_ids):
+        """Serialize the published courses of `course_ids`, keeping their order."""
+        if not course_ids:
+            return []
+        courses = Course.objects.filter(
+            id__in=course_ids, status=Course.CourseStatus.PUBLISHED
+        ).select_related("topic", "instructor").prefetch_related("details")
+        by_id = {course.id: course for course in courses}
+        return self.get_serializer(
+            [by_id[id] for id in course_ids if id in by_id], many=True
+        ).data
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    def autocomplete(self, request):
+        """
+        Published course titles and topic names starting with `q` (at any
+        word), most enrolled first.
+
+        Served from an in-process prefix index (see `courses.autocomplete`),
+        without querying the database per keystroke.
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 8)), 20))
+        except ValueError:
+            limit = 8
+        index = get_autocomplete_index()
+        return Response(index.search(request.query_params.get("q", ""), limit))
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
+    def search(self, request):
+        """
+        Search over published courses, ranked by relevance.
+
+        - `mode=fulltext` (default): full-text search over the course document.
+        - `mode=fuzzy`: typo tolerant matching of titles and topic names
+          (e.g. "pyhton"), ranked by similarity and popularity.
+        """
+        term = request.query_params.get("q", "").strip()
+        if not term:
+            return Response(
+                {"error": "Search term 'q' is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        modes = {"fulltext": search_courses, "fuzzy": fuzzy_search_courses}
+        mode = request.query_params.get("mode", "fulltext")
+        if mode not in modes:
+            return Response(
+                {"error": "Search mode must be 'fulltext' or 'fuzzy'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = modes[mode](
+            Course.objects.filter(status=Course.CourseStatus.PUBLISHED)
+            .select_related("topic", "instructor")
+            .prefetch_related("details"),
+            term,
+        )
+        # Results are ordered by rank, so they cannot be keyset paginated
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TopicsViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing course categories and subcategories.
     - Admins can create and update categories.
@@ -58,6 +270,15 @@ class TopicsViewSet(viewsets.ModelViewSet):
 
     queryset = Topics.objects.all()
     serializer_class = TopicsSerializer
+    query_budget = {
+        "list": 5,
+        "retrieve": 4,
+        "courses": 5,
+        "create": 12,
+        "update": 12,
+        "partial_update": 12,
+        "destroy": 8,
+    }
 
     def get_permissions(self):
         """Set permissions dynamically."""
@@ -67,18 +288,47 @@ class TopicsViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return main categories if no parent is specified."""
-        if self.action in ["retrieve", "update", "partial_update"]:
-            print("returning all objects")
+        if self.action in ["retrieve", "update", "partial_update", "destroy"]:
             return Topics.objects.all()
         parent_id = self.request.query_params.get("parent", None)
-        print("none")
         if parent_id:
-            print("returning parent_id")
             return Topics.objects.filter(parent_id=parent_id).order_by("id")
         return Topics.objects.filter(parent__isnull=True).order_by("id")
 
+    def get_tree_serializer(self, topics, many=False):
+        """Serialize topics with their whole subtree resolved in one query."""
+        context = self.get_serializer_context()
+        context["children"] = Topics.objects.children_map(topics)
+        return self.get_serializer(topics, many=many, context=context)
+
+    @cache_catalog_response
+    def list(self, request, *args, **kwargs):
+        """List categories along with their nested subcategories."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_tree_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_tree_serializer(list(queryset), many=True)
+        return Response(serializer.data)
+
     def retrieve(self, request, *args, **kwargs):
         """Retrieve a single category along with its subcategories."""
-        topic = get_object_or_404(Topics, pk=kwargs["pk"])
-        serializer = self.get_serializer(topic)
+        topic = self.get_object()
+        serializer = self.get_tree_serializer(topic)
         return Response(serializer.data)
+
+    @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
+    def courses(self, request, pk=None):
+        """Published courses of a category, including all its subcategories."""
+        queryset = (
+            Course.objects.filter(
+                status=Course.CourseStatus.PUBLISHED,
+                topic__ancestor_links__ancestor_id=pk,
+            )
+            .select_related("topic", "instructor")
+            .prefetch_related("details")
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = CourseSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
@@ -59,6 +59,22 @@ class AdminUserActionsTestCase(APITestCase):
         self.regular_user.refresh_from_db()
         self.assertTrue(self.regular_user.is_blocked)
 
+    def test_blocked_user_is_rejected_on_next_request(self):
+        """Blocking takes effect even while the user is cached for authentication"""
+        self.authenticate_as_user()
+        self.assertEqual(
+            self.client.get("/accounts/profile/").status_code, status.HTTP_200_OK
+        )
+
+        self.authenticate_as_admin()
+        self.client.patch(self.block_url)
+
+        self.authenticate_as_user()
+        self.assertEqual(
+            self.client.get("/accounts/profile/").status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
     def test_admin_can_unblock_user(self):
         """Admin can successfully unblock a user"""
         self.regular_user.is_blocked = True
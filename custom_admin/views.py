@@ -2,24 +2,30 @@ from rest_framework import filters, generics, status
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from accounts.cache import invalidate_user
 from accounts.models import User
+from skillexa.pagination import KeysetPagination
+from skillexa.query_budget import QueryBudgetMixin
 
 from .serializers import AdminUserSerializer
 
 
 # Create your views here.
-class AdminUserListView(generics.ListAPIView):
+class AdminUserListView(QueryBudgetMixin, generics.ListAPIView):
     """
     List all users with optional filtering by role (Only for Admins)
     """
 
     permission_classes = [IsAdminUser]
     serializer_class = AdminUserSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-date_joined", "-id")
 
     queryset = User.objects.all().order_by("id")
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     search_fields = ["username", "email", "first_name", "last_name"]
     ordering_fields = ["id", "role", "email", "username"]
+    query_budget = 4
 
     def get_queryset(self):
         """
@@ -27,17 +33,15 @@ class AdminUserListView(generics.ListAPIView):
         """
         queryset = User.objects.all().order_by("id")
         role = self.request.query_params.get("role")
-        print("role is ", role)
         if role:
             role_map = {"student": User.STUDENT, "instructor": User.INSTRUCTOR}
             if role.lower() in role_map:
                 queryset = queryset.filter(role=role_map[role.lower()])
-                print(queryset)
 
         return queryset
 
 
-class AdminUserDetailView(generics.RetrieveAPIView):
+class AdminUserDetailView(QueryBudgetMixin, generics.RetrieveAPIView):
     """
     Retrieve details of a specific user
     """
@@ -49,7 +53,7 @@ class AdminUserDetailView(generics.RetrieveAPIView):
     lookup_field = "id"
 
 
-class BlockUserView(generics.UpdateAPIView):
+class BlockUserView(QueryBudgetMixin, generics.UpdateAPIView):
     """
     API to block a user (Admin only)
     """
@@ -59,18 +63,20 @@ class BlockUserView(generics.UpdateAPIView):
 
     queryset = User.objects.all()
     lookup_field = "id"
+    query_budget = 4
 
     def patch(self, request, *args, **kwargs):
         user = self.get_object()
         user.is_blocked = True
         user.save()
+        invalidate_user(user.id)
         return Response(
             {"message": f"User {user.username} has been blocked"},
             status=status.HTTP_200_OK,
         )
 
 
-class UnblockUserView(generics.UpdateAPIView):
+class UnblockUserView(QueryBudgetMixin, generics.UpdateAPIView):
     """
     API to Unblock a user (Admin Only)
     """
@@ -80,18 +86,20 @@ class UnblockUserView(generics.UpdateAPIView):
 
     queryset = User.objects.all()
     lookup_field = "id"
+    query_budget = 4
 
     def patch(self, request, *args, **kwargs):
         user = self.get_object()
         user.is_blocked = False
         user.save()
+        invalidate_user(user.id)
         return Response(
             {"message": f"User {user.username} has been unblocked"},
             status=status.HTTP_200_OK,
         )
 
 
-class ActivateUserView(generics.UpdateAPIView):
+class ActivateUserView(QueryBudgetMixin, generics.UpdateAPIView):
     """
     API to Activate a User (Admin Only)
     """
@@ -101,11 +109,13 @@ class ActivateUserView(generics.UpdateAPIView):
 
     queryset = User.objects.all()
     lookup_field = "id"
+    query_budget = 4
 
     def patch(self, request, *args, **kwargs):
         user = self.get_object()
         user.is_active = True
         user.save()
+        invalidate_user(user.id)
         return Response(
             {"message": f"User {user.username} has been activated"},
             status=status.HTTP_200_OK,
@@ -1,6 +1,7 @@
 from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 
+from accounts.cache import invalidate_user
 from accounts.models import OtpVerification
 
 
@@ -38,6 +39,7 @@ class InstructorResetPasswordSerializer(serializers.Serializer):
         user = self.validated_data["user"]
         user.password = make_password(self.validated_data["new_password"])
         user.save()
+        invalidate_user(user.id)
 
         OtpVerification.objects.filter(user=user, purpose="password_reset").delete()
 
@@ -0,0 +1,282 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Latencies kept per operation for percentiles
+LATENCY_SAMPLES = 1000
+
+# Failures worth retrying and counted by the circuit breaker; client errors
+# (`razorpay.errors.BadRequestError`) mean the gateway is healthy
+TRANSIENT_ERRORS = (
+    requests.RequestException,
+    razorpay.errors.ServerError,
+    razorpay.errors.GatewayError,
+)
+
+
+def never_sent(error):
+    """
+    Whether a failed request provably never reached the gateway: the connection
+    could not be opened (refused, unresolvable host or connect timeout).
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    return isinstance(error, requests.ConnectionError) and isinstance(
+        getattr(error.args[0] if error.args else None, "reason", None),
+        NewConnectionError,
+    )
+
+
+class GatewayUnavailable(Exception):
+    """The payment gateway failed, timed out or is shed by the circuit breaker."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the gateway is failing.
+
+    Opens after `threshold` consecutive failures and rejects calls for
+    `cooldown` seconds. It then lets a single trial call through (half-open):
+    its success closes the breaker, its failure opens it again. State is per
+    process, so every worker sheds load on its own.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                logger.warning(
+                    "Payment gateway circuit opened after %s failures", self.failures
+                )
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+
+class GatewayMetrics:
+    """In-process call counters and latency percentiles, per operation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(lambda: defaultdict(int))
+            self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def count(self, operation, name):
+        with self._lock:
+            self.counters[operation][name] += 1
+
+    def observe(self, operation, seconds):
+        with self._lock:
+            self.latencies[operation].append(seconds * 1000)
+
+    def snapshot(self):
+        """
+        `{operation: {"calls": .., "failures": .., "retries": .., "rejected": ..,
+        "p50_ms": .., "p95_ms": .., "p99_ms": ..}}`
+        """
+        with self._lock:
+            snapshot = {}
+            for operation in set(self.counters) | set(self.latencies):
+                stats = {
+                    name: self.counters[operation][name]
+                    for name in ("calls", "failures", "retries", "rejected")
+                }
+                samples = sorted(self.latencies[operation])
+                for percentile in (50, 95, 99):
+                    position = min(len(samples) - 1, len(samples) * percentile // 100)
+                    stats[f"p{percentile}_ms"] = samples[position] if samples else None
+                snapshot[operation] = stats
+            return snapshot
+
+
+class RazorpayGateway:
+    """
+    Razorpay API adapter for the request thread.
+
+    - Connections are reused from a pool of `RZP_POOL_SIZE` per host.
+    - Every call has an overall deadline of `RZP_DEADLINE` seconds, retries
+      included; each attempt connects within `RZP_CONNECT_TIMEOUT`.
+    - Transient failures are retried up to `RZP_MAX_ATTEMPTS` times, with
+      exponential backoff and full jitter; see `create_order` for how
+      non-idempotent calls are retried.
+    - A circuit breaker fails fast once the gateway keeps failing.
+    - Call counts and latencies are recorded in `metrics`.
+
+    Options default to the settings of the same name, read when first used.
+    """
+
+    def __init__(self, base_url=None, auth=None, **options):
+        self._base_url = base_url
+        self._auth = auth
+        self._options = options
+        self._client = None
+        self._breaker = None
+        self._lock = threading.Lock()
+        self.metrics = GatewayMetrics()
+
+    def option(self, name):
+        return self._options.get(name, getattr(settings, f"RZP_{name.upper()}"))
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.option("pool_size")
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._client = razorpay.Client(
+                    session=session,
+                    auth=self._auth or (settings.RZP_KEY_ID, settings.RZP_KEY_SECRET),
+                    base_url=self._base_url or settings.RZP_BASE_URL,
+                )
+            return self._client
+
+    @property
+    def breaker(self):
+        with self._lock:
+            if self._breaker is None:
+                self._breaker = CircuitBreaker(
+                    self.option("breaker_threshold"), self.option("breaker_cooldown")
+                )
+            return self._breaker
+
+    def call(self, operation, request):
+        """
+        Run `request(timeout)` under the deadline, retry and breaker policies.
+
+        Raises:
+            GatewayUnavailable: If the breaker is open, or every attempt failed
+                or the deadline passed.
+            razorpay.errors.BadRequestError: If the gateway rejected the request.
+        """
+        breaker = self.breaker
+        if not breaker.allow():
+            self.metrics.count(operation, "rejected")
+            raise GatewayUnavailable("The payment gateway is unavailable.")
+
+        self.metrics.count(operation, "calls")
+        start = time.monotonic()
+        deadline = start + self.option("deadline")
+        attempts = self.option("max_attempts")
+        try:
+            for attempt in range(attempts):
+                remaining = deadline - time.monotonic()
+                try:
+                    response = request(
+                        (min(self.option("connect_timeout"), remaining), remaining)
+                    )
+                except razorpay.errors.BadRequestError:
+                    breaker.record_success()
+                    raise
+                except TRANSIENT_ERRORS as error:
+                    ceiling = self.option("retry_backoff") * 2**attempt
+                    backoff = random.uniform(0, ceiling)
+                    if (
+                        attempt + 1 == attempts
+                        or time.monotonic() + backoff >= deadline
+                    ):
+                        self.metrics.count(operation, "failures")
+                        breaker.record_failure()
+                        logger.warning(
+                            "Payment gateway %s failed after %s attempts: %r",
+                            operation,
+                            attempt + 1,
+                            error,
+                        )
+                        raise GatewayUnavailable(
+                            "The payment gateway is unavailable."
+                        ) from error
+                    self.metrics.count(operation, "retries")
+                    time.sleep(backoff)
+                except Exception:
+                    self.metrics.count(operation, "failures")
+                    breaker.record_failure()
+                    raise
+                else:
+                    breaker.record_success()
+                    return response
+        finally:
+            self.metrics.observe(operation, time.monotonic() - start)
+
+    def create_order(self, amount, currency, receipt):
+        """
+        Create a Razorpay order for `amount` in the currency's smallest unit.
+
+        Creating is not idempotent. Once an attempt may have reached the gateway
+        (a read timeout, a dropped connection or a server error), the next one
+        first looks the order up by `receipt`, so a lost response never leaves
+        a duplicate order behind. Attempts that never connected are retried
+        as they are.
+        """
+        data = {"amount": amount, "currency": currency, "receipt": receipt}
+        sent = False
+
+        def request(timeout):
+            nonlocal sent
+            if sent:
+                orders = self.client.order.all(
+                    data={"receipt": receipt}, timeout=timeout
+                )
+                if orders["items"]:
+                    return orders["items"][0]
+            try:
+                return self.client.order.create(data=data, timeout=timeout)
+            except requests.RequestException as error:
+                sent = not never_sent(error)
+                raise
+            except TRANSIENT_ERRORS:
+                sent = True
+                raise
+
+        return self.call("order.create", request)
+
+
+razorpay_gateway = RazorpayGateway()
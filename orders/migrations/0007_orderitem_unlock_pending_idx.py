@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_keyset_pagination_indexes'),
+        ('orders', '0006_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(condition=models.Q(('instructor_earning__gt', 0), ('is_refunded', False), ('is_unlocked', False)), fields=['locked_until', 'id'], name='orderitem_unlock_pending_idx'),
+        ),
+    ]
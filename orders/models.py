@@ -5,6 +5,8 @@ from decimal import Decimal
 from django.db import models, IntegrityError
 from django.utils import timezone
 
+from courses.counters import adjust_counters
+
 
 class Payments(models.Model):
     """
@@ -154,6 +156,13 @@ class Order(models.Model):
     class Meta:
         verbose_name_plural = "Orders"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "status", "-created_at", "-id"],
+                name="order_user_status_created_idx",
+            ),
+            models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+        ]
 
 
 class OrderItem(models.Model):
@@ -188,8 +197,16 @@ class OrderItem(models.Model):
     - save(): Overrides save to apply all necessary actions before saving the object.
     - initiate_refund(): Handles the refund process, including wallet refunds and earning reversals.
     - unlock_instructor_earnings(): Unlocks instructor earnings if no refund was initiated after 14 days.
+
+    Matured items are unlocked in batches by `orders.utils.unlock_matured_earnings`,
+    backed by a partial index on `UNLOCK_PENDING`.
     """
 
+    # Items whose locked earnings still have to be released
+    UNLOCK_PENDING = models.Q(
+        is_refunded=False, is_unlocked=False, instructor_earning__gt=0
+    )
+
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     course = models.ForeignKey("courses.Course", on_delete=models.CASCADE)
     instructor = models.ForeignKey("accounts.User", on_delete=models.CASCADE)
@@ -261,6 +278,7 @@ class OrderItem(models.Model):
             self.instructor_earning = 0
             self.admin_earning = 0
             self.save()
+            adjust_counters("refund_count", [self.course_id])
 
     def unlock_instructor_earnings(self):
         """
@@ -268,8 +286,7 @@ class OrderItem(models.Model):
         """
 
         if not self.is_refunded and not self.is_unlocked and timezone.now() >= self.locked_until:
-            self.instructor.wallet.locked_balance -= self.instructor_earning
-            self.instructor.wallet.deposit(
+            self.instructor.wallet.unlock(
                 self.instructor_earning,
                 description=f"{self.course_title} purchased by {self.order.user}",
             )
@@ -282,3 +299,12 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name_plural = "Order Items"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["locked_until", "id"],
+                condition=models.Q(
+                    is_refunded=False, is_unlocked=False, instructor_earning__gt=0
+                ),
+                name="orderitem_unlock_pending_idx",
+            ),
+        ]
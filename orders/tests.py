@@ -1,3 +1,472 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import socket
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import razorpay
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.cache import get_cached_user
+from accounts.models import User
+from cart.models import Cart
+from courses.models import Course
+from orders.gateway import GatewayUnavailable, RazorpayGateway
+from orders.models import Order, OrderItem, Payments
+from orders.utils import unlock_matured_earnings
+from students.models import Enrollments
+from wallet.models import Wallet, WalletTransaction
+
+
+class VerifyOrderMixin:
+    """
+    Students, instructors and orders for payment verification tests.
+    """
+
+    url = "/order/razorpay/"
+
+    def setUp(self):
+        self.student = User.objects.create_user(
+            first_name="name",
+            last_name="sam",
+            email="student@example.com",
+            username="student",
+            password="student123",
+            role=User.STUDENT,
+        )
+        self.instructors = [
+            User.objects.create_user(
+                first_name="name",
+                last_name="sam",
+                email=f"instructor{index}@example.com",
+                username=f"instructor{index}",
+                password="instructor123",
+                role=User.INSTRUCTOR,
+            )
+            for index in range(2)
+        ]
+        self.token = str(RefreshToken.for_user(self.student).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def create_order(self, size, suffix=""):
+        """Create a pending order with `size` courses alternating instructors"""
+        courses = [
+            Course.objects.create(
+                title=f"Course {suffix}{index}",
+                subtitle="sample",
+                instructor=self.instructors[index % 2],
+                status=Course.CourseStatus.PUBLISHED,
+                price=Decimal("100.00"),
+            )
+            for index in range(size)
+        ]
+        Cart.objects.bulk_create(
+            [Cart(student=self.student, course=course) for course in courses]
+        )
+        payment = Payments.objects.create(
+            user=self.student,
+            payment_method="Razorpay",
+            amount=size * 100,
+            gateway_transaction_id=f"order_rzp{suffix}",
+        )
+        order = Order.objects.create(
+            user=self.student, total=size * 100, payment=payment
+        )
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    course=course,
+                    course_title=course.title,
+                    instructor=course.instructor,
+                    price=course.price,
+                )
+                for course in courses
+            ]
+        )
+        return order
+
+    def verify(self, order, client=None):
+        rzp_order_id = order.payment.gateway_transaction_id
+        signature = hmac.new(
+            settings.RZP_KEY_SECRET.encode(),
+            f"{rzp_order_id}|pay_1".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return (client or self.client).post(
+            self.url,
+            {
+                "razorpay_order_id": rzp_order_id,
+                "razorpay_payment_id": "pay_1",
+                "razorpay_signature": signature,
+                "order_id": order.id,
+            },
+        )
+
+
+
+class VerifyOrderTestCase(VerifyOrderMixin, APITestCase):
+    """
+    Test cases for payment verification and order fulfillment.
+    """
+
+    def test_verify_fulfills_order(self):
+        """Verification enrolls the student, clears the cart and credits instructors"""
+        order = self.create_order(3)
+
+        response = self.verify(order)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.OrderStatus.COMPLETED)
+        self.assertEqual(Enrollments.objects.filter(student=self.student).count(), 3)
+        self.assertFalse(Cart.objects.filter(student=self.student).exists())
+        self.assertTrue(
+            all(item.instructor_earning == Decimal("50.00") for item in order.items.all())
+        )
+
+        first, second = (instructor.wallet for instructor in self.instructors)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.locked_balance, Decimal("100.00"))
+        self.assertEqual(second.locked_balance, Decimal("50.00"))
+        self.assertEqual(WalletTransaction.objects.filter(order=order).count(), 3)
+
+    def test_verify_query_count_is_independent_of_order_size(self):
+        """Fulfillment issues the same number of queries for small and large orders"""
+        small = self.create_order(2, "a")
+        get_cached_user(self.student.id)
+        with CaptureQueriesContext(connection) as small_queries:
+            self.verify(small)
+
+        # Created after the first checkout so each cart holds its own order
+        large = self.create_order(10, "b")
+        with CaptureQueriesContext(connection) as large_queries:
+            self.verify(large)
+
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_verify_is_idempotent(self):
+        """Verifying a completed order again does not fulfill it twice"""
+        order = self.create_order(2)
+        self.verify(order)
+
+        response = self.verify(order)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Order already verified")
+        self.assertEqual(Enrollments.objects.filter(student=self.student).count(), 2)
+        self.assertEqual(WalletTransaction.objects.filter(order=order).count(), 2)
+
+
+class ConcurrentVerifyOrderTestCase(VerifyOrderMixin, APITransactionTestCase):
+    """
+    Concurrent verifications of one order, each on its own database connection.
+    """
+
+    def test_parallel_verifies_fulfill_once(self):
+        """20 simultaneous verifies of one order fulfill it once, without errors"""
+        cache.clear()
+        order = self.create_order(3)
+        barrier = threading.Barrier(20)
+        results = []
+
+        def verify():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+            try:
+                barrier.wait()
+                start = time.perf_counter()
+                response = self.verify(order, client)
+                results.append((response, time.perf_counter() - start))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=verify) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 20)
+        self.assertTrue(
+            all(response.status_code == status.HTTP_200_OK for response, _ in results)
+        )
+        messages = [response.data["message"] for response, _ in results]
+        self.assertEqual(messages.count("Payment verified successfully"), 1)
+        self.assertLess(max(elapsed for _, elapsed in results), 10)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.OrderStatus.COMPLETED)
+        self.assertEqual(Enrollments.objects.filter(student=self.student).count(), 3)
+        self.assertEqual(WalletTransaction.objects.filter(order=order).count(), 3)
+        first, second = (instructor.wallet for instructor in self.instructors)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.locked_balance, Decimal("100.00"))
+        self.assertEqual(second.locked_balance, Decimal("50.00"))
+
+
+class UnlockEarningsTestCase(TestCase):
+    """
+    Test cases for the batched instructor earnings unlock.
+    """
+
+    def setUp(self):
+        self.student = User.objects.create_user(
+            first_name="name",
+            last_name="sam",
+            email="student@example.com",
+            username="student",
+            password="student123",
+        )
+        self.instructor = User.objects.create_user(
+            first_name="name",
+            last_name="sam",
+            email="instructor@example.com",
+            username="instructor",
+            password="instructor123",
+            role=User.INSTRUCTOR,
+        )
+        Wallet.objects.filter(user=self.instructor).update(
+            locked_balance=Decimal("250.00")
+        )
+        self.order = Order.objects.create(
+            user=self.student, total=500, status=Order.OrderStatus.COMPLETED
+        )
+        past = timezone.now() - timedelta(days=1)
+        future = timezone.now() + timedelta(days=1)
+        self.matured = [self.create_item(index, past) for index in range(3)]
+        self.refunded = self.create_item(3, past, is_refunded=True)
+        self.locked = self.create_item(4, future)
+
+    def create_item(self, index, locked_until, **kwargs):
+        course = Course.objects.create(
+            title=f"Course {index}", subtitle="sample", instructor=self.instructor
+        )
+        return OrderItem.objects.create(
+            order=self.order,
+            course=course,
+            course_title=course.title,
+            instructor=self.instructor,
+            price=Decimal("100.00"),
+            locked_until=locked_until,
+            **kwargs,
+        )
+
+    def test_unlock_moves_matured_earnings_in_batches(self):
+        """Only matured, non refunded items are unlocked, across several batches"""
+        self.assertEqual(unlock_matured_earnings(batch_size=2), 3)
+
+        wallet = Wallet.objects.get(user=self.instructor)
+        self.assertEqual(wallet.balance, Decimal("150.00"))
+        self.assertEqual(wallet.locked_balance, Decimal("100.00"))
+        self.assertEqual(
+            set(OrderItem.objects.filter(is_unlocked=True)), set(self.matured)
+        )
+        self.assertEqual(
+            WalletTransaction.objects.filter(
+                wallet=wallet, description__endswith="purchased by student@example.com"
+            ).count(),
+            3,
+        )
+
+    def test_unlock_is_idempotent(self):
+        """A second run finds nothing left to unlock"""
+        unlock_matured_earnings()
+        self.assertEqual(unlock_matured_earnings(), 0)
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    """
+    Answers with the next scripted `(status, delay)` of the server, or 200.
+
+    Orders are created for 200s, and for scripted `(status, delay, True)`
+    failures that lose the response of a created order; `GET /v1/orders`
+    filters them by receipt.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        receipt = parse_qs(urlparse(self.path).query).get("receipt", [None])[0]
+        with server.lock:
+            server.requests += 1
+            items = [order for order in server.orders if order["receipt"] == receipt]
+        self.respond(200, {"entity": "collection", "count": len(items), "items": items})
+
+    def do_POST(self):
+        data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            status_code, delay, *rest = (
+                server.script.pop(0) if server.script else (200, 0)
+            )
+            created = rest[0] if rest else status_code == 200
+            if created:
+                order = {
+                    "id": f"order_fake{len(server.orders) + 1}",
+                    "receipt": data["receipt"],
+                    "status": "created",
+                }
+                server.orders.append(order)
+        time.sleep(delay)
+        if status_code == 200:
+            body = order
+        else:
+            code = "BAD_REQUEST_ERROR" if status_code == 400 else "SERVER_ERROR"
+            body = {"error": {"code": code, "description": "Scripted failure"}}
+        self.respond(status_code, body)
+
+    def respond(self, status_code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class RazorpayGatewayTestCase(SimpleTestCase):
+    """
+    Test cases for the Razorpay adapter, against a local fake gateway server.
+    """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGatewayHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.connections = set()
+        self.server.script = []
+        self.server.orders = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def gateway(self, base_url=None, **options):
+        options = {
+            "deadline": 2.0,
+            "max_attempts": 3,
+            "retry_backoff": 0.01,
+            "breaker_threshold": 5,
+            "breaker_cooldown": 30.0,
+            **options,
+        }
+        host, port = self.server.server_address
+        return RazorpayGateway(
+            base_url=base_url or f"http://{host}:{port}",
+            auth=("key", "secret"),
+            **options,
+        )
+
+    def test_calls_reuse_pooled_connections(self):
+        """Successive calls share one keep-alive connection and are measured"""
+        gateway = self.gateway()
+        for index in range(5):
+            order = gateway.create_order(1000, "INR", f"RZP-{index}")
+            self.assertTrue(order["id"].startswith("order_fake"))
+
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(len(self.server.connections), 1)
+        metrics = gateway.metrics.snapshot()["order.create"]
+        self.assertEqual(metrics["calls"], 5)
+        self.assertEqual(metrics["failures"], 0)
+        self.assertIsNotNone(metrics["p99_ms"])
+
+    def test_transient_failures_are_retried(self):
+        """Server errors are retried with backoff until an attempt succeeds"""
+        self.server.script = [(500, 0), (500, 0)]
+        gateway = self.gateway()
+
+        order = gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(order["id"], "order_fake1")
+        self.assertEqual(gateway.metrics.snapshot()["order.create"]["retries"], 2)
+
+    def test_lost_responses_do_not_duplicate_orders(self):
+        """A retry returns the order an earlier failed attempt created"""
+        self.server.script = [(500, 0, True)]
+        gateway = self.gateway()
+
+        order = gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(order["id"], "order_fake1")
+        self.assertEqual(len(self.server.orders), 1)
+        # The failed create, then the lookup that found its order
+        self.assertEqual(self.server.requests, 2)
+
+    def test_refused_connections_are_retried(self):
+        """Attempts that never connected are retried without a lookup"""
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            host, port = unused.getsockname()
+        gateway = self.gateway(base_url=f"http://{host}:{port}")
+
+        with mock.patch.object(
+            gateway.client.order, "all", side_effect=AssertionError
+        ), self.assertRaises(GatewayUnavailable):
+            gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(gateway.metrics.snapshot()["order.create"]["retries"], 2)
+
+    def test_rejected_requests_are_not_retried(self):
+        """Client errors reach the caller at once and keep the breaker closed"""
+        self.server.script = [(400, 0)]
+        gateway = self.gateway(breaker_threshold=1)
+
+        with self.assertRaises(razorpay.errors.BadRequestError):
+            gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(gateway.breaker.state, "closed")
+
+    def test_slow_gateway_is_cut_at_the_deadline(self):
+        """A hanging gateway fails the call once its deadline is spent"""
+        self.server.script = [(200, 2)] * 3
+        gateway = self.gateway(deadline=0.3)
+
+        start = time.monotonic()
+        with self.assertRaises(GatewayUnavailable):
+            gateway.create_order(1000, "INR", "RZP-1")
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_breaker_fails_fast_then_recovers(self):
+        """An open breaker sheds calls without reaching the gateway"""
+        self.server.script = [(500, 0)] * 2
+        gateway = self.gateway(
+            max_attempts=1, breaker_threshold=2, breaker_cooldown=0.2
+        )
+
+        for _ in range(2):
+            with self.assertRaises(GatewayUnavailable):
+                gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(gateway.breaker.state, "open")
+
+        with self.assertRaises(GatewayUnavailable):
+            gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(gateway.metrics.snapshot()["order.create"]["rejected"], 1)
+
+        # After the cooldown a trial call goes through and closes the breaker
+        time.sleep(0.2)
+        gateway.create_order(1000, "INR", "RZP-1")
+        self.assertEqual(gateway.breaker.state, "closed")
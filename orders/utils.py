@@ -1,11 +1,15 @@
-from decimal import Decimal
-
-from django.db.models import F, Sum 
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from cart import store as cart_store
+from cart.cache import invalidate_cart
 from cart.models import Cart
-from .models import Order, OrderItem
+from .models import Order, OrderItem, Payments
 from courses.models import Course
+from students.models import Enrollments
+from wallet.models import Wallet
 from skillexa.settings import RZP_KEY_SECRET
 import hmac
 import hashlib
@@ -14,16 +18,20 @@ import hashlib
 
 
 def create_order(request):
+    if cart_store.enabled():
+        # Write pending cart changes behind first, so the order sees the cart as shown
+        cart_store.persist(request.user.id)
+
     cart_items = Cart.objects.select_related("course").filter(
         student=request.user, course__status=Course.CourseStatus.PUBLISHED
     )
-    if not cart_items.exists():
+    summary = cart_items.summary()
+    if not summary["count"]:
         raise ValidationError("Your Cart is Empty")
 
-    total = cart_items.aggregate(total=Sum(F("course__price")))["total"] or Decimal("0.00") 
     order = Order.objects.create(
         user = request.user,
-        total = total, 
+        total = summary["subtotal"], 
         status = Order.OrderStatus.PENDING,
     )
 
@@ -32,7 +40,7 @@ def create_order(request):
             order=order, 
             course=item.course,
             course_title=item.course.title,
-            instructor=item.course.instructor,
+            instructor_id=item.course.instructor_id,
             price=item.course.price,
         ) 
         for item in cart_items
@@ -44,6 +52,133 @@ def create_order(request):
     return order
 
 
+def fulfill_order(order, payment, student, gateway_response=None):
+    """
+    Complete a paid order with a constant number of queries, whatever the cart size.
+
+    Runs in a single transaction:
+    - locks the order row, so concurrent verifications of the same order run
+      one after the other, and leaves if the order is already completed
+    - marks the payment and the order as completed
+    - computes earnings and lock periods for every item and saves them with one bulk update
+    - enrolls the student in every course with one bulk insert
+    - clears the student's cart
+    - bumps the enrollment and cart counters of the courses with one `F()` update each
+    - credits each instructor's locked balance once, logging all credits in one batched insert
+
+    Returns:
+        Order: The order, or `None` if it had already been fulfilled.
+    """
+    with transaction.atomic():
+        locked = Order.objects.select_for_update().only("status").get(pk=order.pk)
+        if locked.status == Order.OrderStatus.COMPLETED:
+            return None
+
+        payment.gateway_response = gateway_response
+        payment.status = Payments.PaymentStatus.COMPLETED
+        payment.save()
+
+        order.payment = payment
+        order.status = Order.OrderStatus.COMPLETED
+        order.save()
+
+        now = timezone.now()
+        items = list(order.items.all())
+        for item in items:
+            item.calculate_earnings()
+            item.apply_lock_period()
+            item.updated_at = now
+        OrderItem.objects.bulk_update(
+            items, ["instructor_earning", "admin_earning", "locked_until", "updated_at"]
+        )
+
+        Enrollments.objects.bulk_create(
+            [Enrollments(student=student, course_id=item.course_id) for item in items]
+        )
+
+        Cart.objects.filter(student=student).delete()
+        invalidate_cart(student.id)
+        if cart_store.enabled():
+            transaction.on_commit(lambda: cart_store.forget(student.id))
+
+        Wallet.bulk_deposit_locked(
+            [
+                (
+                    item.instructor_id,
+                    item.instructor_earning,
+                    f"Earnings from {item.course_title} course",
+                )
+                for item in items
+                if item.instructor_earning > 0
+            ],
+            order=order,
+        )
+    return order
+
+
+UNLOCK_BATCH_SIZE = 1000
+
+
+def unlock_matured_earnings(batch_size=UNLOCK_BATCH_SIZE, now=None):
+    """
+    Release instructor earnings whose 14-day lock has expired.
+
+    Items are processed in `(locked_until, id)` keyset order, one short
+    transaction per batch:
+    - the batch is row-locked (skipping rows held by another worker)
+    - locked balances move to available balances with one `F()` update for all instructors
+    - ledger rows are written with one bulk insert
+    - the batch is flagged as unlocked with one update
+
+    Returns:
+        int: Number of items unlocked.
+    """
+    now = now or timezone.now()
+    pending = OrderItem.objects.filter(
+        OrderItem.UNLOCK_PENDING, locked_until__lte=now
+    ).order_by("locked_until", "id")
+
+    unlocked = 0
+    last_key = None
+    while True:
+        with transaction.atomic():
+            batch = pending
+            if last_key:
+                batch = batch.filter(
+                    Q(locked_until__gt=last_key[0])
+                    | Q(locked_until=last_key[0], id__gt=last_key[1])
+                )
+            items = list(
+                batch.select_for_update(skip_locked=True, of=("self",)).values(
+                    "id",
+                    "locked_until",
+                    "instructor_id",
+                    "instructor_earning",
+                    "course_title",
+                    "order__user__email",
+                )[:batch_size]
+            )
+            if not items:
+                return unlocked
+
+            Wallet.bulk_unlock(
+                [
+                    (
+                        item["instructor_id"],
+                        item["instructor_earning"],
+                        f"{item['course_title']} purchased by {item['order__user__email']}",
+                    )
+                    for item in items
+                ]
+            )
+            OrderItem.objects.filter(id__in=[item["id"] for item in items]).update(
+                is_unlocked=True, updated_at=timezone.now()
+            )
+
+        unlocked += len(items)
+        last_key = (items[-1]["locked_until"], items[-1]["id"])
+
+
 def verify_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
     # Use the key_secret from your Razorpay account
     key_secret = RZP_KEY_SECRET
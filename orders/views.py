@@ -1,21 +1,25 @@
 import razorpay
-from skillexa.settings import RZP_KEY_ID, RZP_KEY_SECRET
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
-from .utils import create_order, verify_signature
+from .gateway import GatewayUnavailable, razorpay_gateway
+from .utils import create_order, fulfill_order, verify_signature
 from rest_framework.exceptions import ValidationError
 from .models import Payments, Order
-from cart.models import Cart
 from students.permissions import IsStudent
 from .serializers import CreateOrderSerializer, OrderSerializer, StudentOrderHistorySerializer, AdminOrderHistorySerializer
-from students.models import Enrollments
 from rest_framework import generics, permissions
+from skillexa.pagination import KeysetPagination
+from skillexa.query_budget import QueryBudgetMixin
 
-client = razorpay.Client(auth=(RZP_KEY_ID, RZP_KEY_SECRET))
+VERIFIED_KEY = "order:{id}:verified"
 
-class CreateOrderView(APIView):
+class CreateOrderView(QueryBudgetMixin, APIView):
     permission_classes = [IsStudent]
+    query_budget = 12
 
     def post(self, request):
         serializer = CreateOrderSerializer(data=request.data)
@@ -36,13 +40,10 @@ class CreateOrderView(APIView):
 
         if payment_method == "razorpay":
             amount = int(order.total * 100) # amount in paisa
-            data = {
-                "amount": amount,
-                "currency": "INR",
-                "receipt": f"RZP-{order.order_number}",
-            }
             try:
-                razorpay_order = client.order.create(data=data)
+                razorpay_order = razorpay_gateway.create_order(
+                    amount, "INR", f"RZP-{order.order_number}"
+                )
                 rzp_order_id = razorpay_order["id"]
 
                 payment = Payments.objects.create(
@@ -55,15 +56,22 @@ class CreateOrderView(APIView):
                 order.payment = payment 
                 order.save()
 
+                prefetch_related_objects([order], "items__instructor")
                 serialized_order = OrderSerializer(order)
                 return Response(serialized_order.data, status=status.HTTP_201_CREATED)
             except razorpay.errors.BadRequestError as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except GatewayUnavailable as e:
+                return Response(
+                    {"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             
         return Response({"error": "order creation failed"}, status=status.HTTP_400_BAD_REQUEST)
         
 
-class VerifyOrderView(APIView):
+class VerifyOrderView(QueryBudgetMixin, APIView):
+     query_budget = 18
+
      def post(self, request):
         data = request.data 
         razorpay_order_id = data.get("razorpay_order_id")
@@ -78,6 +86,11 @@ class VerifyOrderView(APIView):
         if not verify_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
             return Response({"error": "Invalid signature"}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Retries of a verified order are answered from the cache
+        verified_key = VERIFIED_KEY.format(id=order_id)
+        if cache.get(verified_key):
+            return Response({"message": "Order already verified"}, status=status.HTTP_200_OK)
+
         try:
             order = Order.objects.get(id=order_id)
         except Order.DoesNotExist:
@@ -85,6 +98,7 @@ class VerifyOrderView(APIView):
 
         # Check if already completed
         if order.status == Order.OrderStatus.COMPLETED:
+            cache.set(verified_key, True, timeout=settings.ORDER_VERIFIED_CACHE_TIMEOUT)
             return Response({"message": "Order already verified"}, status=status.HTTP_200_OK)
 
         try:
@@ -92,39 +106,24 @@ class VerifyOrderView(APIView):
         except Payments.DoesNotExist:
             return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Update payment and order status
-        payment.gateway_response = data
-        payment.status = Payments.PaymentStatus.COMPLETED
-        payment.save()
-
-        order.payment = payment 
-        order.status = Order.OrderStatus.COMPLETED
-        order.save()
-
-        # Re-trigger save logic for each order item (earnings etc) and save the enrolled courses
-        for item in order.items.all():
-            Enrollments.objects.create(
-                student=request.user,
-                course=item.course,
-            )
-            item.save()
-
-        # Clear the cart after successful payment
-        Cart.objects.filter(student=request.user).delete()
-        
-        # Add the earnings to the instructor's account
-        for item in order.items.all():
-            item.instructor.wallet.deposit_locked(item.instructor_earning, description=f"Earnings from {item.course.title} course", order=order)
-        
-        
+        # Complete the payment and order, enroll the student, clear the cart
+        # and credit the instructors in a single transaction. Concurrent
+        # duplicates wait on the order's row lock and find it completed.
+        fulfilled = fulfill_order(order, payment, student=request.user, gateway_response=data)
+        cache.set(verified_key, True, timeout=settings.ORDER_VERIFIED_CACHE_TIMEOUT)
+        if fulfilled is None:
+            return Response({"message": "Order already verified"}, status=status.HTTP_200_OK)
+
         return Response({"message": "Payment verified successfully"}, status=status.HTTP_200_OK)
      
 
 
 
-class StudentOrderHistoryView(generics.ListAPIView):
+class StudentOrderHistoryView(QueryBudgetMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = StudentOrderHistorySerializer
+    pagination_class = KeysetPagination
+    query_budget = 7
 
     def get_queryset(self):
         return (
@@ -138,9 +137,11 @@ class StudentOrderHistoryView(generics.ListAPIView):
 
 
 
-class AdminOrderHistoryView(generics.ListAPIView):
+class AdminOrderHistoryView(QueryBudgetMixin, generics.ListAPIView):
     serializer_class = AdminOrderHistorySerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
+    query_budget = 8
 
     def get_queryset(self):
         return Order.objects.exclude(status=Order.OrderStatus.PENDING).select_related("user", "payment").prefetch_related("items", "items__course", "items__instructor")
\ No newline at end of file
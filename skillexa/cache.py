@@ -0,0 +1,13 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared_cache(alias="default"):
+    """
+    Whether every process sees the same cache `alias`.
+
+    Process-local backends give each gunicorn and Celery worker its own copy,
+    so invalidations and locks never reach the other processes.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
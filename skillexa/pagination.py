@@ -0,0 +1,59 @@
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over `(created_at, id)`.
+
+    - Pages are fetched with `WHERE created_at < <position>` against a composite
+      index instead of `OFFSET`, and no `COUNT(*)` is issued, so deep pages cost
+      the same as the first one.
+    - Views may override the key with a `cursor_ordering` attribute
+      (e.g. `("-date_joined", "-id")` for users).
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        """Always paginate on the indexed key, regardless of `?ordering=`."""
+        return tuple(getattr(view, "cursor_ordering", self.ordering))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Page number pagination by default, keyset pagination on request.
+
+    Clients opt into the cursor mode with `?pagination=cursor` and then follow
+    the `next` / `previous` links (which carry `?cursor=`). Existing page number
+    clients keep receiving `count` and `?page=` links.
+    """
+
+    mode_query_param = "pagination"
+    cursor_query_param = CreatedAtCursorPagination.cursor_query_param
+
+    def get_paginator(self, request):
+        if (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_query_param in request.query_params
+        ):
+            return CreatedAtCursorPagination()
+        return PageNumberPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return PageNumberPagination().get_schema_operation_parameters(view)
@@ -0,0 +1,144 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+NUMBER = re.compile(r"\b\d+\b")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request runs more queries than its budget."""
+
+
+def fingerprint(sql):
+    """
+    Normalise a SQL statement so that repetitions of the same query with
+    different parameters (the signature of an N+1) compare equal.
+    """
+    return NUMBER.sub("?", IN_LIST.sub("IN (...)", sql))
+
+
+class QueryRecorder:
+    """
+    Context manager recording the SQL statements run on the default connection.
+
+    Works regardless of `DEBUG`, as it hooks `connection.execute_wrapper`
+    instead of reading `connection.queries`.
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def duplicates(self):
+        """Fingerprints run more than once, with how often they ran."""
+        counts = Counter(fingerprint(sql) for sql in self.statements)
+        return {sql: times for sql, times in counts.items() if times > 1}
+
+    def report(self):
+        lines = [f"{self.count} queries"]
+        for sql, times in sorted(self.duplicates.items(), key=lambda item: -item[1]):
+            lines.append(f"  {times}x {sql}")
+        return "\n".join(lines)
+
+
+def check_budget(recorder, budget, label):
+    """
+    Compare a recording with its budget.
+
+    Raises `QueryBudgetExceeded` when `QUERY_BUDGET_STRICT` is on (tests and
+    development), otherwise logs a warning so production traffic is unaffected.
+    """
+    if budget is None or recorder.count <= budget:
+        return
+    message = f"{label} exceeded its query budget of {budget}: {recorder.report()}"
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def query_budget(budget):
+    """
+    Declare the query budget of a single view handler or viewset action.
+
+    Only takes effect on views using `QueryBudgetMixin`.
+    """
+
+    def decorator(handler):
+        handler.query_budget = budget
+        return handler
+
+    return decorator
+
+
+class QueryBudgetMixin:
+    """
+    Record the queries of every request and enforce the view's query budget.
+
+    Set `query_budget` to a number, or to a dict keyed by viewset action or
+    lowercase HTTP method, or decorate handlers with `query_budget()`.
+    Authentication and throttling are part of the request and count towards
+    the budget.
+    """
+
+    query_budget = None
+
+    def dispatch(self, request, *args, **kwargs):
+        with QueryRecorder() as recorder:
+            response = super().dispatch(request, *args, **kwargs)
+        response.query_recorder = recorder
+        check_budget(
+            recorder,
+            self.get_query_budget(request),
+            f"{self.__class__.__name__} {request.method} {request.path}",
+        )
+        return response
+
+    def get_query_budget(self, request):
+        name = getattr(self, "action", None) or request.method.lower()
+        handler = getattr(self, name, None)
+        if hasattr(handler, "query_budget"):
+            return handler.query_budget
+        if isinstance(self.query_budget, dict):
+            return self.query_budget.get(name)
+        return self.query_budget
+
+
+@contextmanager
+def assert_query_budget(budget, allow_duplicates=False):
+    """
+    Test helper failing when the wrapped block runs more than `budget` queries
+    or, unless `allow_duplicates` is set, repeats a query fingerprint.
+
+        with assert_query_budget(4):
+            client.get("/course/courses/")
+    """
+    with QueryRecorder() as recorder:
+        yield recorder
+    assert recorder.count <= budget, (
+        f"Expected at most {budget} queries: {recorder.report()}"
+    )
+    if not allow_duplicates:
+        assert not recorder.duplicates, f"Duplicate queries: {recorder.report()}"
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_celery_beat',
 
     'rest_framework',
@@ -158,8 +160,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'accounts.throttles.AnonCounterThrottle',
+        'accounts.throttles.UserCounterThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '200/day',
@@ -197,6 +199,111 @@ CORS_ALLOWS_CREDENTIALS = True
 CELERY_BROKER_URL = config("CELERY_BROKER_URL")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+# Periodic tasks; run `celery -A skillexa beat` alongside the workers.
+CELERY_BEAT_SCHEDULE = {
+    "settle-wallet-credits": {
+        "task": "wallet.tasks.settle_wallet_credits_task",
+        "schedule": timedelta(minutes=1),
+    },
+    "build-search-words": {
+        "task": "courses.tasks.build_search_words_task",
+        "schedule": timedelta(hours=1),
+    },
+    "build-recommendations": {
+        "task": "courses.tasks.build_recommendations_task",
+        "schedule": timedelta(hours=6),
+    },
+    "rebuild-similarity-index": {
+        "task": "courses.tasks.rebuild_similarity_index_task",
+        "schedule": timedelta(days=1),
+    },
+}
+
+
+
+# Wallet credits
+# Append credits to a pending ledger instead of updating the wallet row in place.
+# Pending credits are folded by `wallet.tasks.settle_wallet_credits_task`.
+WALLET_LEDGER_CREDITS = config("WALLET_LEDGER_CREDITS", default=False, cast=bool)
+
+
+
+# Cache configuration
+# Point CACHE_URL at Redis in production so that every process shares the cache.
+CACHE_URL = config("CACHE_URL", default="")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+        if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+# Authenticated user resolution (`accounts.cache`)
+# Needs a cache shared by every process, so it is off unless CACHE_URL is set.
+AUTH_USER_CACHE = config("AUTH_USER_CACHE", default=bool(CACHE_URL), cast=bool)
+AUTH_USER_CACHE_SIZE = config("AUTH_USER_CACHE_SIZE", default=10000, cast=int)
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=300, cast=int)
+
+# Cached catalog responses (`courses.cache`)
+CATALOG_CACHE_TIMEOUT = config("CATALOG_CACHE_TIMEOUT", default=300, cast=int)
+
+# "Also bought" recommendations (`courses.recommendations`)
+# Rebuilt every 6 hours by `courses.tasks.build_recommendations_task`.
+RECOMMENDATIONS_TOP_K = config("RECOMMENDATIONS_TOP_K", default=20, cast=int)
+RECOMMENDATIONS_MAX_BASKET = config("RECOMMENDATIONS_MAX_BASKET", default=500, cast=int)
+RECOMMENDATIONS_MIN_SUPPORT = config("RECOMMENDATIONS_MIN_SUPPORT", default=2, cast=int)
+
+# Similar courses index (`courses.similarity`)
+# Every web and worker process must see the same directory. Writers lock it
+# with fcntl, so multi-host deployments need a shared filesystem with working
+# POSIX locks (e.g. NFSv4). Set a persistent path in production; the default
+# lives in the temporary directory, outside the source tree. Build the index
+# of an existing catalog with `python manage.py build_similarity_index`; it is
+# also rebuilt daily, which recounts the document frequencies.
+SIMILARITY_INDEX_DIR = config(
+    "SIMILARITY_INDEX_DIR",
+    default=str(Path(tempfile.gettempdir()) / "skillexa" / "similarity"),
+)
+SIMILARITY_DIMENSIONS = config("SIMILARITY_DIMENSIONS", default=256, cast=int)
+
+# In-process autocomplete index (`courses.autocomplete`)
+# Rebuilt when the catalog version changes, at most once per interval (seconds).
+# Rebuilds run in a background thread while the previous index keeps serving.
+AUTOCOMPLETE_REBUILD_INTERVAL = config("AUTOCOMPLETE_REBUILD_INTERVAL", default=60, cast=int)
+AUTOCOMPLETE_BACKGROUND_REBUILD = config("AUTOCOMPLETE_BACKGROUND_REBUILD", default=True, cast=bool)
+AUTOCOMPLETE_MAX_COURSES = config("AUTOCOMPLETE_MAX_COURSES", default=200_000, cast=int)
+AUTOCOMPLETE_MAX_WORDS = config("AUTOCOMPLETE_MAX_WORDS", default=6, cast=int)
+AUTOCOMPLETE_KEY_LENGTH = config("AUTOCOMPLETE_KEY_LENGTH", default=32, cast=int)
+
+# Typo tolerant search (`courses.search.fuzzy_search_courses`)
+# Minimum pg_trgm similarity between a term word and a title word, or the term and a topic.
+FUZZY_SEARCH_THRESHOLD = config("FUZZY_SEARCH_THRESHOLD", default=0.25, cast=float)
+FUZZY_SEARCH_MAX_RESULTS = config("FUZZY_SEARCH_MAX_RESULTS", default=200, cast=int)
+
+# Bulk add to cart and wishlist (`cart.serializers.BulkAddSerializer`)
+CART_BULK_ADD_MAX_COURSES = config("CART_BULK_ADD_MAX_COURSES", default=50, cast=int)
+
+# Cache-backed cart store (`cart.store`)
+# Carts are served from the shared cache and written behind to the database by
+# `cart.tasks.persist_cart_task`. Requires a cache shared by every process.
+CART_STORE = config("CART_STORE", default=False, cast=bool)
+CART_STORE_TIMEOUT = config("CART_STORE_TIMEOUT", default=86400, cast=int)
+CART_STORE_LOCK_TIMEOUT = config("CART_STORE_LOCK_TIMEOUT", default=5, cast=int)
+
+# Cached cart summaries (`cart.cache`)
+CART_SUMMARY_CACHE_TIMEOUT = config("CART_SUMMARY_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Payment verification
+# Verified orders are remembered so client retries skip the database entirely.
+ORDER_VERIFIED_CACHE_TIMEOUT = config("ORDER_VERIFIED_CACHE_TIMEOUT", default=86400, cast=int)
+
+# Per request query budgets (`skillexa.query_budget`)
+# Strict mode raises when a view exceeds its budget; otherwise a warning is logged.
+QUERY_BUDGET_STRICT = config("QUERY_BUDGET_STRICT", default=DEBUG, cast=bool)
 
 
 
@@ -215,4 +322,17 @@ GOOGLE_CLIENT_SECRET=config("GOOGLE_CLIENT_SECRET")
 
 # Razorpay
 RZP_KEY_ID = config("RZP_KEY_ID")
-RZP_KEY_SECRET = config("RZP_KEY_SECRET")
\ No newline at end of file
+RZP_KEY_SECRET = config("RZP_KEY_SECRET")
+
+# Razorpay API adapter (`orders.gateway`)
+# Each call, retries included, must finish within RZP_DEADLINE seconds. The
+# circuit breaker opens after RZP_BREAKER_THRESHOLD consecutive failures and
+# fails fast for RZP_BREAKER_COOLDOWN seconds.
+RZP_BASE_URL = config("RZP_BASE_URL", default="https://api.razorpay.com")
+RZP_POOL_SIZE = config("RZP_POOL_SIZE", default=10, cast=int)
+RZP_CONNECT_TIMEOUT = config("RZP_CONNECT_TIMEOUT", default=2.0, cast=float)
+RZP_DEADLINE = config("RZP_DEADLINE", default=8.0, cast=float)
+RZP_MAX_ATTEMPTS = config("RZP_MAX_ATTEMPTS", default=3, cast=int)
+RZP_RETRY_BACKOFF = config("RZP_RETRY_BACKOFF", default=0.2, cast=float)
+RZP_BREAKER_THRESHOLD = config("RZP_BREAKER_THRESHOLD", default=5, cast=int)
+RZP_BREAKER_COOLDOWN = config("RZP_BREAKER_COOLDOWN", default=30.0, cast=float)
\ No newline at end of file
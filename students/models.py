@@ -1,7 +1,11 @@
 from django.db import models
 
+from courses.counters import CourseCountedModel
+
 # Create your models here.
-class Enrollments(models.Model):
+class Enrollments(CourseCountedModel):
+    counter_field = "enrollment_count"
+
     student = models.ForeignKey("accounts.User", on_delete=models.CASCADE)
     course = models.ForeignKey("courses.Course", on_delete=models.PROTECT)
     enrolled_at = models.DateTimeField(auto_now_add=True)
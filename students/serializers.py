@@ -1,6 +1,7 @@
 from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 
+from accounts.cache import invalidate_user
 from accounts.models import OtpVerification
 
 from .models import Enrollments
@@ -40,6 +41,7 @@ class StudentResetPasswordSerializer(serializers.Serializer):
         user = self.validated_data["user"]
         user.password = make_password(self.validated_data["new_password"])
         user.save()
+        invalidate_user(user.id)
 
         OtpVerification.objects.filter(user=user, purpose="password_reset").delete()
 
@@ -56,7 +58,7 @@ class EnrolledCourseSerializer(serializers.ModelSerializer):
     course_level = serializers.CharField(source="course.get_level_display", read_only=True)
     topic_name = serializers.CharField(source="course.topic.name", read_only=True)
     instructor_name = serializers.CharField(
-        source="instructor.full_name", read_only=True
+        source="course.instructor.full_name", read_only=True
     )
 
     class Meta:
@@ -6,6 +6,7 @@ from rest_framework.views import APIView
 from accounts.models import OtpVerification
 from accounts.tasks import send_email
 from accounts.throttles import OTPRequestThrottle
+from skillexa.query_budget import QueryBudgetMixin
 
 from .permissions import IsStudent
 from .serializers import StudentResetPasswordSerializer
@@ -14,11 +15,12 @@ from .models import Enrollments
 from .serializers import EnrolledCourseSerializer
 
 
-class StudentResetPasswordOTPView(APIView):
+class StudentResetPasswordOTPView(QueryBudgetMixin, APIView):
     """API for Instructors to request OTP for password reset"""
 
     permission_classes = (IsAuthenticated, IsStudent)
     throttle_classes = (OTPRequestThrottle,)
+    query_budget = 5
 
     def post(self, request):
         user = request.user
@@ -36,11 +38,12 @@ class StudentResetPasswordOTPView(APIView):
         )
 
 
-class StudentResetPasswordView(generics.GenericAPIView):
+class StudentResetPasswordView(QueryBudgetMixin, generics.GenericAPIView):
     """Reset Password API view for authenticated Instructors"""
 
     permission_classes = [IsAuthenticated, IsStudent]
     serializer_class = StudentResetPasswordSerializer
+    query_budget = 7
 
     def post(self, request):
         serializer = self.get_serializer(
@@ -56,11 +59,14 @@ class StudentResetPasswordView(generics.GenericAPIView):
 
 
 
-class EnrolledCoursesView(APIView):
+class EnrolledCoursesView(QueryBudgetMixin, APIView):
     permission_classes = [IsStudent]
+    query_budget = 3
 
     def get(self, request):
         user = request.user
-        enrollments = Enrollments.objects.select_related("course").filter(student=user)
+        enrollments = Enrollments.objects.select_related(
+            "course__topic", "course__instructor"
+        ).filter(student=user)
         serializer = EnrolledCourseSerializer(enrollments, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,80 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+
+from accounts.models import User
+from wallet.models import Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a single wallet with concurrent locked credits from many threads "
+        "and compare the legacy read-modify-write, direct F() and ledger modes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--credits", type=int, default=50, help="Credits per thread")
+        parser.add_argument(
+            "--hold-ms",
+            type=float,
+            default=5,
+            help="Time each credit's transaction stays open, simulating the rest of fulfillment",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            self.stderr.write("The wallet benchmark needs a database with row locking.")
+            return
+
+        for mode in ("legacy", "direct", "ledger"):
+            user = User.objects.create_user(
+                first_name="Bench",
+                last_name="Mark",
+                username=f"bench_{uuid.uuid4().hex[:12]}",
+                email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+                role=User.INSTRUCTOR,
+            )
+            try:
+                self.run(mode, user.wallet.pk, options)
+            finally:
+                user.delete()
+
+    def run(self, mode, wallet_id, options):
+        amount = Decimal("1.00")
+        hold = options["hold_ms"] / 1000
+        total = options["threads"] * options["credits"]
+
+        def worker():
+            try:
+                for _ in range(options["credits"]):
+                    with transaction.atomic():
+                        wallet = Wallet.objects.get(pk=wallet_id)
+                        if mode == "legacy":
+                            wallet.locked_balance += amount
+                            wallet.save()
+                        else:
+                            wallet._credit(locked_balance=amount)
+                        time.sleep(hold)
+            finally:
+                connection.close()
+
+        with override_settings(WALLET_LEDGER_CREDITS=mode == "ledger"):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                for future in [pool.submit(worker) for _ in range(options["threads"])]:
+                    future.result()
+            elapsed = time.perf_counter() - start
+            Wallet.settle_pending_credits(wallet_ids=[wallet_id])
+
+        locked_balance = Wallet.objects.get(pk=wallet_id).locked_balance
+        self.stdout.write(
+            f"{mode:<7} {total / elapsed:8.1f} credits/s  "
+            f"locked_balance={locked_balance} expected={amount * total} "
+            f"lost={amount * total - locked_balance}"
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_alter_wallet_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletCredit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('locked_balance', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_credits', to='wallet.wallet')),
+            ],
+        ),
+    ]
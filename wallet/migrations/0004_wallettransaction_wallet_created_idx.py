@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0003_walletcredit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', '-created_at', '-id'], name='wallettxn_wallet_created_idx'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 import uuid
 
-from django.db import models
-from django.db.models import F
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Sum, Value, When
 from django.utils import timezone
 
 
@@ -13,6 +14,11 @@ class Wallet(models.Model):
     - Handles deposits, withdrawals, and refunds.
     - Instructor earnings are held in `locked_balance` for 14 days to ensure refund eligibility.
     - Provides a reliable transaction log via `WalletTransaction`.
+    - Balances are only changed with `F()` updates, never read-modify-write.
+    - With `WALLET_LEDGER_CREDITS` enabled, credits are appended to `WalletCredit`
+      instead of updating the wallet row, and folded in by `settle_pending_credits()`.
+      This keeps concurrent purchases of a popular instructor's courses from
+      queueing on a single row lock.
 
     Fields:
     - user (ForeignKey): The user to whom the wallet belongs.
@@ -26,6 +32,11 @@ class Wallet(models.Model):
     - deposit(): Adds funds to the wallet, typically from payments or refunds.
     - withdraw(): Deducts funds from the wallet for purchases or payouts.
     - refund(): Credits funds back to the wallet in case of a refund.
+    - unlock(): Moves funds from the locked balance to the available balance.
+    - bulk_deposit_locked(): Credits locked earnings to many wallets in one update.
+    - bulk_unlock(): Releases locked earnings of many wallets in one update.
+    - settle(): Folds this wallet's pending ledger credits into its balances.
+    - settle_pending_credits(): Folds pending ledger credits of all wallets in batches.
     """
 
     user = models.OneToOneField(
@@ -82,8 +93,7 @@ class Wallet(models.Model):
 
         if amount <= 0:
             raise ValueError("amount must be positive")
-        self.balance += amount
-        self.save()
+        self._credit(balance=amount)
         self.add_transaction(
             WalletTransaction.TransactionChoices.DEPOSIT,
             amount=amount,
@@ -108,8 +118,7 @@ class Wallet(models.Model):
 
         if amount <= 0:
             raise ValueError("amount must be positive")
-        self.locked_balance += amount
-        self.save()
+        self._credit(locked_balance=amount)
         self.add_transaction(
             WalletTransaction.TransactionChoices.DEPOSIT,
             amount=amount,
@@ -118,6 +127,225 @@ class Wallet(models.Model):
         )
         return True
 
+    def unlock(self, amount, description=""):
+        """
+        Moves funds from the locked balance to the available balance.
+
+        Args:
+            amount (Decimal): Amount to unlock.
+            description (str): Optional description for the transaction.
+
+        Raises:
+            ValueError: If the amount is negative or zero.
+
+        Returns:
+            bool: True if the unlock is successful.
+        """
+
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        self._credit(balance=amount, locked_balance=-amount)
+        self.add_transaction(
+            WalletTransaction.TransactionChoices.DEPOSIT,
+            amount=amount,
+            description=description,
+        )
+        return True
+
+    def _credit(self, balance=0, locked_balance=0):
+        """
+        Applies balance deltas without a read-modify-write of the wallet row.
+
+        - Direct mode: a single `F()` update, then the in-memory balances are refreshed.
+        - Ledger mode: a `WalletCredit` row is appended and the wallet row is left untouched.
+        """
+
+        if settings.WALLET_LEDGER_CREDITS:
+            WalletCredit.objects.create(
+                wallet=self, balance=balance, locked_balance=locked_balance
+            )
+            return
+        Wallet.objects.filter(pk=self.pk).update(
+            balance=F("balance") + balance,
+            locked_balance=F("locked_balance") + locked_balance,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=["balance", "locked_balance", "updated_at"])
+
+    def settle(self):
+        """
+        Folds this wallet's pending credits and reloads its balances.
+
+        Credits claimed by a concurrent settler are waited for rather than
+        skipped, so the reloaded balances include them.
+        """
+        Wallet.settle_pending_credits(wallet_ids=[self.pk], skip_locked=False)
+        self.refresh_from_db(fields=["balance", "locked_balance", "updated_at"])
+
+    def include_pending_credits(self):
+        """Adds this wallet's pending credits to its in-memory balances only."""
+        pending = self.pending_credits.aggregate(
+            balance=Sum("balance"), locked_balance=Sum("locked_balance")
+        )
+        self.balance += pending["balance"] or 0
+        self.locked_balance += pending["locked_balance"] or 0
+
+    @classmethod
+    def settle_pending_credits(cls, wallet_ids=None, batch_size=5000, skip_locked=True):
+        """
+        Folds pending `WalletCredit` rows into wallet balances.
+
+        Each batch runs in its own transaction: the credits are row-locked
+        (by default skipping those claimed by another worker), summed per
+        wallet into a single `F()` update and deleted.
+
+        Args:
+            wallet_ids (list, optional): Only settle these wallets.
+            batch_size (int): Credits folded per transaction.
+            skip_locked (bool): Leave credits locked by another settler to it,
+                instead of waiting for them.
+
+        Returns:
+            int: Number of credits folded.
+        """
+
+        pending = WalletCredit.objects.order_by("id")
+        if wallet_ids is not None:
+            pending = pending.filter(wallet_id__in=wallet_ids)
+
+        settled = 0
+        while True:
+            with transaction.atomic():
+                credits = list(
+                    pending.select_for_update(skip_locked=skip_locked).values_list(
+                        "id", "wallet_id", "balance", "locked_balance"
+                    )[:batch_size]
+                )
+                if not credits:
+                    return settled
+
+                totals = {}
+                for _, wallet_id, balance, locked_balance in credits:
+                    current = totals.get(wallet_id, (0, 0))
+                    totals[wallet_id] = (
+                        current[0] + balance,
+                        current[1] + locked_balance,
+                    )
+                cls.objects.filter(id__in=totals).update(
+                    balance=F("balance") + cls._per_row(
+                        "id", {key: value[0] for key, value in totals.items()}
+                    ),
+                    locked_balance=F("locked_balance") + cls._per_row(
+                        "id", {key: value[1] for key, value in totals.items()}
+                    ),
+                    updated_at=timezone.now(),
+                )
+                WalletCredit.objects.filter(
+                    id__in=[credit[0] for credit in credits]
+                ).delete()
+            settled += len(credits)
+
+    @staticmethod
+    def _per_row(key, amounts):
+        """`CASE` expression mapping each `key` value to its amount."""
+        return Case(
+            *[
+                When(**{key: value}, then=Value(amount))
+                for value, amount in amounts.items()
+            ],
+            default=Value(0),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        )
+
+    @classmethod
+    def bulk_deposit_locked(cls, credits, order=None):
+        """
+        Adds locked funds to several users' wallets at once.
+
+        Args:
+            credits (list): `(user_id, amount, description)` tuples.
+            order (Order, optional): Associated order for all transactions.
+
+        Raises:
+            ValueError: If any amount is negative or zero.
+
+        Returns:
+            list: The created transaction objects.
+        """
+
+        return cls._bulk_credit(credits, credit_field="locked_balance", order=order)
+
+    @classmethod
+    def bulk_unlock(cls, credits):
+        """
+        Moves funds from the locked balance to the available balance of several
+        users' wallets at once (e.g. matured instructor earnings).
+
+        Args:
+            credits (list): `(user_id, amount, description)` tuples.
+
+        Raises:
+            ValueError: If any amount is negative or zero.
+
+        Returns:
+            list: The created transaction objects.
+        """
+
+        return cls._bulk_credit(
+            credits, credit_field="balance", debit_field="locked_balance"
+        )
+
+    @classmethod
+    def _bulk_credit(cls, credits, credit_field, debit_field=None, order=None):
+        """
+        Credits are summed per user into a single `F()` update (or, in ledger
+        mode, one `WalletCredit` row per wallet), and every credit is logged
+        with one batched `WalletTransaction` insert.
+        """
+
+        totals = {}
+        for user_id, amount, _ in credits:
+            if amount <= 0:
+                raise ValueError("amount must be positive")
+            totals[user_id] = totals.get(user_id, 0) + amount
+        if not totals:
+            return []
+
+        wallets = cls.objects.filter(user_id__in=totals)
+        wallet_ids = dict(wallets.values_list("user_id", "id"))
+        if settings.WALLET_LEDGER_CREDITS:
+            WalletCredit.objects.bulk_create(
+                [
+                    WalletCredit(
+                        wallet_id=wallet_ids[user_id],
+                        **{credit_field: total},
+                        **({debit_field: -total} if debit_field else {}),
+                    )
+                    for user_id, total in totals.items()
+                ]
+            )
+        else:
+            per_user = cls._per_row("user_id", totals)
+            changes = {credit_field: F(credit_field) + per_user}
+            if debit_field:
+                changes[debit_field] = F(debit_field) - per_user
+            wallets.update(updated_at=timezone.now(), **changes)
+
+        return WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(
+                    wallet_id=wallet_ids[user_id],
+                    transaction_no=WalletTransaction.generate_transaction_no(),
+                    transaction_type=WalletTransaction.TransactionChoices.DEPOSIT,
+                    amount=amount,
+                    description=description,
+                    order=order,
+                    status=WalletTransaction.TransactionStatus.COMPLETED,
+                )
+                for user_id, amount, description in credits
+            ]
+        )
+
     def withdraw(self, amount, description="", order=None):
         """
         Withdraws funds from the wallet, ensuring sufficient balance.
@@ -136,6 +364,8 @@ class Wallet(models.Model):
 
         if amount <= 0:
             raise ValueError("Amount must be positive")
+        if settings.WALLET_LEDGER_CREDITS:
+            self.settle()
         if Wallet.objects.filter(id=self.id, balance__gte=amount).update(
             balance=F("balance") - amount
         ):
@@ -163,8 +393,7 @@ class Wallet(models.Model):
 
         if amount <= 0:
             raise ValueError("Amount must be positive")
-        self.balance += amount
-        self.save()
+        self._credit(balance=amount)
 
         # create a transaction record for the refund
         self.add_transaction(
@@ -176,6 +405,34 @@ class Wallet(models.Model):
         return True
 
 
+class WalletCredit(models.Model):
+    """
+    Pending balance change waiting to be folded into its wallet.
+
+    - Only written when `WALLET_LEDGER_CREDITS` is enabled.
+    - Appending a row never locks the wallet row, so concurrent credits to the
+      same wallet do not serialize.
+    - Folded periodically by `wallet.tasks.settle_wallet_credits_task`, and on
+      demand before a wallet is debited. Wallet reads add them without folding.
+
+    Fields:
+    - wallet (ForeignKey): The wallet the change belongs to.
+    - balance (DecimalField): Change to the available balance.
+    - locked_balance (DecimalField): Change to the locked balance.
+    - created_at (DateTimeField): Timestamp when the credit was recorded.
+    """
+
+    wallet = models.ForeignKey(
+        Wallet, on_delete=models.CASCADE, related_name="pending_credits"
+    )
+    balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    locked_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.wallet_id} - {self.balance} / {self.locked_balance}"
+
+
 class WalletTransaction(models.Model):
     """
     Logs all wallet-related financial activities.
@@ -196,6 +453,7 @@ class WalletTransaction(models.Model):
     - created_at (DateTimeField): Timestamp when the transaction was created.
 
     Methods:
+    - generate_transaction_no(): Builds a unique transaction number.
     - save(): Auto-generates a unique transaction number before saving.
     """
 
@@ -237,17 +495,31 @@ class WalletTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["wallet", "-created_at", "-id"],
+                name="wallettxn_wallet_created_idx",
+            ),
+        ]
+
+    @staticmethod
+    def generate_transaction_no():
+        """
+        Combines a timestamp and a random UUID for uniqueness.
+
+        Also used for rows inserted with `bulk_create`, which bypasses `save()`.
+        """
+        unique_id = uuid.uuid4().hex[:10].upper()
+        timestamp = timezone.now().strftime("%y%m%d%H%M%S")
+        return f"SKEXA-{timestamp}-{unique_id}"
 
     def save(self, *args, **kwargs):
         """
         Generates a unique transaction number before saving.
 
-        - Combines a timestamp and a random UUID for uniqueness.
         - Ensures no duplicates by enforcing `unique=True` on `transaction_no`.
         """
 
         if not self.transaction_no:
-            unique_id = unique_id = uuid.uuid4().hex[:10].upper()
-            timestamp = timezone.now().strftime("%y%m%d%H%M%S")
-            self.transaction_no = f"SKEXA-{timestamp}-{unique_id}"
+            self.transaction_no = self.generate_transaction_no()
         super().save(*args, **kwargs)
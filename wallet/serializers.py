@@ -1,6 +1,12 @@
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Wallet, WalletTransaction
 
+SUMMARY_PERIOD_DAYS = 30
+
 
 class WalletTransactionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,7 +22,13 @@ class WalletTransactionSerializer(serializers.ModelSerializer):
 
 
 class WalletSerializer(serializers.ModelSerializer):
-    transactions = WalletTransactionSerializer(many=True, read_only=True)
+    """
+    Wallet balances with a summary of recent activity.
+
+    The full ledger is served separately by `WalletTransactionListView`.
+    """
+
+    summary = serializers.SerializerMethodField()
 
     class Meta:
         model = Wallet
@@ -25,5 +37,32 @@ class WalletSerializer(serializers.ModelSerializer):
             "locked_balance",
             "created_at",
             "updated_at",
-            "transactions",
+            "summary",
         ]
+
+    def get_summary(self, obj):
+        """
+        Totals per transaction type over the last `SUMMARY_PERIOD_DAYS` days,
+        read through the `(wallet, created_at)` index so the cost does not grow
+        with the size of the ledger.
+        """
+        since = timezone.now() - timedelta(days=SUMMARY_PERIOD_DAYS)
+        recent = obj.transactions.filter(created_at__gte=since)
+        totals = recent.aggregate(
+            transactions=Count("id"),
+            **{
+                choice: Sum("amount", filter=Q(transaction_type=choice))
+                for choice in WalletTransaction.TransactionChoices.values
+            },
+        )
+        last_transaction = obj.transactions.order_by("-created_at").first()
+        return {
+            "period_days": SUMMARY_PERIOD_DAYS,
+            **{
+                key: value if value is not None else 0
+                for key, value in totals.items()
+            },
+            "last_transaction_at": (
+                last_transaction.created_at if last_transaction else None
+            ),
+        }
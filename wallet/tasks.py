@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .models import Wallet
+
+
+@shared_task
+def settle_wallet_credits_task():
+    settled = Wallet.settle_pending_credits()
+    return f"Settled {settled} wallet credits"
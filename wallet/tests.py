@@ -1,3 +1,209 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from wallet.models import Wallet, WalletCredit, WalletTransaction
+
+
+class WalletCreditTestCase(TestCase):
+    """
+    Test cases for direct and ledger wallet crediting.
+    """
+
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            first_name="name",
+            last_name="sam",
+            email="instructor@example.com",
+            username="instructor",
+            password="instructor123",
+            role=User.INSTRUCTOR,
+        )
+        self.wallet = self.instructor.wallet
+
+    def test_direct_credit_does_not_overwrite_concurrent_changes(self):
+        """A stale in-memory wallet still adds to the stored balance"""
+        stale = Wallet.objects.get(pk=self.wallet.pk)
+        self.wallet.deposit_locked(Decimal("10.00"))
+        stale.deposit_locked(Decimal("5.00"))
+
+        self.assertEqual(stale.locked_balance, Decimal("15.00"))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.locked_balance, Decimal("15.00"))
+
+    @override_settings(WALLET_LEDGER_CREDITS=True)
+    def test_ledger_credits_are_folded_on_settle(self):
+        """Ledger mode leaves the wallet row untouched until credits are settled"""
+        self.wallet.deposit_locked(Decimal("10.00"))
+        self.wallet.unlock(Decimal("4.00"))
+        Wallet.bulk_deposit_locked([(self.instructor.id, Decimal("6.00"), "Bulk")])
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.locked_balance, Decimal("0.00"))
+        self.assertEqual(WalletCredit.objects.count(), 3)
+        self.assertEqual(WalletTransaction.objects.filter(wallet=self.wallet).count(), 3)
+
+        self.assertEqual(Wallet.settle_pending_credits(), 3)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("4.00"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("12.00"))
+        self.assertFalse(WalletCredit.objects.exists())
+
+    @override_settings(WALLET_LEDGER_CREDITS=True)
+    def test_withdraw_settles_pending_credits_first(self):
+        """Pending credits count towards the balance available for withdrawal"""
+        self.wallet.deposit(Decimal("20.00"))
+        self.assertTrue(self.wallet.withdraw(Decimal("15.00")))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("5.00"))
+
+
+class WalletTransactionHistoryTestCase(APITestCase):
+    """
+    Test cases for the wallet summary and the paginated transaction history.
+    """
+
+    wallet_url = "/wallet/my-wallet/"
+    url = "/wallet/transactions/"
+
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            first_name="name",
+            last_name="sam",
+            email="instructor@example.com",
+            username="instructor",
+            password="instructor123",
+            role=User.INSTRUCTOR,
+        )
+        self.wallet = self.instructor.wallet
+        token = str(RefreshToken.for_user(self.instructor).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def create_transactions(self, count, transaction_type, days_ago=0, **kwargs):
+        WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(
+                    wallet=self.wallet,
+                    transaction_no=f"TXN-{transaction_type}-{days_ago}-{index}",
+                    transaction_type=transaction_type,
+                    amount=Decimal("10.00"),
+                    **kwargs,
+                )
+                for index in range(count)
+            ]
+        )
+        if days_ago:
+            WalletTransaction.objects.filter(
+                transaction_no__startswith=f"TXN-{transaction_type}-{days_ago}-"
+            ).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_wallet_returns_summary_instead_of_transactions(self):
+        """The wallet endpoint summarises recent activity without embedding the ledger"""
+        self.create_transactions(3, WalletTransaction.TransactionChoices.DEPOSIT)
+        self.create_transactions(1, WalletTransaction.TransactionChoices.WITHDRAW)
+        self.create_transactions(2, WalletTransaction.TransactionChoices.DEPOSIT, days_ago=60)
+
+        response = self.client.get(self.wallet_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("transactions", response.data)
+
+        summary = response.data["summary"]
+        self.assertEqual(summary["transactions"], 4)
+        self.assertEqual(summary["deposit"], Decimal("30.00"))
+        self.assertEqual(summary["withdraw"], Decimal("10.00"))
+        self.assertEqual(summary["refund"], 0)
+        self.assertIsNotNone(summary["last_transaction_at"])
+
+    def test_wallet_query_count_is_independent_of_ledger_size(self):
+        """Reading the wallet costs the same for small and large ledgers"""
+        self.create_transactions(2, WalletTransaction.TransactionChoices.DEPOSIT)
+        self.client.get(self.wallet_url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.wallet_url)
+
+        self.create_transactions(200, WalletTransaction.TransactionChoices.PURCHASE)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.wallet_url)
+
+        self.assertEqual(len(small), len(large))
+
+    @override_settings(WALLET_LEDGER_CREDITS=True)
+    def test_wallet_shows_pending_credits_without_settling(self):
+        """Reading the wallet adds pending credits but leaves them to the task"""
+        self.wallet.deposit(Decimal("20.00"))
+        self.wallet.deposit_locked(Decimal("5.00"))
+
+        response = self.client.get(self.wallet_url)
+        self.assertEqual(response.data["balance"], "20.00")
+        self.assertEqual(response.data["locked_balance"], "5.00")
+        self.assertEqual(WalletCredit.objects.count(), 2)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("0.00"))
+
+    def test_transactions_are_cursor_paginated(self):
+        """History pages follow `next` links without a total count"""
+        self.create_transactions(15, WalletTransaction.TransactionChoices.DEPOSIT)
+
+        response = self.client.get(self.url, {"page_size": 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 10)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+    def test_transactions_are_filtered(self):
+        """Type, status and date range filters narrow the history"""
+        self.create_transactions(2, WalletTransaction.TransactionChoices.DEPOSIT)
+        self.create_transactions(
+            1,
+            WalletTransaction.TransactionChoices.WITHDRAW,
+            status=WalletTransaction.TransactionStatus.FAILED,
+        )
+        self.create_transactions(3, WalletTransaction.TransactionChoices.DEPOSIT, days_ago=10)
+
+        def count(**params):
+            return len(self.client.get(self.url, params).data["results"])
+
+        self.assertEqual(count(type="deposit"), 5)
+        self.assertEqual(count(status="failed"), 1)
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(count(date_from=since), 3)
+        until = (timezone.localdate() - timedelta(days=10)).isoformat()
+        self.assertEqual(count(type="deposit", date_to=until), 3)
+
+    def test_transactions_reject_invalid_filters(self):
+        """Unknown types and malformed dates are rejected"""
+        self.assertEqual(
+            self.client.get(self.url, {"type": "gift"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(self.url, {"date_from": "yesterday"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_transactions_are_scoped_to_the_user(self):
+        """Other users' transactions are never listed"""
+        other = User.objects.create_user(
+            first_name="name",
+            last_name="sam",
+            email="other@example.com",
+            username="other",
+            password="other123",
+            role=User.INSTRUCTOR,
+        )
+        other.wallet.deposit(Decimal("5.00"))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"], [])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import MyWalletView
+from .views import MyWalletView, WalletTransactionListView
 
 urlpatterns = [
     path("my-wallet/", MyWalletView.as_view(), name="my-wallet"),
+    path("transactions/", WalletTransactionListView.as_view(), name="wallet-transactions"),
 ]
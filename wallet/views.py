@@ -1,13 +1,23 @@
+from datetime import datetime, time, timedelta
+
 from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework import status
-from .models import Wallet
-from .serializers import WalletSerializer
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from skillexa.pagination import CreatedAtCursorPagination
+from skillexa.query_budget import QueryBudgetMixin
+from .models import Wallet, WalletTransaction
+from .serializers import WalletSerializer, WalletTransactionSerializer
 
 
-class MyWalletView(APIView):
+class MyWalletView(QueryBudgetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 9
 
     def get(self, request):
         try:
@@ -18,5 +28,79 @@ class MyWalletView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        # Pending credits are folded by the scheduled settle task; a GET only
+        # shows them
+        if settings.WALLET_LEDGER_CREDITS:
+            wallet.include_pending_credits()
+
         serializer = WalletSerializer(wallet)
         return Response(serializer.data)
+
+
+class WalletTransactionListView(QueryBudgetMixin, ListAPIView):
+    """
+    Cursor paginated transaction history of the authenticated user's wallet.
+
+    Query params:
+    - type: One of `WalletTransaction.TransactionChoices`.
+    - status: One of `WalletTransaction.TransactionStatus`.
+    - date_from / date_to: ISO dates or datetimes; a bare `date_to` includes the
+      whole day.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = WalletTransactionSerializer
+    pagination_class = CreatedAtCursorPagination
+    query_budget = 3
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = WalletTransaction.objects.filter(wallet__user=self.request.user)
+
+        transaction_type = params.get("type")
+        if transaction_type:
+            if transaction_type not in WalletTransaction.TransactionChoices.values:
+                raise ValidationError({"type": "Invalid transaction type."})
+            queryset = queryset.filter(transaction_type=transaction_type)
+
+        transaction_status = params.get("status")
+        if transaction_status:
+            if transaction_status not in WalletTransaction.TransactionStatus.values:
+                raise ValidationError({"status": "Invalid transaction status."})
+            queryset = queryset.filter(status=transaction_status)
+
+        date_from = self.parse_bound(params, "date_from")
+        if date_from:
+            queryset = queryset.filter(created_at__gte=date_from)
+
+        date_to = self.parse_bound(params, "date_to", end_of_day=True)
+        if date_to:
+            queryset = queryset.filter(created_at__lt=date_to)
+
+        return queryset
+
+    @staticmethod
+    def parse_bound(params, name, end_of_day=False):
+        """Parse a date range bound into an aware datetime, or `None` if absent."""
+        value = params.get(name)
+        if not value:
+            return None
+
+        try:
+            day = parse_date(value)
+            if day is not None:
+                if end_of_day:
+                    day += timedelta(days=1)
+                moment = datetime.combine(day, time.min)
+            else:
+                moment = parse_datetime(value)
+                if moment is None:
+                    raise ValueError
+                if end_of_day:
+                    moment += timedelta(microseconds=1)
+        except ValueError:
+            raise ValidationError({name: "Enter a valid ISO 8601 date or datetime."})
+
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment